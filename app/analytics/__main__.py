@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Update and print the forecast accuracy rollups (only runs not counted yet are read).
+
+    python -m app.analytics --symbol BTCUSDT --interval 1h
+    python -m app.analytics --reset          # recount everything, e.g. after changing strategy parameters
+"""
+
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from app.analytics.accuracy import update_accuracy_rollups
+from app.db.accuracy import fetch_accuracy_report, reset_accuracy_rollups
+from app.strategies.forecast import ForecastStrategy
+
+
+logger = logging.getLogger("strategies.analytics")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Forecast accuracy against realized klines.")
+    parser.add_argument("--symbol", type=str, default=None, help="Only report this symbol")
+    parser.add_argument("--interval", type=str, default=None, help="Only report this interval")
+    parser.add_argument("--model", type=str, default=None, help="Only report this model")
+    parser.add_argument("--since-days", type=int, default=None,
+                        help="Only count runs created in the last N days (default: all not counted yet, "
+                             "from the stored watermark)")
+    parser.add_argument("--batch-runs", type=int, default=2000, help="Prediction runs per transaction")
+    parser.add_argument("--reset", action="store_true", help="Clear the rollups and recount every run")
+    parser.add_argument("--report-only", action="store_true", help="Print the rollups without updating them")
+    # Calibration buckets follow ForecastStrategy's vote / path-stop rules with these parameters.
+    parser.add_argument("--fee-pct", type=float, default=0.0)
+    parser.add_argument("--extra-gain", type=float, default=0.00001)
+    parser.add_argument("--extra-loss", type=float, default=0.000015)
+    parser.add_argument("--label-width", type=int, default=12)
+    parser.add_argument("--min-abs-gain-pct", type=float, default=0.0020)
+    parser.add_argument("--vote-window", type=int, default=5)
+    parser.add_argument("--log-level", type=str, default="INFO")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    )
+
+    if not args.report_only:
+        strategy = ForecastStrategy(
+            fee_pct=args.fee_pct,
+            extra_gain=args.extra_gain,
+            extra_loss=args.extra_loss,
+            label_width=args.label_width,
+            min_abs_gain_pct=args.min_abs_gain_pct,
+            vote_window=args.vote_window,
+        )
+        if args.reset:
+            reset_accuracy_rollups()
+            logger.info("Accuracy rollups cleared")
+        since = datetime.utcnow() - timedelta(days=args.since_days) if args.since_days else None
+        totals = update_accuracy_rollups(strategy, since=since, batch_runs=args.batch_runs)
+        logger.info("Accuracy rollups updated | %s", totals)
+
+    step_cols, step_rows, cal_cols, cal_rows = fetch_accuracy_report(args.symbol, args.interval, args.model)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(pd.DataFrame(step_rows, columns=step_cols).to_string(index=False))
+        print()
+        print(pd.DataFrame(cal_rows, columns=cal_cols).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+# app/analytics/accuracy.py
+"""
+Forecast accuracy against realized closes, as incremental rollups.
+
+Each batch of prediction runs whose horizon has fully closed is read in one
+set-based query (app.db.accuracy) together with the klines covering it (one
+range per symbol/interval), aligned as-of with np.searchsorted, scored in a
+few vectorized NumPy passes and added to the rollup sums in the same
+transaction that marks the runs as counted, so only new runs are processed.
+A stored watermark (the position just before the oldest run not counted yet)
+is where the next update starts, so counted history is never rescanned.
+
+- Per horizon step: directional hit rate, MAE / MAPE / RMSE and bias.
+- Per ForecastStrategy signal (vote counts, path-stop check, final action):
+  how often the realized move agreed, and the mean realized return.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.db.accuracy import (
+    advance_accuracy_watermark,
+    fetch_accuracy_watermark,
+    fetch_kline_ranges,
+    fetch_pending_accuracy_runs,
+    lock_accuracy_rollups,
+    write_accuracy_rollups,
+)
+from app.db.connection import get_connection
+from app.db.models import as_datetime64
+from app.strategies.forecast import BUY, SHORT, STATUS_OK, ForecastStrategy, right_align
+from app.utils.intervals import interval_seconds
+from app.utils.startup import lazy_import
+
+pd = lazy_import("pandas")
+
+
+logger = logging.getLogger("strategies.analytics.accuracy")
+
+_ACTION_NAMES = {BUY: "BUY", SHORT: "SHORT"}
+
+_NIL_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+class AccuracyRollups(NamedTuple):
+    runs: List[tuple]         # (prediction_id, coin, interval, model_name, created_at, points)
+    steps: List[tuple]        # (coin, interval, model_name, step, points, direction_hits, abs_err_sum, abs_pct_err_sum, sq_err_sum, err_sum)
+    calibration: List[tuple]  # (coin, interval, model_name, signal, bucket, runs, hits, return_sum)
+
+
+def left_align(rows: Sequence[Optional[Sequence[float]]]) -> np.ndarray:
+    """(rows, width) float matrix with row i's values first and NaN after (None -> NaN)."""
+    rows = [() if r is None else r for r in rows]
+    width = max((len(r) for r in rows), default=0)
+    out = np.full((len(rows), width), np.nan)
+    for i, r in enumerate(rows):
+        if len(r):
+            out[i, :len(r)] = np.asarray(r, dtype="float64")
+    return out
+
+
+def _tolerance(interval: str) -> timedelta:
+    """How stale the as-of candle may be: one interval (exact match for unknown interval strings)."""
+    try:
+        return timedelta(seconds=interval_seconds(interval))
+    except ValueError:
+        return timedelta(0)
+
+
+def kline_ranges(pending: Sequence[tuple]) -> Dict[Tuple[str, str], Tuple[datetime, datetime]]:
+    """[first point - tolerance, last point] per (coin, interval) of fetch_pending_accuracy_runs rows."""
+    ranges: Dict[Tuple[str, str], Tuple[datetime, datetime]] = {}
+    for _, coin, interval, _, _, _, times, _ in pending:
+        if not times:
+            continue
+        lo, hi = times[0] - _tolerance(interval), times[-1]
+        prev = ranges.get((coin, interval))
+        ranges[(coin, interval)] = (min(lo, prev[0]), max(hi, prev[1])) if prev else (lo, hi)
+    return ranges
+
+
+def align_realized(
+    pending: Sequence[tuple],
+    klines: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]],
+) -> List[tuple]:
+    """
+    Replace each pending row's point times with the realized close per point:
+    the close of the newest kline with open_time <= point_time, NaN when that
+    kline is more than one interval old. One searchsorted per (coin, interval).
+    """
+    by_key: Dict[Tuple[str, str], List[int]] = {}
+    for i, row in enumerate(pending):
+        by_key.setdefault((row[1], row[2]), []).append(i)
+
+    realized: List[np.ndarray] = [np.empty(0)] * len(pending)
+    for key, idx in by_key.items():
+        k_times, k_close = klines.get(key, (np.empty(0, dtype="datetime64[ns]"), np.empty(0)))
+        lengths = [len(pending[i][6] or ()) for i in idx]
+        flat = [t for i in idx for t in (pending[i][6] or ())]
+        if not flat:
+            continue
+        times = as_datetime64(flat)
+        pos = np.searchsorted(k_times, times, side="right") - 1
+        safe = np.clip(pos, 0, max(len(k_times) - 1, 0))
+        values = np.full(len(times), np.nan)
+        if len(k_times):
+            fresh = (pos >= 0) & (times - k_times[safe] <= np.timedelta64(_tolerance(key[1])))
+            values[fresh] = k_close[safe[fresh]]
+        for i, part in zip(idx, np.split(values, np.cumsum(lengths)[:-1])):
+            realized[i] = part
+
+    return [
+        (pid, coin, interval, model, created, entry, forecast, realized[i])
+        for i, (pid, coin, interval, model, created, entry, _, forecast) in enumerate(pending)
+    ]
+
+
+def _records(frame: pd.DataFrame, keys: List[tuple]) -> List[tuple]:
+    """Grouped sums with the (coin, interval, model_name) key expanded in front, as plain Python values."""
+    out = []
+    for row in frame.itertuples(index=False):
+        values = [v.item() if isinstance(v, np.generic) else v for v in row]
+        out.append((*keys[values[0]], *values[1:]))
+    return out
+
+
+def accuracy_rollups(rows: Sequence[tuple], strategy: ForecastStrategy) -> AccuracyRollups:
+    """
+    Score align_realized() rows:
+    (prediction_id, coin, interval, model_name, created_at, entry, forecast[], realized[]).
+    """
+    if not rows:
+        return AccuracyRollups([], [], [])
+
+    pids, coins, intervals, models, created, entries, forecasts, realized = zip(*rows)
+    group, keys = pd.factorize(pd.Series(list(zip(coins, intervals, models)), dtype=object))
+    keys = list(keys)
+    entry = np.array([np.nan if e is None else e for e in entries], dtype="float64")
+
+    # ----------------------------
+    # Per horizon step (left-aligned: column j is step j + 1)
+    # ----------------------------
+    f, r = left_align(forecasts), left_align(realized)
+    e = entry[:, None]
+    valid = np.isfinite(f) & np.isfinite(r) & np.isfinite(e) & (r != 0)
+    row_idx, col_idx = np.nonzero(valid)
+    fv, rv, ev = f[valid], r[valid], entry[row_idx]
+    err = fv - rv
+    steps = pd.DataFrame({
+        "group": group[row_idx],
+        "step": col_idx + 1,
+        "points": 1,
+        "direction_hits": (np.sign(fv - ev) == np.sign(rv - ev)).astype(np.int64),
+        "abs_err_sum": np.abs(err),
+        "abs_pct_err_sum": np.abs(err) / np.abs(rv),
+        "sq_err_sum": err * err,
+        "err_sum": err,
+    }).groupby(["group", "step"], as_index=False, sort=True).sum()
+
+    points = valid.sum(axis=1)
+    runs = [
+        (str(pids[i]), coins[i], intervals[i], models[i], created[i], int(points[i]))
+        for i in range(len(rows))
+    ]
+
+    # ----------------------------
+    # Per run, bucketed by the strategy's own signals (right-aligned like evaluate_arrays)
+    # ----------------------------
+    fr = right_align([fc or () for fc in forecasts])
+    rr = right_align([() if rz is None else rz for rz in realized], width=fr.shape[1])
+    sig = strategy.evaluate_arrays(entry, fr, [len(fc or ()) for fc in forecasts])
+
+    width = strategy.label_width if strategy.label_width > 0 else fr.shape[1]
+    preds, real = fr[:, -width:], rr[:, -width:]
+    votes_f = preds[:, -strategy.vote_window:] if strategy.vote_window > 0 else preds
+    realized_end = rr[:, -1] if rr.shape[1] else np.full(len(rows), np.nan)
+    scored = (sig.status == STATUS_OK) & np.isfinite(realized_end) & np.isfinite(entry)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ret = realized_end / entry - 1
+        up_votes = (votes_f > e).sum(axis=1)
+        down_votes = (votes_f < e).sum(axis=1)
+        buy_stop, short_stop = entry * (1 - strategy.min_loss), entry * (1 + strategy.min_loss)
+        pred_min = np.where(np.isnan(preds), np.inf, preds).min(axis=1)
+        pred_max = np.where(np.isnan(preds), -np.inf, preds).max(axis=1)
+        real_min = np.where(np.isnan(real), np.inf, real).min(axis=1)
+        real_max = np.where(np.isnan(real), -np.inf, real).max(axis=1)
+        required = max(strategy.min_gain, strategy.min_abs_gain_pct)
+        action_hit = np.where(
+            sig.action == BUY, ret > 0, np.where(sig.action == SHORT, ret < 0, np.abs(ret) <= required)
+        )
+
+    signals = (
+        ("up_votes", up_votes.astype(str), ret > 0),
+        ("down_votes", down_votes.astype(str), ret < 0),
+        ("path_buy", np.where(pred_min >= buy_stop, "ok", "hits_stop"), real_min >= buy_stop),
+        ("path_short", np.where(pred_max <= short_stop, "ok", "hits_stop"), real_max <= short_stop),
+        ("action", np.array([_ACTION_NAMES.get(int(a), "HOLD") for a in sig.action]), action_hit),
+    )
+    calibration = pd.concat([
+        pd.DataFrame({
+            "group": group[scored],
+            "signal": name,
+            "bucket": bucket[scored],
+            "runs": 1,
+            "hits": hits[scored].astype(np.int64),
+            "return_sum": ret[scored],
+        })
+        for name, bucket, hits in signals
+    ]).groupby(["group", "signal", "bucket"], as_index=False, sort=True).sum()
+
+    return AccuracyRollups(runs, _records(steps, keys), _records(calibration, keys))
+
+
+def update_accuracy_rollups(
+    strategy: ForecastStrategy,
+    since=None,
+    batch_runs: int = 2000,
+    max_batches: Optional[int] = None,
+) -> dict:
+    """
+    Count every newly realized prediction run, `batch_runs` per transaction.
+    Starts at the stored watermark, or at `since` when given (which leaves the
+    watermark alone). Returns totals for the runs processed by this call.
+    """
+    totals = {"batches": 0, "runs": 0, "points": 0, "seconds": 0.0}
+    t0 = time.perf_counter()
+
+    if since is not None:
+        start = None
+        after = (since, _NIL_UUID)
+    else:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            start = fetch_accuracy_watermark(cursor) or (datetime(1970, 1, 1), _NIL_UUID)
+            cursor.close()
+        after = start
+
+    # Keyset cursor: each batch starts after the last run seen, so runs that are
+    # deferred (horizon not closed yet) or already counted are not rescanned.
+
+    while max_batches is None or totals["batches"] < max_batches:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            lock_accuracy_rollups(cursor)
+            pending = fetch_pending_accuracy_runs(cursor, after, batch_runs)
+            rows = align_realized(pending, fetch_kline_ranges(cursor, kline_ranges(pending)))
+            rollups = accuracy_rollups(rows, strategy)
+            write_accuracy_rollups(cursor, *rollups)
+            cursor.close()
+
+        if not rows:
+            break
+        after = (pending[-1][4], str(pending[-1][0]))
+        totals["batches"] += 1
+        totals["runs"] += len(rollups.runs)
+        totals["points"] += sum(run[-1] for run in rollups.runs)
+        logger.info("Accuracy batch | runs=%s points=%s", len(rollups.runs), sum(run[-1] for run in rollups.runs))
+        if len(rows) < batch_runs:
+            break
+
+    if start is not None:
+        # Deferred runs were skipped above: the watermark stops just before the
+        # oldest of them, so they are picked up once their horizon closes.
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            lock_accuracy_rollups(cursor)
+            watermark = advance_accuracy_watermark(cursor, start)
+            cursor.close()
+        logger.debug("Accuracy watermark | after=%s", watermark)
+
+    totals["seconds"] = round(time.perf_counter() - t0, 3)
+    return totals
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Backtest ForecastStrategy (optionally RSI-confirmed) over every stored prediction.
+
+    python -m app.backtest --symbols BTCUSDT,ETHUSDT --interval 1h --since-days 365
+"""
+
+import argparse
+import logging
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from app.backtest.engine import run_backtest
+from app.strategies.forecast import ForecastStrategy
+from app.utils.symbols import load_symbols
+
+
+logger = logging.getLogger("strategies.backtest")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Backtest strategies over stored predictions.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--symbols", help="Comma separated symbols, e.g. BTCUSDT,ETHUSDT")
+    target.add_argument("--symbols-file", help="File with one symbol per line")
+    parser.add_argument("--interval", type=str, default="1h", help="Kline interval (default: 1h)")
+    parser.add_argument("--model", type=str, default="GRU", help="Model name (default: GRU)")
+    parser.add_argument("--since-days", type=int, default=365, help="Prediction runs window in days (default: 365)")
+    parser.add_argument("--fee-pct", type=float, default=0.0)
+    parser.add_argument("--extra-gain", type=float, default=0.00001)
+    parser.add_argument("--extra-loss", type=float, default=0.000015)
+    parser.add_argument("--label-width", type=int, default=12)
+    parser.add_argument("--min-abs-gain-pct", type=float, default=0.0020)
+    parser.add_argument("--vote-window", type=int, default=5)
+    parser.add_argument("--no-vote-strict", action="store_true")
+    parser.add_argument("--no-path-stop", action="store_true")
+    parser.add_argument("--rsi-threshold", type=float, default=None,
+                        help="Require RSIMomentumStrategy confirmation with this threshold")
+    parser.add_argument("--rsi-min-gain", type=float, default=None,
+                        help="Min forecast gain for RSI confirmation (default: 2 * fee-pct, as live and the sweep)")
+    parser.add_argument("--hold-candles", type=int, default=None, help="Max candles per trade (default: label width)")
+    parser.add_argument("--out", type=str, default=None, help="Optional CSV path for per-run trades")
+    parser.add_argument("--log-level", type=str, default="INFO")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    )
+
+    strategy = ForecastStrategy(
+        fee_pct=args.fee_pct,
+        extra_gain=args.extra_gain,
+        extra_loss=args.extra_loss,
+        label_width=args.label_width,
+        min_abs_gain_pct=args.min_abs_gain_pct,
+        vote_window=args.vote_window,
+        vote_strict=not args.no_vote_strict,
+        enforce_path_stop=not args.no_path_stop,
+    )
+    end = datetime.utcnow()
+    start = end - timedelta(days=args.since_days)
+
+    symbols = load_symbols(args.symbols, args.symbols_file)
+    logger.info("Backtest | symbols=%s interval=%s model=%s %s", len(symbols), args.interval, args.model, strategy)
+
+    result = run_backtest(
+        symbols,
+        args.interval,
+        args.model,
+        strategy,
+        start=pd.Timestamp(start),
+        end=pd.Timestamp(end),
+        rsi_threshold=args.rsi_threshold,
+        rsi_min_gain=2 * args.fee_pct if args.rsi_min_gain is None else args.rsi_min_gain,
+        hold_candles=args.hold_candles,
+    )
+
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(result.summary.to_string(index=False))
+
+    if args.out:
+        result.trades.to_csv(args.out, index=False)
+        logger.info("Wrote %s trades to %s", len(result.trades), args.out)
+
+
+if __name__ == "__main__":
+    main()
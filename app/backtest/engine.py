@@ -0,0 +1,304 @@
+# app/backtest/engine.py
+"""
+Vectorized historical backtest for ForecastStrategy (+ optional RSI confirmation).
+
+Every stored prediction package is replayed against realized binance_klines
+closes. Decisions, stop-loss/take-profit hits and PnL are computed for all runs
+of a coin at once with NumPy array operations; there is no per-run Python loop.
+
+Trade model (close-to-close, because closes are what we store and read):
+- a trade opens at the run's entry price (last historical point)
+- the path is the next `hold_candles` closes after the entry time
+- the first close at/through the stop or target exits at that level; if both
+  happen on the same candle the stop wins (conservative)
+- otherwise the trade exits at the last close of the path
+- pnl_pct = side * (exit - entry) / entry - 2 * fee_pct
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+
+from app.db.fetch import PredictionHistory, fetch_prediction_history, get_stored_klines
+from app.strategies.forecast import BUY, HOLD, SHORT, ForecastSignals, ForecastStrategy
+
+
+logger = logging.getLogger("strategies.backtest")
+
+
+class BacktestResult(NamedTuple):
+    trades: pd.DataFrame     # one row per run
+    summary: pd.DataFrame    # one row per coin + "ALL"
+
+
+# ----------------------------
+# Signals
+# ----------------------------
+def forecast_signals(
+    strategy: ForecastStrategy,
+    entry: np.ndarray,
+    forecast: np.ndarray,
+    lengths: Optional[np.ndarray] = None,
+) -> ForecastSignals:
+    """ForecastStrategy decisions for many runs at once (right-aligned forecast matrix, points per run)."""
+    return strategy.evaluate_arrays(entry, forecast, lengths)
+
+
+def rsi_confirmations(
+    entry: np.ndarray,
+    target: np.ndarray,
+    rsi: np.ndarray,
+    rsi_threshold: float,
+    min_gain: float = 0.0,
+) -> np.ndarray:
+    """RSIMomentumStrategy actions for many runs at once (same rules as evaluate())."""
+    with np.errstate(invalid="ignore"):
+        ready = np.isfinite(rsi) & np.isfinite(entry) & np.isfinite(target)
+        buy = ready & (target > entry * (1 + min_gain)) & (rsi > rsi_threshold)
+        short = ready & ~buy & (target < entry * (1 - min_gain)) & (rsi < (100 - rsi_threshold))
+    return np.where(buy, BUY, np.where(short, SHORT, HOLD)).astype(np.int8)
+
+
+def rsi_at_entry(closes: np.ndarray, last_closed: np.ndarray, entry_times: np.ndarray) -> np.ndarray:
+    """RSI(14) of the last candle at or before each entry (NaN without one)."""
+    rsi = np.full(len(last_closed), np.nan)
+    if len(closes):
+        rsi_series = RSIIndicator(close=pd.Series(closes), window=14).rsi().to_numpy()
+        has_candle = (last_closed >= 0) & ~np.isnat(entry_times)
+        rsi[has_candle] = rsi_series[last_closed[has_candle]]
+    return rsi
+
+
+# ----------------------------
+# Outcomes
+# ----------------------------
+def simulate_trades(
+    action: np.ndarray,
+    entry: np.ndarray,
+    stop_loss: np.ndarray,
+    take_profit: np.ndarray,
+    start_idx: np.ndarray,
+    closes: np.ndarray,
+    hold_candles: int,
+    fee_pct: float = 0.0,
+    end_idx: Optional[np.ndarray] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Resolve every trade against the close path closes[start_idx : start_idx + hold_candles].
+
+    `end_idx` (exclusive, per trade) bounds the path when `closes` concatenates
+    several coins; by default the path may run to the end of `closes`.
+
+    Returns arrays: exit_price, exit_reason (0 none / 1 stop / 2 target / 3 time),
+    bars_held and pnl_pct (NaN for HOLD or trades without any future candle).
+    """
+    n = len(action)
+    hold_candles = max(1, int(hold_candles))
+    closes = np.asarray(closes, dtype="float64")
+
+    offsets = np.arange(hold_candles)
+    idx = np.asarray(start_idx, dtype=np.int64)[:, None] + offsets[None, :]
+    limit = len(closes) if end_idx is None else np.minimum(np.asarray(end_idx, dtype=np.int64), len(closes))[:, None]
+    in_range = idx < limit
+    path = np.where(in_range, closes[np.minimum(idx, max(len(closes) - 1, 0))] if len(closes) else np.nan, np.nan)
+
+    side = action.astype("float64")[:, None]
+    with np.errstate(invalid="ignore"):
+        # For SHORT flip the comparisons by multiplying through by the side.
+        stop_hit = in_range & (side * path <= side * stop_loss[:, None])
+        tp_hit = in_range & (side * path >= side * take_profit[:, None])
+
+    never = hold_candles
+    first_stop = np.where(stop_hit.any(axis=1), stop_hit.argmax(axis=1), never)
+    first_tp = np.where(tp_hit.any(axis=1), tp_hit.argmax(axis=1), never)
+    n_valid = in_range.sum(axis=1)
+    last_valid = np.maximum(n_valid - 1, 0)
+
+    traded = (action != HOLD) & (n_valid > 0)
+    by_stop = traded & (first_stop < never) & (first_stop <= first_tp)
+    by_tp = traded & (first_tp < never) & ~by_stop
+    by_time = traded & ~by_stop & ~by_tp
+
+    time_exit = path[np.arange(n), last_valid] if n else np.empty(0)
+    exit_price = np.select([by_stop, by_tp, by_time], [stop_loss, take_profit, time_exit], np.nan)
+    exit_reason = np.select([by_stop, by_tp, by_time], [1, 2, 3], 0).astype(np.int8)
+    bars_held = np.select([by_stop, by_tp, by_time], [first_stop + 1, first_tp + 1, n_valid], 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pnl_pct = np.where(
+            traded,
+            action * (exit_price - entry) / entry - 2 * float(fee_pct),
+            np.nan,
+        )
+
+    return {
+        "exit_price": exit_price,
+        "exit_reason": exit_reason,
+        "bars_held": bars_held,
+        "pnl_pct": pnl_pct,
+    }
+
+
+# ----------------------------
+# Driver
+# ----------------------------
+def backtest_coin(
+    coin: str,
+    history: PredictionHistory,
+    klines: pd.DataFrame,
+    strategy: ForecastStrategy,
+    rsi_threshold: Optional[float] = None,
+    rsi_min_gain: float = 0.0,
+    hold_candles: Optional[int] = None,
+) -> pd.DataFrame:
+    """Per-run trades for one coin. `klines` follows the get_stored_klines contract."""
+    n = len(history.entry_price)
+    times = pd.to_datetime(klines["open_time"]).to_numpy(dtype="datetime64[ns]")
+    closes = klines["close"].to_numpy(dtype="float64")
+
+    signals = forecast_signals(strategy, history.entry_price, history.forecast, history.forecast_len)
+    action = signals.action
+
+    # Index of the last candle at or before entry (for RSI) and the first after it (trade path).
+    entry_times = history.entry_time.astype("datetime64[ns]")
+    last_closed = np.searchsorted(times, entry_times, side="right") - 1
+    start_idx = last_closed + 1
+
+    rsi = np.full(n, np.nan)
+    if rsi_threshold is not None:
+        rsi = rsi_at_entry(closes, last_closed, entry_times)
+        target = history.forecast[:, -1] if history.forecast.shape[1] else np.full(n, np.nan)
+        confirmed = rsi_confirmations(history.entry_price, target, rsi, rsi_threshold, rsi_min_gain)
+        action = np.where(confirmed == action, action, HOLD).astype(np.int8)
+
+    outcome = simulate_trades(
+        action,
+        history.entry_price,
+        signals.stop_loss,
+        signals.take_profit,
+        start_idx,
+        closes,
+        hold_candles if hold_candles is not None else strategy.label_width,
+        fee_pct=strategy.fee_pct,
+    )
+
+    return pd.DataFrame(
+        {
+            "coin": coin,
+            "prediction_id": history.prediction_ids,
+            "created_at": history.created_at,
+            "entry_time": history.entry_time,
+            "action": action,
+            "entry": history.entry_price,
+            "stop_loss": np.where(action != HOLD, signals.stop_loss, np.nan),
+            "take_profit": np.where(action != HOLD, signals.take_profit, np.nan),
+            "rsi": rsi,
+            **outcome,
+        }
+    )
+
+
+def summarize(trades: pd.DataFrame) -> pd.DataFrame:
+    """Per-coin report plus an aggregate "ALL" row."""
+    columns = [
+        "coin", "runs", "trades", "buys", "shorts", "wins", "win_rate",
+        "stop_hits", "tp_hits", "time_exits", "avg_pnl_pct", "total_pnl_pct",
+    ]
+
+    def _agg(df: pd.DataFrame) -> Dict[str, float]:
+        done = df["exit_reason"] > 0
+        pnl = df.loc[done, "pnl_pct"]
+        n_trades = int(done.sum())
+        wins = int((pnl > 0).sum())
+        return {
+            "runs": len(df),
+            "trades": n_trades,
+            "buys": int((df.loc[done, "action"] == BUY).sum()),
+            "shorts": int((df.loc[done, "action"] == SHORT).sum()),
+            "wins": wins,
+            "win_rate": wins / n_trades if n_trades else np.nan,
+            "stop_hits": int((df["exit_reason"] == 1).sum()),
+            "tp_hits": int((df["exit_reason"] == 2).sum()),
+            "time_exits": int((df["exit_reason"] == 3).sum()),
+            "avg_pnl_pct": float(pnl.mean()) if n_trades else np.nan,
+            "total_pnl_pct": float(pnl.sum()),
+        }
+
+    if trades.empty:
+        return pd.DataFrame(columns=columns)
+
+    rows: List[Dict[str, float]] = [{"coin": coin, **_agg(df)} for coin, df in trades.groupby("coin", sort=True)]
+    rows.append({"coin": "ALL", **_agg(trades)})
+    return pd.DataFrame(rows, columns=columns)
+
+
+def load_coin(
+    coin: str,
+    interval: str,
+    model_name: str,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    rsi_warmup_days: int = 30,
+) -> Optional[Tuple[PredictionHistory, pd.DataFrame]]:
+    """
+    Stored predictions of one coin and the klines replaying them needs (RSI
+    warm-up before the first entry, room for any hold after the last); None
+    when there is nothing to replay.
+    """
+    history = fetch_prediction_history(coin, interval, model_name, start=start, end=end)
+    if len(history.entry_price) == 0:
+        logger.info("No stored predictions | coin=%s interval=%s model=%s", coin, interval, model_name)
+        return None
+
+    valid_times = history.entry_time[~np.isnat(history.entry_time)]
+    if len(valid_times) == 0:
+        return None
+    k_start = pd.Timestamp(valid_times.min()) - pd.Timedelta(days=rsi_warmup_days)
+    # Enough room after the last entry for any horizon we could hold.
+    k_end = pd.Timestamp(valid_times.max()) + pd.Timedelta(days=max(7, rsi_warmup_days))
+    klines = get_stored_klines(coin, start=str(k_start), end=str(k_end), interval=interval)
+    return history, klines
+
+
+def run_backtest(
+    symbols: List[str],
+    interval: str,
+    model_name: str,
+    strategy: ForecastStrategy,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    rsi_threshold: Optional[float] = None,
+    rsi_min_gain: float = 0.0,
+    hold_candles: Optional[int] = None,
+    rsi_warmup_days: int = 30,
+) -> BacktestResult:
+    """Load every stored prediction + the klines they need, then backtest each coin."""
+    frames = []
+    for coin in symbols:
+        loaded = load_coin(coin, interval, model_name, start=start, end=end, rsi_warmup_days=rsi_warmup_days)
+        if loaded is None:
+            continue
+        history, klines = loaded
+
+        trades = backtest_coin(
+            coin,
+            history,
+            klines,
+            strategy,
+            rsi_threshold=rsi_threshold,
+            rsi_min_gain=rsi_min_gain,
+            hold_candles=hold_candles,
+        )
+        logger.info(
+            "Backtested | coin=%s runs=%s klines=%s trades=%s",
+            coin, len(trades), len(klines), int((trades["exit_reason"] > 0).sum()),
+        )
+        frames.append(trades)
+
+    trades = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return BacktestResult(trades, summarize(trades))
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Parallel parameter sweep over ForecastStrategy (+ RSI confirmation) knobs.
+
+Price and prediction arrays for all symbols are loaded once, copied into
+multiprocessing shared memory, and attached (zero-copy) by every worker in a
+process pool, so memory does not grow with the worker count. Each worker
+evaluates a chunk of parameter combinations with the vectorized backtest
+engine and the results are ranked.
+
+    python -m app.backtest.sweep --symbols BTCUSDT,ETHUSDT --since-days 365 \\
+        --param extra_gain=0.00001,0.0005,0.001 --param vote_window=3,5,7 \\
+        --param rsi_threshold=none,50,55,60 --workers 8
+
+--random N samples N combinations from the same value lists instead of the full grid.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import logging
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.backtest.engine import HOLD, forecast_signals, load_coin, rsi_at_entry, rsi_confirmations, simulate_trades
+from app.strategies.forecast import ForecastStrategy
+from app.utils.symbols import load_symbols
+
+
+logger = logging.getLogger("strategies.backtest.sweep")
+
+FORECAST_PARAMS = (
+    "fee_pct", "extra_gain", "extra_loss", "label_width",
+    "min_abs_gain_pct", "vote_window", "vote_strict", "enforce_path_stop",
+)
+PARAM_TYPES = {
+    "fee_pct": float,
+    "extra_gain": float,
+    "extra_loss": float,
+    "label_width": int,
+    "min_abs_gain_pct": float,
+    "vote_window": int,
+    "vote_strict": bool,
+    "enforce_path_stop": bool,
+    "rsi_threshold": float,
+    "hold_candles": int,
+}
+# None means "off" (no RSI confirmation / hold for label_width candles).
+NULLABLE_PARAMS = ("rsi_threshold", "hold_candles")
+DEFAULTS: Dict[str, Any] = {
+    "fee_pct": 0.0,
+    "extra_gain": 0.00001,
+    "extra_loss": 0.000015,
+    "label_width": 12,
+    "min_abs_gain_pct": 0.0020,
+    "vote_window": 5,
+    "vote_strict": True,
+    "enforce_path_stop": True,
+    "rsi_threshold": 55.0,
+    "hold_candles": None,
+}
+
+
+class SweepData(NamedTuple):
+    """All runs of all symbols, concatenated; klines concatenated per symbol."""
+    entry: np.ndarray         # (runs,)
+    forecast: np.ndarray      # (runs, horizon) right-aligned
+    start_idx: np.ndarray     # (runs,) first candle after entry, index into closes
+    end_idx: np.ndarray       # (runs,) end of the run's symbol block in closes (exclusive)
+    rsi: np.ndarray           # (runs,) RSI(14) at entry
+    coin_idx: np.ndarray      # (runs,) index into the symbol list
+    closes: np.ndarray        # (candles,)
+    forecast_len: Optional[np.ndarray] = None  # (runs,) forecast points per run (None: infer from NaN padding)
+
+
+# ----------------------------
+# Loading
+# ----------------------------
+def load_sweep_data(
+    symbols: Sequence[str],
+    interval: str,
+    model_name: str,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    rsi_warmup_days: int = 30,
+) -> SweepData:
+    entries, forecasts, lengths, starts, ends, rsis, coins, closes_parts = [], [], [], [], [], [], [], []
+    offset = 0
+    for ci, coin in enumerate(symbols):
+        loaded = load_coin(coin, interval, model_name, start=start, end=end, rsi_warmup_days=rsi_warmup_days)
+        if loaded is None:
+            continue
+        history, klines = loaded
+        times = pd.to_datetime(klines["open_time"]).to_numpy(dtype="datetime64[ns]")
+        closes = klines["close"].to_numpy(dtype="float64")
+
+        last_closed = np.searchsorted(times, history.entry_time, side="right") - 1
+        rsi = rsi_at_entry(closes, last_closed, history.entry_time)
+
+        entries.append(history.entry_price)
+        forecasts.append(history.forecast)
+        lengths.append(history.forecast_len)
+        starts.append(last_closed + 1 + offset)
+        ends.append(np.full(len(history.entry_price), offset + len(closes), dtype=np.int64))
+        rsis.append(rsi)
+        coins.append(np.full(len(history.entry_price), ci, dtype=np.int32))
+        closes_parts.append(closes)
+        offset += len(closes)
+        logger.info("Loaded | coin=%s runs=%s klines=%s", coin, len(history.entry_price), len(closes))
+
+    horizon = max((f.shape[1] for f in forecasts), default=0)
+    padded = [
+        np.hstack([np.full((f.shape[0], horizon - f.shape[1]), np.nan), f]) if f.shape[1] < horizon else f
+        for f in forecasts
+    ]
+
+    def _cat(parts: List[np.ndarray], dtype: str) -> np.ndarray:
+        return np.concatenate(parts).astype(dtype) if parts else np.empty(0, dtype=dtype)
+
+    return SweepData(
+        entry=_cat(entries, "float64"),
+        forecast=np.vstack(padded) if padded else np.empty((0, 0)),
+        start_idx=_cat(starts, "int64"),
+        end_idx=_cat(ends, "int64"),
+        rsi=_cat(rsis, "float64"),
+        coin_idx=_cat(coins, "int32"),
+        closes=_cat(closes_parts, "float64"),
+        forecast_len=None if any(n is None for n in lengths) else _cat(lengths, "int64"),
+    )
+
+
+# ----------------------------
+# Shared memory
+# ----------------------------
+ArraySpec = Tuple[str, Tuple[int, ...], str]  # (shm name, shape, dtype)
+
+
+def share_arrays(data: SweepData) -> Tuple[Dict[str, ArraySpec], List[shared_memory.SharedMemory]]:
+    specs: Dict[str, ArraySpec] = {}
+    blocks: List[shared_memory.SharedMemory] = []
+    for field, arr in data._asdict().items():
+        if arr is None:
+            continue
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+        np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+        specs[field] = (shm.name, arr.shape, arr.dtype.str)
+        blocks.append(shm)
+    return specs, blocks
+
+
+_worker_data: Optional[SweepData] = None
+_worker_blocks: List[shared_memory.SharedMemory] = []
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # The parent owns (and unlinks) the blocks; workers must not track them.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13: pool workers share the parent's resource tracker
+        return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(specs: Dict[str, ArraySpec]) -> None:
+    global _worker_data
+    arrays = {}
+    for field, (name, shape, dtype) in specs.items():
+        shm = _attach(name)
+        _worker_blocks.append(shm)
+        arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        arr.flags.writeable = False
+        arrays[field] = arr
+    _worker_data = SweepData(**arrays)
+
+
+def _run_chunk(combos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [evaluate_params(_worker_data, params) for params in combos]
+
+
+# ----------------------------
+# Evaluation
+# ----------------------------
+def evaluate_params(data: SweepData, params: Dict[str, Any]) -> Dict[str, Any]:
+    strategy = ForecastStrategy(**{k: params[k] for k in FORECAST_PARAMS if k in params})
+    signals = forecast_signals(strategy, data.entry, data.forecast, data.forecast_len)
+    action = signals.action
+
+    rsi_threshold = params.get("rsi_threshold")
+    if rsi_threshold is not None:
+        target = data.forecast[:, -1] if data.forecast.shape[1] else np.full(len(data.entry), np.nan)
+        confirmed = rsi_confirmations(data.entry, target, data.rsi, rsi_threshold, 2 * strategy.fee_pct)
+        action = np.where(confirmed == action, action, HOLD).astype(np.int8)
+
+    hold = params.get("hold_candles") or strategy.label_width
+    out = simulate_trades(
+        action,
+        data.entry,
+        signals.stop_loss,
+        signals.take_profit,
+        data.start_idx,
+        data.closes,
+        hold,
+        fee_pct=strategy.fee_pct,
+        end_idx=data.end_idx,
+    )
+
+    done = out["exit_reason"] > 0
+    pnl = out["pnl_pct"][done]
+    n_trades = int(done.sum())
+    std = float(pnl.std()) if n_trades > 1 else 0.0
+    return {
+        **params,
+        "trades": n_trades,
+        "wins": int((pnl > 0).sum()),
+        "win_rate": float((pnl > 0).mean()) if n_trades else np.nan,
+        "stop_hits": int((out["exit_reason"] == 1).sum()),
+        "tp_hits": int((out["exit_reason"] == 2).sum()),
+        "avg_pnl_pct": float(pnl.mean()) if n_trades else np.nan,
+        "total_pnl_pct": float(pnl.sum()),
+        "sharpe": float(pnl.mean() / std * np.sqrt(n_trades)) if std > 1e-12 else np.nan,
+    }
+
+
+def run_sweep(
+    data: SweepData,
+    combos: List[Dict[str, Any]],
+    workers: Optional[int] = None,
+    chunk_size: int = 16,
+) -> pd.DataFrame:
+    workers = workers or os.cpu_count() or 1
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+    if workers <= 1 or len(chunks) <= 1:
+        results = [evaluate_params(data, params) for params in combos]
+        return pd.DataFrame(results)
+
+    specs, blocks = share_arrays(data)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(specs,)) as pool:
+            results = [row for chunk in pool.map(_run_chunk, chunks) for row in chunk]
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    return pd.DataFrame(results)
+
+
+def rank_results(results: pd.DataFrame, by: str = "total_pnl_pct", min_trades: int = 1) -> pd.DataFrame:
+    ranked = results[results["trades"] >= min_trades]
+    return ranked.sort_values(by, ascending=False, na_position="last").reset_index(drop=True)
+
+
+# ----------------------------
+# Parameter space
+# ----------------------------
+def _parse_value(name: str, raw: str) -> Any:
+    raw = raw.strip()
+    if raw.lower() in ("none", "null", "off"):
+        if name not in NULLABLE_PARAMS:
+            raise ValueError(f"--param {name} does not accept {raw!r}; only {', '.join(NULLABLE_PARAMS)} can be off")
+        return None
+    kind = PARAM_TYPES[name]
+    if kind is bool:
+        return raw.lower() in ("1", "true", "yes", "y", "on")
+    return kind(raw)
+
+
+def parse_param_space(specs: Sequence[str]) -> Dict[str, List[Any]]:
+    """['extra_gain=0.001,0.002', 'vote_strict=true,false'] -> {name: [distinct values]}."""
+    space: Dict[str, List[Any]] = {}
+    for spec in specs:
+        name, sep, values = spec.partition("=")
+        name = name.strip()
+        if not sep or name not in PARAM_TYPES:
+            raise ValueError(f"Bad --param {spec!r}; known: {', '.join(sorted(PARAM_TYPES))}")
+        parsed = [_parse_value(name, v) for v in values.split(",") if v.strip()]
+        space[name] = list(dict.fromkeys(parsed))  # "0.001,0.001" would double the grid
+    return space
+
+
+def grid_combos(space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    names = list(space)
+    return [{**DEFAULTS, **dict(zip(names, values))} for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_combos(space: Dict[str, List[Any]], n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    seen, out = set(), []
+    total = int(np.prod([len(set(v)) for v in space.values()])) if space else 1
+    while len(out) < min(n, total):
+        combo = {**DEFAULTS, **{name: rng.choice(values) for name, values in space.items()}}
+        key = tuple(sorted((k, repr(v)) for k, v in combo.items()))
+        if key not in seen:
+            seen.add(key)
+            out.append(combo)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep over stored predictions.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--symbols", help="Comma separated symbols, e.g. BTCUSDT,ETHUSDT")
+    target.add_argument("--symbols-file", help="File with one symbol per line")
+    parser.add_argument("--interval", type=str, default="1h")
+    parser.add_argument("--model", type=str, default="GRU")
+    parser.add_argument("--since-days", type=int, default=365)
+    parser.add_argument("--param", action="append", default=[], help="name=v1,v2,... (repeatable)")
+    parser.add_argument("--random", type=int, default=None, help="Sample N combinations instead of the full grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Process count (default: all cores)")
+    parser.add_argument("--rank-by", type=str, default="total_pnl_pct")
+    parser.add_argument("--min-trades", type=int, default=10)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--out", type=str, default=None, help="Optional CSV path for all results")
+    parser.add_argument("--log-level", type=str, default="INFO")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    )
+
+    try:
+        space = parse_param_space(args.param)
+    except ValueError as e:
+        parser.error(str(e))
+    combos = random_combos(space, args.random, args.seed) if args.random else grid_combos(space)
+
+    end = datetime.utcnow()
+    start = end - timedelta(days=args.since_days)
+    symbols = load_symbols(args.symbols, args.symbols_file)
+    data = load_sweep_data(symbols, args.interval, args.model, start=pd.Timestamp(start), end=pd.Timestamp(end))
+    logger.info("Sweep | symbols=%s runs=%s candles=%s combos=%s workers=%s",
+                len(symbols), len(data.entry), len(data.closes), len(combos), args.workers or os.cpu_count())
+
+    results = run_sweep(data, combos, workers=args.workers)
+    ranked = rank_results(results, by=args.rank_by, min_trades=args.min_trades)
+
+    with pd.option_context("display.max_columns", None, "display.width", 250):
+        print(ranked.head(args.top).to_string(index=False))
+
+    if args.out:
+        results.to_csv(args.out, index=False)
+        logger.info("Wrote %s results to %s", len(results), args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Resident scheduler: keeps one warm process and evaluates every configured
+symbol at each candle close instead of cold-starting a pod per run.
+
+    python -m app.daemon --symbols-file symbols.txt --intervals 1h,4h --health-port 8080
+
+Connections (pool), kline cache, RSI state and the Telegram outbox live for the
+whole process. The loop sleeps until the next close of any configured interval
+(plus a small settle delay for upstream writers), runs the due intervals and
+goes back to sleep. GET /healthz reports per-interval status as JSON and
+GET /metrics the Prometheus metrics from app.utils.metrics.
+Upcoming strategy_signals partitions are created on start and then daily.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import signal
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.intervals import interval_seconds
+from app.utils.metrics import REGISTRY
+
+
+logger = logging.getLogger("strategies.daemon")
+
+# Binance weekly candles open Monday 00:00 UTC; the Unix epoch was a Thursday.
+_WEEK_OFFSET = 4 * 86400
+
+
+def next_close(interval: str, now: float) -> float:
+    """Epoch seconds of the first candle close strictly after `now` (UTC-aligned like Binance)."""
+    step = interval_seconds(interval)
+    offset = _WEEK_OFFSET if interval.strip().endswith("w") else 0
+    return (math.floor((now - offset) / step) + 1) * step + offset
+
+
+class CandleScheduler:
+    """Tracks the next candle close per interval."""
+
+    def __init__(self, intervals: List[str], clock: Callable[[], float] = time.time):
+        if not intervals:
+            raise ValueError("at least one interval is required")
+        self.clock = clock
+        now = clock()
+        self.next_due: Dict[str, float] = {iv: next_close(iv, now) for iv in intervals}
+
+    def next_wake(self) -> float:
+        return min(self.next_due.values())
+
+    def pop_due(self, now: float) -> List[Tuple[str, float]]:
+        """(interval, close_ts) for every interval whose close has passed; schedules the next one."""
+        due: List[Tuple[str, float]] = []
+        for interval, close_ts in self.next_due.items():
+            if close_ts > now:
+                continue
+            upcoming = next_close(interval, now)
+            missed = int(round((upcoming - close_ts) / interval_seconds(interval))) - 1
+            if missed > 0:
+                logger.warning("Skipped %s %s close(s); running the latest only", missed, interval)
+                close_ts = upcoming - interval_seconds(interval)
+            due.append((interval, close_ts))
+            self.next_due[interval] = upcoming
+        return due
+
+
+# ----------------------------
+# Health
+# ----------------------------
+class HealthState:
+    """What /healthz reports. Unhealthy when an interval is overdue or its last tick failed completely."""
+
+    def __init__(self, scheduler: CandleScheduler, clock: Callable[[], float] = time.time):
+        self.scheduler = scheduler
+        self.clock = clock
+        self.started_at = clock()
+        self.intervals: Dict[str, Dict[str, Any]] = {iv: {"ticks": 0} for iv in scheduler.next_due}
+
+    def record(self, interval: str, close_ts: float, summary: Dict[str, Any]) -> None:
+        finished = self.clock()
+        self.intervals[interval].update(
+            ticks=self.intervals[interval]["ticks"] + 1,
+            last_close=close_ts,
+            last_finished=finished,
+            latency_seconds=round(finished - close_ts, 3),
+            succeeded=summary.get("succeeded", 0),
+            failed=summary.get("failed", 0),
+        )
+
+    def healthy(self) -> bool:
+        now = self.clock()
+        for interval, stats in self.intervals.items():
+            grace = max(60.0, interval_seconds(interval) * 0.5)
+            if now > self.scheduler.next_due[interval] + grace:
+                return False  # loop stalled past a close
+            if stats.get("failed") and not stats.get("succeeded"):
+                return False
+        return True
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "status": "ok" if self.healthy() else "unhealthy",
+            "uptime_seconds": round(self.clock() - self.started_at, 1),
+            "intervals": {
+                iv: {**stats, "next_close": self.scheduler.next_due[iv]}
+                for iv, stats in self.intervals.items()
+            },
+        }
+
+
+async def start_health_server(health: HealthState, host: str = "0.0.0.0", port: int = 8080) -> asyncio.AbstractServer:
+    """Tiny HTTP/1.0 responder for liveness/readiness probes (GET /healthz or /health)."""
+
+    async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await asyncio.wait_for(reader.readline(), timeout=5)).decode("latin-1")
+            parts = request_line.split()
+            path = parts[1] if len(parts) > 1 else "/"
+            route = path.split("?", 1)[0]
+            content_type = "application/json"
+            if route in ("/healthz", "/health"):
+                snapshot = health.snapshot()
+                status = "200 OK" if snapshot["status"] == "ok" else "503 Service Unavailable"
+                body = json.dumps(snapshot).encode()
+            elif route == "/metrics":
+                status, body = "200 OK", REGISTRY.render().encode()
+                content_type = "text/plain; version=0.0.4"
+            else:
+                status, body = "404 Not Found", b'{"error": "not found"}'
+            writer.write(
+                f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(_handle, host, port)
+    logger.info("Health endpoint listening | %s", ", ".join(str(s.getsockname()) for s in server.sockets))
+    return server
+
+
+# ----------------------------
+# Loop
+# ----------------------------
+async def run_daemon(
+    symbols: List[str],
+    intervals: List[str],
+    models: Optional[List[str]] = None,
+    since_days: int = 21,
+    concurrency: int = 8,
+    settle_seconds: float = 0.5,
+    signal_batch_size: int = 500,
+    health_host: str = "0.0.0.0",
+    health_port: Optional[int] = 8080,
+    stop: Optional[asyncio.Event] = None,
+) -> None:
+    # Deferred so the scheduler/health pieces stay importable without the DB/Telegram stack.
+    from app.db.connection import run_db
+    from app.db.strategy import SignalSink, ensure_signal_partitions
+    from app.main import run_batch
+    from app.notifications.outbox import TelegramOutbox
+    from app.notifications.telegram import bot, chat_id
+
+    stop = stop or asyncio.Event()
+    scheduler = CandleScheduler(intervals)
+    health = HealthState(scheduler)
+    server = await start_health_server(health, health_host, health_port) if health_port is not None else None
+
+    logger.info("Daemon started | symbols=%s intervals=%s models=%s settle=%.2fs",
+                len(symbols), intervals, models, settle_seconds)
+
+    async def _ensure_partitions() -> None:
+        try:
+            created = await run_db(ensure_signal_partitions)
+            if created:
+                logger.info("Created %s strategy_signals partition(s)", created)
+        except Exception:
+            # Schema not migrated yet (strategy_signals_partitioned.sql) or missing privileges.
+            logger.warning("Could not ensure strategy_signals partitions", exc_info=True)
+
+    async def _tick(interval: str, close_ts: float) -> None:
+        try:
+            summary = await run_batch(symbols, interval, since_days=since_days, concurrency=concurrency,
+                                      sink=sink, outbox=outbox, models=models)
+        except Exception:
+            logger.exception("Tick failed | interval=%s", interval)
+            summary = {"succeeded": 0, "failed": len(symbols)}
+        try:
+            await run_db(sink.flush)  # make this close's signals durable before sleeping again
+        except Exception:
+            logger.exception("Signal flush failed | interval=%s", interval)
+        health.record(interval, close_ts, summary)
+        logger.info("Tick done | interval=%s close=%s latency=%.3fs",
+                    interval, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(close_ts)),
+                    health.intervals[interval]["latency_seconds"])
+
+    try:
+        with SignalSink(batch_size=signal_batch_size) as sink:
+            async with TelegramOutbox.from_env(bot, chat_id) as outbox:
+                partitions_checked = 0.0
+                while not stop.is_set():
+                    if time.time() - partitions_checked > 86400:
+                        partitions_checked = time.time()
+                        await _ensure_partitions()
+                    # Re-check at least once a minute so wall-clock adjustments are picked up.
+                    delay = scheduler.next_wake() + settle_seconds - time.time()
+                    if delay > 0:
+                        try:
+                            await asyncio.wait_for(stop.wait(), timeout=min(delay, 60.0))
+                        except asyncio.TimeoutError:
+                            pass
+                        continue
+
+                    due = scheduler.pop_due(time.time() - settle_seconds)
+                    await asyncio.gather(*(_tick(iv, close_ts) for iv, close_ts in due))
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+        logger.info("Daemon stopped")
+
+
+def main() -> None:
+    from app.db.connection import close_pool
+    from app.main import setup_logging
+    from app.utils.symbols import load_symbols
+
+    parser = argparse.ArgumentParser(description="Run strategies at every candle close.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--symbols", help="Comma separated symbols, e.g. BTCUSDT,ETHUSDT")
+    target.add_argument("--symbols-file", help="File with one symbol per line")
+    parser.add_argument("--intervals", type=str, default="1h", help="Comma separated intervals (default: 1h)")
+    parser.add_argument("--models", type=str, default=None,
+                        help="Comma separated prediction models evaluated at every close (default: GRU)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max symbols in flight per interval (default: 8)")
+    parser.add_argument("--since-days", type=int, default=21, help="History window in days (default: 21)")
+    parser.add_argument("--signal-batch-size", type=int, default=500)
+    parser.add_argument("--settle-seconds", type=float, default=float(os.getenv("DAEMON_SETTLE_SECONDS", "0.5")),
+                        help="Delay after each candle close before evaluating (default: 0.5)")
+    parser.add_argument("--health-host", type=str, default="0.0.0.0")
+    parser.add_argument("--health-port", type=int, default=int(os.getenv("HEALTH_PORT", "8080")),
+                        help="Port for GET /healthz; 0 picks a free port, -1 disables (default: 8080)")
+    parser.add_argument("--log-level", type=str, default="INFO", help="DEBUG, INFO, WARNING, ERROR")
+    parser.add_argument("--log-file", type=str, default=None, help="Optional log file path (rotating)")
+    args = parser.parse_args()
+
+    setup_logging(args.log_level, args.log_file)
+
+    symbols = load_symbols(args.symbols, args.symbols_file)
+    if not symbols:
+        parser.error("no symbols given")
+    intervals = [iv.strip() for iv in args.intervals.split(",") if iv.strip()]
+    for iv in intervals:
+        try:
+            interval_seconds(iv)
+        except ValueError as e:
+            parser.error(str(e))
+
+    async def _run() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        await run_daemon(
+            symbols,
+            intervals,
+            models=[m.strip() for m in args.models.split(",") if m.strip()] if args.models else None,
+            since_days=args.since_days,
+            concurrency=args.concurrency,
+            settle_seconds=args.settle_seconds,
+            signal_batch_size=args.signal_batch_size,
+            health_host=args.health_host,
+            health_port=None if args.health_port < 0 else args.health_port,
+            stop=stop,
+        )
+
+    try:
+        asyncio.run(_run())
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# app/db/accuracy.py
+"""
+Reads and writes for the forecast accuracy rollups
+(app/postgress_tables/forecast_accuracy.sql, computed by app.analytics).
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from app.db.connection import get_connection
+from app.db.models import as_datetime64
+
+
+logger = logging.getLogger("strategies.db.accuracy")
+
+# Prediction runs not counted yet, after the (created_at, prediction_id)
+# keyset cursor, whose whole forecast horizon already has a stored kline;
+# each with its entry price and forecast points as arrays.
+_PENDING_RUNS = """
+    WITH pending AS (
+        SELECT r.prediction_id, r.coin, r."interval", r.model_name, r.created_at
+        FROM prediction_runs r
+        WHERE (r.created_at, r.prediction_id) > (%(after_ts)s, %(after_id)s::uuid)
+          AND NOT EXISTS (SELECT 1 FROM forecast_accuracy_runs a WHERE a.prediction_id = r.prediction_id)
+          AND (SELECT max(p.point_time) FROM prediction_points p WHERE p.prediction_id = r.prediction_id)
+              <= (SELECT max(k.open_time) FROM binance_klines k
+                  WHERE k.symbol = r.coin AND k.timeframe = r."interval")
+        ORDER BY r.created_at, r.prediction_id
+        LIMIT %(limit)s
+    )
+    SELECT pe.prediction_id, pe.coin, pe."interval", pe.model_name, pe.created_at,
+           pts.entry, pts.times, pts.forecast
+    FROM pending pe
+    CROSS JOIN LATERAL (
+        SELECT
+            (array_agg(p.value::float8 ORDER BY p.point_time DESC) FILTER (WHERE p.is_historical))[1] AS entry,
+            array_agg(p.point_time ORDER BY p.point_time) FILTER (WHERE NOT p.is_historical) AS times,
+            array_agg(p.value::float8 ORDER BY p.point_time) FILTER (WHERE NOT p.is_historical) AS forecast
+        FROM prediction_points p
+        WHERE p.prediction_id = pe.prediction_id
+    ) pts
+    ORDER BY pe.created_at, pe.prediction_id
+"""
+
+_KLINE_RANGES = """
+    SELECT k.symbol, k.timeframe, k.open_time, k.close::float8
+    FROM unnest(%s::text[], %s::text[], %s::timestamp[], %s::timestamp[]) AS q(symbol, timeframe, lo, hi)
+    JOIN binance_klines k
+      ON k.symbol = q.symbol
+     AND k.timeframe = q.timeframe
+     AND k.open_time >= q.lo
+     AND k.open_time <= q.hi
+    ORDER BY k.symbol, k.timeframe, k.open_time
+"""
+
+_UPSERT_STEPS = """
+    INSERT INTO forecast_accuracy_steps
+        (coin, "interval", model_name, step, points, direction_hits,
+         abs_err_sum, abs_pct_err_sum, sq_err_sum, err_sum)
+    VALUES %s
+    ON CONFLICT (coin, "interval", model_name, step) DO UPDATE SET
+        points = forecast_accuracy_steps.points + EXCLUDED.points,
+        direction_hits = forecast_accuracy_steps.direction_hits + EXCLUDED.direction_hits,
+        abs_err_sum = forecast_accuracy_steps.abs_err_sum + EXCLUDED.abs_err_sum,
+        abs_pct_err_sum = forecast_accuracy_steps.abs_pct_err_sum + EXCLUDED.abs_pct_err_sum,
+        sq_err_sum = forecast_accuracy_steps.sq_err_sum + EXCLUDED.sq_err_sum,
+        err_sum = forecast_accuracy_steps.err_sum + EXCLUDED.err_sum,
+        updated_at = NOW()
+"""
+
+_UPSERT_CALIBRATION = """
+    INSERT INTO forecast_signal_calibration
+        (coin, "interval", model_name, signal, bucket, runs, hits, return_sum)
+    VALUES %s
+    ON CONFLICT (coin, "interval", model_name, signal, bucket) DO UPDATE SET
+        runs = forecast_signal_calibration.runs + EXCLUDED.runs,
+        hits = forecast_signal_calibration.hits + EXCLUDED.hits,
+        return_sum = forecast_signal_calibration.return_sum + EXCLUDED.return_sum,
+        updated_at = NOW()
+"""
+
+_FETCH_WATERMARK = """
+    SELECT after_created_at, after_prediction_id::text FROM forecast_accuracy_state
+"""
+
+# Moves the watermark from `after` to just before the oldest run that is still
+# not counted (deferred: horizon not closed yet), or to the newest run when
+# every run is counted. Runs without points can never be counted and would
+# pin it forever, so they are not waited for.
+_ADVANCE_WATERMARK = """
+    WITH oldest AS (
+        SELECT r.created_at, r.prediction_id
+        FROM prediction_runs r
+        WHERE (r.created_at, r.prediction_id) > (%(after_ts)s, %(after_id)s::uuid)
+          AND NOT EXISTS (SELECT 1 FROM forecast_accuracy_runs a WHERE a.prediction_id = r.prediction_id)
+          AND EXISTS (SELECT 1 FROM prediction_points p WHERE p.prediction_id = r.prediction_id)
+        ORDER BY r.created_at, r.prediction_id
+        LIMIT 1
+    ), mark AS (
+        SELECT r.created_at, r.prediction_id
+        FROM prediction_runs r
+        WHERE (r.created_at, r.prediction_id) > (%(after_ts)s, %(after_id)s::uuid)
+          AND NOT EXISTS (
+              SELECT 1 FROM oldest o WHERE (r.created_at, r.prediction_id) >= (o.created_at, o.prediction_id)
+          )
+        ORDER BY r.created_at DESC, r.prediction_id DESC
+        LIMIT 1
+    )
+    INSERT INTO forecast_accuracy_state (id, after_created_at, after_prediction_id)
+    SELECT TRUE, created_at, prediction_id FROM mark
+    ON CONFLICT (id) DO UPDATE SET
+        after_created_at = EXCLUDED.after_created_at,
+        after_prediction_id = EXCLUDED.after_prediction_id,
+        updated_at = NOW()
+    RETURNING after_created_at, after_prediction_id::text
+"""
+
+# Serializes concurrent rollup writers so no run is counted twice.
+_LOCK_KEY = "forecast_accuracy"
+
+
+def fetch_pending_accuracy_runs(cursor, after: Tuple[Any, str], limit: int) -> List[tuple]:
+    """
+    Up to `limit` uncounted, fully realized runs after the `after`
+    (created_at, prediction_id) cursor, oldest first, as
+    (prediction_id, coin, interval, model_name, created_at, entry, times[], forecast[]).
+    """
+    after_ts, after_id = after
+    cursor.execute(_PENDING_RUNS, {"after_ts": after_ts, "after_id": after_id, "limit": int(limit)})
+    return cursor.fetchall()
+
+
+def fetch_kline_ranges(
+    cursor,
+    ranges: Dict[Tuple[str, str], Tuple[Any, Any]],
+) -> Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray]]:
+    """(open_time datetime64[ns], close float64) per (symbol, interval) over its [lo, hi] range, in one query."""
+    keys = list(ranges)
+    out = {k: (np.empty(0, dtype="datetime64[ns]"), np.empty(0, dtype="float64")) for k in keys}
+    if not keys:
+        return out
+    cursor.execute(
+        _KLINE_RANGES,
+        ([k[0] for k in keys], [k[1] for k in keys], [ranges[k][0] for k in keys], [ranges[k][1] for k in keys]),
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return out
+    symbols, timeframes, times, closes = zip(*rows)
+    times = as_datetime64(times)
+    closes = np.asarray(closes, dtype="float64")
+    # Rows are ordered by key, so each key is one contiguous slice.
+    bounds = [0] + [i for i in range(1, len(rows)) if (symbols[i], timeframes[i]) != (symbols[i - 1], timeframes[i - 1])]
+    for lo, hi in zip(bounds, bounds[1:] + [len(rows)]):
+        out[(symbols[lo], timeframes[lo])] = (times[lo:hi], closes[lo:hi])
+    return out
+
+
+def fetch_accuracy_watermark(cursor) -> Optional[Tuple[Any, str]]:
+    """Stored (created_at, prediction_id) to resume scanning after, or None before the first update."""
+    cursor.execute(_FETCH_WATERMARK)
+    row = cursor.fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def advance_accuracy_watermark(cursor, after: Tuple[Any, str]) -> Optional[Tuple[Any, str]]:
+    """
+    Store the position just before the oldest run after `after` that is not
+    counted yet; returns it, or None when no run lies past `after` (nothing stored).
+    """
+    after_ts, after_id = after
+    cursor.execute(_ADVANCE_WATERMARK, {"after_ts": after_ts, "after_id": after_id})
+    row = cursor.fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def lock_accuracy_rollups(cursor) -> None:
+    """Held until the end of the current transaction."""
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (_LOCK_KEY,))
+
+
+def write_accuracy_rollups(
+    cursor,
+    runs: Sequence[tuple],
+    steps: Sequence[tuple],
+    calibration: Sequence[tuple],
+) -> None:
+    """Add one batch's sums to the rollups and mark its runs as counted (same transaction)."""
+    if steps:
+        execute_values(cursor, _UPSERT_STEPS, steps, page_size=1000)
+    if calibration:
+        execute_values(cursor, _UPSERT_CALIBRATION, calibration, page_size=1000)
+    if runs:
+        execute_values(
+            cursor,
+            """
+            INSERT INTO forecast_accuracy_runs (prediction_id, coin, "interval", model_name, created_at, points)
+            VALUES %s
+            ON CONFLICT (prediction_id) DO NOTHING
+            """,
+            runs,
+            page_size=1000,
+        )
+
+
+def reset_accuracy_rollups() -> None:
+    """Forget every counted run (e.g. after changing ForecastStrategy parameters)."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        lock_accuracy_rollups(cursor)
+        cursor.execute(
+            "TRUNCATE forecast_accuracy_steps, forecast_signal_calibration, forecast_accuracy_runs, "
+            "forecast_accuracy_state"
+        )
+        cursor.close()
+
+
+def fetch_accuracy_report(
+    coin: Optional[str] = None,
+    interval: Optional[str] = None,
+    model_name: Optional[str] = None,
+) -> Tuple[List[str], List[tuple], List[str], List[tuple]]:
+    """(step columns, step rows, calibration columns, calibration rows), optionally filtered."""
+    where = """
+        WHERE (%(coin)s::text IS NULL OR coin = %(coin)s)
+          AND (%(interval)s::text IS NULL OR "interval" = %(interval)s)
+          AND (%(model)s::text IS NULL OR model_name = %(model)s)
+    """
+    params = {"coin": coin, "interval": interval, "model": model_name}
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM forecast_accuracy {where} ORDER BY coin, \"interval\", model_name, step", params)
+        step_cols, step_rows = [d[0] for d in cursor.description], cursor.fetchall()
+        cursor.execute(
+            f"""
+            SELECT coin, "interval", model_name, signal, bucket, runs,
+                   hits::float8 / NULLIF(runs, 0) AS hit_rate,
+                   return_sum / NULLIF(runs, 0) AS mean_return
+            FROM forecast_signal_calibration {where}
+            ORDER BY coin, "interval", model_name, signal, bucket
+            """,
+            params,
+        )
+        cal_cols, cal_rows = [d[0] for d in cursor.description], cursor.fetchall()
+        cursor.close()
+    return step_cols, step_rows, cal_cols, cal_rows
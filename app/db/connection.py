@@ -0,0 +1,277 @@
+# app/db/connection.py
+"""
+Shared, pooled Postgres access for the app/db layer.
+
+One process-wide ThreadedConnectionPool replaces the per-call psycopg2.connect()
+each helper used to do. Hot queries are sent as server-side prepared statements
+(PREPARE once per pooled connection, then EXECUTE).
+
+Async code calls the same blocking helpers through `await run_db(fn, ...)`,
+which runs them on a small thread pool sized to the connection pool, so
+queries overlap without ever blocking the event loop.
+
+Configuration (env):
+    DBNAME, DBUSER, DBPASSWORD, DBHOST, DBPORT   connection settings
+    DB_POOL_MIN     (default 1)                  connections opened eagerly
+    DB_POOL_MAX     (default 4)                  hard cap per process; also the number of
+                                                 executor threads behind run_db()
+    DB_POOL_TIMEOUT (default 30)                 seconds to wait for a free connection
+    DB_CONNECT_TIMEOUT (default 10)              seconds
+    DB_PREPARE      (default 1)                  set to 0 behind transaction-mode
+                                                 poolers (pgbouncer) that can't keep
+                                                 session-level prepared statements
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, TypeVar
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+from app.utils.startup import load_env
+
+load_env()
+
+logger = logging.getLogger("strategies.db")
+
+
+# ----------------------------
+# Prepared statements
+# ----------------------------
+PREPARED_STATEMENTS: Dict[str, str] = {
+    "latest_prediction_run": """
+        SELECT prediction_id, metadata_json
+        FROM prediction_runs
+        WHERE coin = $1
+          AND model_name = $2
+          AND "interval" = $3
+        ORDER BY created_at DESC
+        LIMIT 1
+    """,
+    "prediction_points": """
+        SELECT point_time, value::float8, is_historical FROM prediction_points
+        WHERE prediction_id = $1 ORDER BY point_time ASC
+    """,
+    "latest_predictions_bulk": """
+        WITH keys AS (
+            SELECT * FROM unnest($1::text[], $2::text[], $3::text[]) AS k(coin, "interval", model_name)
+        ),
+        latest AS (
+            SELECT DISTINCT ON (r.coin, r."interval", r.model_name)
+                   r.coin, r."interval", r.model_name, r.prediction_id, r.metadata_json
+            FROM prediction_runs r
+            JOIN keys k
+              ON r.coin = k.coin
+             AND r."interval" = k."interval"
+             AND r.model_name = k.model_name
+            ORDER BY r.coin, r."interval", r.model_name, r.created_at DESC
+        )
+        SELECT l.coin, l."interval", l.model_name, l.prediction_id, l.metadata_json,
+               pts.times, pts.vals, pts.hist
+        FROM latest l
+        CROSS JOIN LATERAL (
+            SELECT array_agg(p.point_time ORDER BY p.point_time) AS times,
+                   array_agg(p.value::float8 ORDER BY p.point_time) AS vals,
+                   array_agg(p.is_historical ORDER BY p.point_time) AS hist
+            FROM prediction_points p
+            WHERE p.prediction_id = l.prediction_id
+        ) pts
+    """,
+    "insert_strategy_signal": """
+        INSERT INTO strategy_signals (id, coin, model_name, signal)
+        VALUES ($1, $2, $3, $4)
+    """,
+    "latest_kline_open_time": """
+        SELECT max(open_time) FROM binance_klines WHERE symbol = $1 AND timeframe = $2
+    """,
+    "run_memo": """
+        SELECT memo_key, decision FROM strategy_run_memo
+        WHERE coin = $1 AND "interval" = $2 AND model_name = $3
+    """,
+    "upsert_run_memo": """
+        INSERT INTO strategy_run_memo (coin, "interval", model_name, memo_key, decision)
+        VALUES ($1, $2, $3, $4, $5)
+        ON CONFLICT (coin, "interval", model_name)
+        DO UPDATE SET memo_key = EXCLUDED.memo_key, decision = EXCLUDED.decision, updated_at = NOW()
+    """,
+}
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which statements it has PREPAREd."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.prepared: set = set()
+        # Statements the server refused to PREPARE; sent unprepared from then on.
+        self.unpreparable: set = set()
+
+
+def _to_positional(sql: str, n_params: int) -> str:
+    # Turn $1..$n back into %s so the same text works unprepared.
+    for i in range(n_params, 0, -1):
+        sql = sql.replace(f"${i}", "%s")
+    return sql
+
+
+def prepare_enabled() -> bool:
+    return os.getenv("DB_PREPARE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def execute_prepared(cursor, name: str, params: Sequence[Any]) -> None:
+    """
+    Execute one of PREPARED_STATEMENTS on `cursor`.
+
+    The statement is PREPAREd lazily the first time a pooled connection sees it.
+    Falls back to a plain parameterised execute when DB_PREPARE=0, the
+    connection wasn't created by this pool, or the server rejects the PREPARE
+    (guarded by a savepoint so the surrounding transaction survives).
+    """
+    sql = PREPARED_STATEMENTS[name]
+    conn = cursor.connection
+    prepared = getattr(conn, "prepared", None)
+    unpreparable = getattr(conn, "unpreparable", set())
+
+    if prepared is None or name in unpreparable or not prepare_enabled():
+        cursor.execute(_to_positional(sql, len(params)), tuple(params))
+        return
+
+    if name not in prepared:
+        guarded = not getattr(conn, "autocommit", False)
+        if guarded:
+            cursor.execute("SAVEPOINT prepare_statement")
+        try:
+            cursor.execute(f"PREPARE {name} AS {sql}")
+        except psycopg2.Error as exc:
+            if guarded:
+                cursor.execute("ROLLBACK TO SAVEPOINT prepare_statement")
+            logger.warning("PREPARE %s failed, sending it unprepared | %s", name, exc)
+            unpreparable.add(name)
+            cursor.execute(_to_positional(sql, len(params)), tuple(params))
+            return
+        if guarded:
+            cursor.execute("RELEASE SAVEPOINT prepare_statement")
+        prepared.add(name)
+
+    placeholders = ", ".join(["%s"] * len(params))
+    cursor.execute(f"EXECUTE {name} ({placeholders})" if params else f"EXECUTE {name}", tuple(params))
+
+
+# ----------------------------
+# Pool
+# ----------------------------
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises when exhausted; borrowers wait on this instead.
+_pool_slots: Optional[threading.BoundedSemaphore] = None
+
+
+def connect_kwargs() -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {
+        "dbname": os.getenv("DBNAME", "crypto_predictions"),
+        "user": os.getenv("DBUSER"),
+        "password": os.getenv("DBPASSWORD"),
+        "host": os.getenv("DBHOST"),
+        "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "10")),
+    }
+    if os.getenv("DBPORT"):
+        kwargs["port"] = os.getenv("DBPORT")
+    return kwargs
+
+
+def pool_max() -> int:
+    return max(int(os.getenv("DB_POOL_MIN", "1")), int(os.getenv("DB_POOL_MAX", "4")))
+
+
+def get_pool() -> ThreadedConnectionPool:
+    global _pool, _pool_slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                minconn = int(os.getenv("DB_POOL_MIN", "1"))
+                maxconn = pool_max()
+                logger.debug("Opening DB pool | min=%s max=%s", minconn, maxconn)
+                _pool_slots = threading.BoundedSemaphore(maxconn)
+                _pool = ThreadedConnectionPool(
+                    minconn,
+                    maxconn,
+                    connection_factory=PooledConnection,
+                    **connect_kwargs(),
+                )
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _pool_slots = None
+
+
+@contextmanager
+def get_connection() -> Iterator[PooledConnection]:
+    """
+    Borrow a pooled connection for one unit of work.
+
+    Commits on success, rolls back on error, and always returns the connection
+    to the pool (broken connections are discarded instead of reused).
+    """
+    pool = get_pool()
+    slots = _pool_slots
+    if not slots.acquire(timeout=float(os.getenv("DB_POOL_TIMEOUT", "30"))):
+        raise PoolError("timed out waiting for a pooled connection")
+    try:
+        conn = pool.getconn()
+    except Exception:
+        slots.release()
+        raise
+    broken = False
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            broken = True
+        raise
+    finally:
+        if conn.closed:
+            broken = True
+        pool.putconn(conn, close=broken)
+        slots.release()
+
+
+# ----------------------------
+# Async adapter
+# ----------------------------
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=pool_max(), thread_name_prefix="db")
+    return _executor
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking DB helper on the DB thread pool and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(fn, *args, **kwargs))
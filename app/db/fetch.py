@@ -1,75 +1,348 @@
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, List, Dict, Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
 import psycopg2
-import os
-from typing import List, Dict
-import dotenv
-import pandas as pd
-dotenv.load_dotenv(".env")
+
+from app.db.connection import execute_prepared, get_connection
+from app.db.kline_cache import KlineCache
+from app.db.models import PredictionSeries, as_datetime64
+from app.db.kline_stream import read_klines
+from app.db.pgbinary import BinaryCopyError, binary_copy_enabled, copy_binary
+from app.utils.startup import lazy_import
+
+pd = lazy_import("pandas")
+
+
+logger = logging.getLogger("strategies.db")
+
+
+# Same NULL policy as PredictionSeries.from_columns on the text path: points
+# without a time or value are dropped, a NULL is_historical is a forecast point.
+_POINTS_BINARY_QUERY = """
+    SELECT point_time, value::float8, COALESCE(is_historical, false)
+    FROM prediction_points
+    WHERE prediction_id = %s AND point_time IS NOT NULL AND value IS NOT NULL
+    ORDER BY point_time ASC
+"""
+
+
+def _fetch_points(conn, cursor, prediction_id, metadata: Any = None) -> PredictionSeries:
+    """Points of one run as a PredictionSeries, via binary COPY when possible."""
+    if binary_copy_enabled():
+        try:
+            times, prices, hist = copy_binary(
+                cursor, _POINTS_BINARY_QUERY, (prediction_id,), ("timestamp", "float8", "bool")
+            )
+            return PredictionSeries(times, prices, hist, metadata, str(prediction_id))
+        except (BinaryCopyError, psycopg2.Error) as e:
+            logger.debug("Binary COPY of prediction_points failed (%s); using text path", e)
+            conn.rollback()
+
+    execute_prepared(cursor, "prediction_points", (prediction_id,))
+    return PredictionSeries.from_rows(cursor.fetchall(), metadata, str(prediction_id))
+
+
+def fetch_latest_prediction_series(coin: str, interval: str, model_name: str) -> Optional[PredictionSeries]:
+    """Latest prediction package as a PredictionSeries, or None when there is no run."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+
+        # Fetch the latest metadata entry
+        execute_prepared(cursor, "latest_prediction_run", (coin, model_name, interval))
+        row = cursor.fetchone()
+
+        if not row:
+            cursor.close()
+            return None
+
+        prediction_id, metadata_json = row
+        series = _fetch_points(conn, cursor, prediction_id, metadata_json)
+        cursor.close()
+
+    return series
+
+
 def fetch_latest_prediction_with_metadata(coin: str,  interval: str, model_name: str) :
-    conn = psycopg2.connect(
-        dbname=os.getenv("DBNAME"),
-        user=os.getenv("DBUSER"),
-        password=os.getenv("DBPASSWORD"),
-        host=os.getenv("DBHOST"),
-    )
-    cursor = conn.cursor()
+    """
+    Returns (historical, forecast, metadata). historical/forecast are PointsView
+    sequences of {"date", "price"} dicts backed by one PredictionSeries
+    (`historical.series`); ([], [], {}) when there is no run.
+    """
+    series = fetch_latest_prediction_series(coin, interval, model_name)
+    if series is None:
+        return [], [], {}
+    return series.as_legacy()
+
+
+PredictionKey = Tuple[str, str, str]  # (coin, interval, model_name)
+
+
+def fetch_latest_predictions_bulk(keys: Iterable[PredictionKey]) -> Dict[PredictionKey, tuple]:
+    """
+    Bulk variant of fetch_latest_prediction_with_metadata.
+
+    Resolves the latest prediction run for every (coin, interval, model_name) key
+    and all of its points in a single set-based query. Returns
+    {key: (historical, forecast, metadata)} with the same shapes as the scalar
+    function; keys without a run map to ([], [], {}).
+    """
+    keys = list(dict.fromkeys(keys))
+    out: Dict[PredictionKey, tuple] = {k: ([], [], {}) for k in keys}
+    if not keys:
+        return out
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_prepared(
+            cursor,
+            "latest_predictions_bulk",
+            ([k[0] for k in keys], [k[1] for k in keys], [k[2] for k in keys]),
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+
+    for coin, interval, model_name, prediction_id, metadata_json, times, vals, hist in rows:
+        series = PredictionSeries.from_columns(times or [], vals or [], hist or [], metadata_json, str(prediction_id))
+        out[(coin, interval, model_name)] = series.as_legacy()
 
-    # Fetch the latest metadata entry
-    cursor.execute("""
-    SELECT prediction_id, metadata_json
+    return out
+
+
+def fetch_prediction_run_keys_since(since) -> List[PredictionKey]:
+    """Distinct (coin, interval, model_name) with a prediction run created at or after `since`."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT DISTINCT coin, "interval", model_name
+            FROM prediction_runs
+            WHERE created_at >= %s
+            """,
+            (since,),
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+    return [tuple(r) for r in rows]
+
+
+class PredictionHistory(NamedTuple):
+    """
+    Every stored prediction package for one (coin, interval, model), as arrays.
+
+    forecast is right-aligned: row i holds run i's forecast points in its last
+    columns and is NaN-padded on the left when runs have different horizons.
+    """
+    prediction_ids: np.ndarray   # (runs,) object
+    created_at: np.ndarray       # (runs,) datetime64[ns]
+    entry_time: np.ndarray       # (runs,) datetime64[ns], time of the last historical point (NaT if none)
+    entry_price: np.ndarray      # (runs,) float64, price of the last historical point (NaN if none)
+    forecast: np.ndarray         # (runs, horizon) float64
+    forecast_len: Optional[np.ndarray] = None  # (runs,) int64, forecast points per run (the rest is padding)
+
+
+_HISTORY_RUNS_QUERY = """
+    SELECT prediction_id, created_at
     FROM prediction_runs
     WHERE coin = %s
       AND model_name = %s
       AND "interval" = %s
-    ORDER BY created_at DESC
-    LIMIT 1
-    """, (coin, model_name, interval))
-    row = cursor.fetchone()
+      AND created_at >= %s
+      AND created_at <= %s
+    ORDER BY created_at ASC, prediction_id
+"""
 
-    if not row:
-        return [], [], {}
+# Points of the runs above, tagged with each run's position in that list (so
+# every column is fixed-width for binary COPY). Same NULL policy as
+# _POINTS_BINARY_QUERY.
+_HISTORY_POINTS_QUERY = """
+    SELECT q.run_no - 1, p.point_time, p.value::float8, COALESCE(p.is_historical, false)
+    FROM unnest(%s::uuid[]) WITH ORDINALITY AS q(prediction_id, run_no)
+    JOIN prediction_points p ON p.prediction_id = q.prediction_id
+    WHERE p.point_time IS NOT NULL AND p.value IS NOT NULL
+    ORDER BY q.run_no, p.point_time ASC
+"""
+
+
+def fetch_prediction_history(
+    coin: str,
+    interval: str,
+    model_name: str,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+) -> PredictionHistory:
+    """Runs created in [start, end] (with at least one point), oldest first; points via binary COPY when possible."""
+    start_ts = pd.Timestamp(start) if start is not None else pd.Timestamp("1970-01-01")
+    end_ts = pd.Timestamp(end) if end is not None else pd.Timestamp("2262-01-01")
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            _HISTORY_RUNS_QUERY, (coin, model_name, interval, start_ts.to_pydatetime(), end_ts.to_pydatetime())
+        )
+        runs = cursor.fetchall()
+        points = None
+        run_ids = [str(r[0]) for r in runs]
+        if runs and binary_copy_enabled():
+            try:
+                points = copy_binary(
+                    cursor, _HISTORY_POINTS_QUERY, (run_ids,), ("int8", "timestamp", "float8", "bool")
+                )
+            except (BinaryCopyError, psycopg2.Error) as e:
+                logger.debug("Binary COPY of prediction history failed (%s); using text path", e)
+                conn.rollback()
+        if runs and points is None:
+            cursor.execute(_HISTORY_POINTS_QUERY, (run_ids,))
+            rows = cursor.fetchall()
+            points = (
+                np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+                as_datetime64([r[1] for r in rows]),
+                np.fromiter((r[2] for r in rows), dtype="float64", count=len(rows)),
+                np.fromiter((r[3] for r in rows), dtype=bool, count=len(rows)),
+            )
+            del rows
+        cursor.close()
+
+    if points is None:  # no runs
+        points = tuple(np.empty(0, dtype=t) for t in ("int64", "datetime64[ns]", "float64", "bool"))
+    return build_prediction_history([r[0] for r in runs], [r[1] for r in runs], *points)
+
+
+def build_prediction_history(
+    run_ids: List[Any],
+    created: List[Any],
+    run_idx: np.ndarray,
+    point_time: np.ndarray,
+    values: np.ndarray,
+    hist: np.ndarray,
+) -> PredictionHistory:
+    """
+    Arrays from the run list and its points as columns (run_idx indexes
+    run_ids; points ordered by run, then time). Runs without points are dropped.
+    """
+    used = np.unique(run_idx)
+    run_idx = np.searchsorted(used, run_idx)
+    n_runs = len(used)
+    created_at = as_datetime64(list(created))[used]
+    point_time = point_time.astype("datetime64[ns]", copy=False)
+    values = values.astype("float64", copy=False)
+    hist = hist.astype(bool, copy=False)
+
+    # Last historical point per run (rows are time-ordered within a run).
+    entry_price = np.full(n_runs, np.nan)
+    entry_time = np.full(n_runs, np.datetime64("NaT"), dtype="datetime64[ns]")
+    h_rows = np.flatnonzero(hist)
+    entry_price[run_idx[h_rows]] = values[h_rows]
+    entry_time[run_idx[h_rows]] = point_time[h_rows]
+
+    # Right-aligned forecast matrix.
+    f_rows = np.flatnonzero(~hist)
+    f_run = run_idx[f_rows]
+    counts = np.bincount(f_run, minlength=n_runs)
+    horizon = int(counts.max()) if len(counts) else 0
+    forecast = np.full((n_runs, horizon), np.nan)
+    if len(f_rows):
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        order = np.argsort(f_run, kind="stable")
+        rank = np.empty(len(f_rows), dtype=np.int64)
+        rank[order] = np.arange(len(f_rows)) - starts[f_run[order]]
+        forecast[f_run, horizon - counts[f_run] + rank] = values[f_rows]
+
+    return PredictionHistory(
+        np.asarray(run_ids, dtype=object)[used],
+        created_at,
+        entry_time,
+        entry_price,
+        forecast,
+        counts.astype(np.int64),
+    )
 
-    prediction_id, metadata_json = row
 
-    # Fetch with is_historical flag
-    cursor.execute("""
-        SELECT point_time, value, is_historical FROM prediction_points
-        WHERE prediction_id = %s ORDER BY point_time ASC
-    """, (prediction_id,))
-    rows = cursor.fetchall()
+def _query_klines(coin: str, interval: str, start_ts: pd.Timestamp, end_ts: pd.Timestamp) -> pd.DataFrame:
+    # Chunked binary read straight into typed arrays (see app.db.kline_stream).
+    cols = read_klines(coin, interval, start_ts, end_ts, columns=("close",))
+    return pd.DataFrame(cols, copy=False)
 
-    cursor.close()
-    conn.close()
 
-    # Separate based on is_historical flag
-    historical = [{"date": r[0], "price": float(r[1])} for r in rows if r[2]]
-    forecast   = [{"date": r[0], "price": float(r[1])} for r in rows if not r[2]]
+# Enabled by KLINE_CACHE_DIR; None means always read the full window from Postgres.
+kline_cache = KlineCache.from_env(_query_klines)
 
-    return historical, forecast, metadata_json
+
+def fetch_latest_kline_open_time(coin: str, interval: str):
+    """Newest stored open_time for (coin, interval), or None when there are no klines."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_prepared(cursor, "latest_kline_open_time", (coin, interval))
+        row = cursor.fetchone()
+        cursor.close()
+    return row[0] if row else None
 
 
 def get_stored_klines(coin: str, start: str, end: str, interval: str ) -> pd.DataFrame:
     start_ts = pd.to_datetime(start)
     end_ts = pd.to_datetime(end)
 
-    conn = psycopg2.connect(
-        dbname="crypto_predictions",
-        user=os.getenv("DBUSER"),
-        password=os.getenv("DBPASSWORD"),
-        host=os.getenv("DBHOST"),
-    )
-    query = """
-        SELECT open_time, close
-        FROM binance_klines
-        WHERE symbol = %s
-        AND timeframe = %s
-        AND open_time >= %s
-        AND open_time <= %s
-        ORDER BY open_time ASC
+    if kline_cache is not None:
+        return kline_cache.get(coin, interval, start_ts, end_ts)
+
+    return _query_klines(coin, interval, start_ts, end_ts)
+
+
+KlineKey = Tuple[str, str]  # (coin, interval)
+
+
+class SharedKlines:
+    """
+    Klines for one batch window, loaded at most once per (coin, interval) no
+    matter how many models are evaluated on them. `loads` counts the
+    get_stored_klines calls made (cache hits included).
     """
 
-    df = pd.read_sql_query(query, conn, params=(coin, interval, start_ts, end_ts))
-    df["open_time"] = pd.to_datetime(df["open_time"])
-    df["close"] = df["close"].astype(float)
+    def __init__(self, start: str, end: str):
+        self.start = start
+        self.end = end
+        # One future per key, created under the lock by whichever thread loads
+        # it first; other run_db threads asking for the same key wait on it.
+        self._loads: Dict[KlineKey, Future] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    def _claim(self, keys: Iterable[KlineKey]) -> Dict[KlineKey, Future]:
+        """Futures for the keys nobody has started loading; the caller must resolve them."""
+        claimed: Dict[KlineKey, Future] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                if key not in self._loads:
+                    claimed[key] = self._loads[key] = Future()
+            self.loads += len(claimed)
+        return claimed
+
+    def _fail(self, claimed: Dict[KlineKey, Future], exc: BaseException) -> None:
+        # Waiters see the error; the next get() for the key tries again.
+        with self._lock:
+            for key, future in claimed.items():
+                if self._loads.get(key) is future:
+                    del self._loads[key]
+        for future in claimed.values():
+            future.set_exception(exc)
 
-    conn.close()
-    return df
\ No newline at end of file
+    def get(self, coin: str, interval: str) -> pd.DataFrame:
+        key = (coin, interval)
+        with self._lock:
+            future = self._loads.get(key)
+        if future is None:
+            claimed = self._claim([key])
+            if not claimed:  # another thread got there between the two locks
+                return self.get(coin, interval)
+            try:
+                df = get_stored_klines(coin, start=self.start, end=self.end, interval=interval)
+            except BaseException as e:
+                self._fail(claimed, e)
+                raise
+            claimed[key].set_result(df)
+            return df
+        return future.result()
@@ -0,0 +1,246 @@
+# app/db/kline_cache.py
+"""
+Incremental on-disk kline cache.
+
+Each (symbol, timeframe) is kept as two NumPy arrays on disk
+(open_time as int64 ns since epoch, close as float64) that are memory-mapped on
+read. A lookup only asks the database for rows at or after the cached
+high-water mark (the last candle is re-read because it may still have been open),
+plus any backfill before the cached range.
+
+Eviction:
+- by age: rows older than `max_age_days` are dropped when a key is rewritten,
+  unless they fall inside the window being read
+- by size: when the cache directory exceeds `max_bytes`, least recently used
+  keys are removed (keys being read right now are skipped)
+
+Configuration (env):
+    KLINE_CACHE_DIR            enables the cache when set
+    KLINE_CACHE_MAX_AGE_DAYS   (default 90)
+    KLINE_CACHE_MAX_MB         (default 512)
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.utils.startup import lazy_import
+
+pd = lazy_import("pandas")
+
+
+logger = logging.getLogger("strategies.db.kline_cache")
+
+# loader(coin, interval, start_ts, end_ts) -> DataFrame[open_time, close]
+KlineLoader = Callable[[str, str, "pd.Timestamp", "pd.Timestamp"], "pd.DataFrame"]
+
+_SAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+def _to_ns(times: pd.Series) -> Tuple[np.ndarray, Optional[str]]:
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = pd.to_datetime(times)
+    tz = str(times.dt.tz) if getattr(times.dt, "tz", None) is not None else None
+    if tz is not None:
+        times = times.dt.tz_convert("UTC").dt.tz_localize(None)
+    return times.to_numpy(dtype="datetime64[ns]").view("int64"), tz
+
+
+def _ts_ns(ts: pd.Timestamp) -> int:
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return int(ts.as_unit("ns").value)
+
+
+class KlineCache:
+    def __init__(
+        self,
+        root: str,
+        loader: KlineLoader,
+        max_age_days: float = 90,
+        max_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.root = root
+        self.loader = loader
+        self.max_age_ns = int(float(max_age_days) * 86400 * 1e9)
+        self.max_bytes = int(max_bytes)
+        self._locks: Dict[str, threading.Lock] = {}  # key_dir -> lock
+        self._locks_guard = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, loader: KlineLoader) -> Optional["KlineCache"]:
+        root = os.getenv("KLINE_CACHE_DIR")
+        if not root:
+            return None
+        return cls(
+            root,
+            loader,
+            max_age_days=float(os.getenv("KLINE_CACHE_MAX_AGE_DAYS", "90")),
+            max_bytes=int(float(os.getenv("KLINE_CACHE_MAX_MB", "512")) * 1024 * 1024),
+        )
+
+    # ----------------------------
+    # Storage
+    # ----------------------------
+    def _key_dir(self, coin: str, interval: str) -> str:
+        return os.path.join(self.root, f"{_SAFE.sub('_', coin)}__{_SAFE.sub('_', interval)}")
+
+    def _lock(self, key_dir: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key_dir, threading.Lock())
+
+    def _read(self, key_dir: str) -> Tuple[np.ndarray, np.ndarray, Dict]:
+        empty = np.empty(0, dtype="int64"), np.empty(0, dtype="float64"), {}
+        try:
+            times = np.load(os.path.join(key_dir, "open_time.npy"), mmap_mode="r")
+            closes = np.load(os.path.join(key_dir, "close.npy"), mmap_mode="r")
+            with open(os.path.join(key_dir, "meta.json"), "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except (OSError, ValueError):
+            return empty
+        if len(times) != len(closes):
+            logger.warning("Corrupt kline cache entry %s; ignoring", key_dir)
+            return empty
+        os.utime(key_dir)  # LRU bookkeeping for size eviction
+        return times, closes, meta
+
+    def _write_meta(self, key_dir: str, rows: int, meta: Dict) -> None:
+        """Replace meta.json alone (coverage changed, arrays did not)."""
+        tmp = os.path.join(key_dir, f"meta.json.tmp-{os.getpid()}-{threading.get_ident()}")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({**meta, "rows": int(rows), "written_at": time.time()}, fh)
+        os.replace(tmp, os.path.join(key_dir, "meta.json"))
+
+    def _write(self, key_dir: str, times: np.ndarray, closes: np.ndarray, meta: Dict) -> None:
+        tmp = f"{key_dir}.tmp-{os.getpid()}-{threading.get_ident()}"
+        os.makedirs(tmp, exist_ok=True)
+        np.save(os.path.join(tmp, "open_time.npy"), np.ascontiguousarray(times, dtype="int64"))
+        np.save(os.path.join(tmp, "close.npy"), np.ascontiguousarray(closes, dtype="float64"))
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as fh:
+            json.dump({**meta, "rows": int(len(times)), "written_at": time.time()}, fh)
+
+        old = f"{key_dir}.old-{os.getpid()}-{threading.get_ident()}"
+        if os.path.isdir(key_dir):
+            os.replace(key_dir, old)
+        os.replace(tmp, key_dir)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def _enforce_size(self) -> None:
+        entries = []
+        total = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(path) or ".tmp-" in name or ".old-" in name:
+                continue
+            size = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+            entries.append((os.stat(path).st_mtime, size, path))
+            total += size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # Never delete files another thread is reading (memory-mapped) or rewriting.
+            lock = self._lock(path)
+            if not lock.acquire(blocking=False):
+                continue
+            try:
+                shutil.rmtree(path, ignore_errors=True)
+            finally:
+                lock.release()
+            total -= size
+            logger.debug("Evicted kline cache entry %s (%s bytes)", path, size)
+
+    # ----------------------------
+    # Lookup
+    # ----------------------------
+    def get(self, coin: str, interval: str, start_ts: pd.Timestamp, end_ts: pd.Timestamp) -> pd.DataFrame:
+        """
+        Same contract as get_stored_klines: DataFrame[open_time, close] for
+        start_ts <= open_time <= end_ts, ascending.
+        """
+        start_ns, end_ns = _ts_ns(start_ts), _ts_ns(end_ts)
+        key_dir = self._key_dir(coin, interval)
+
+        with self._lock(key_dir):
+            times, closes, meta = self._read(key_dir)
+            tz = meta.get("tz")
+            # Earliest open_time the cache is known to be complete from (the DB
+            # may simply have nothing older, so don't backfill that range again).
+            covered_from = int(meta.get("covered_from_ns", times[0] if len(times) else end_ns + 1))
+            parts_t = [np.asarray(times)]
+            parts_c = [np.asarray(closes)]
+            fetched = 0
+
+            if len(times) == 0:
+                ranges = [(start_ts, end_ts)]
+            else:
+                ranges = []
+                if start_ns < covered_from:
+                    ranges.append((start_ts, pd.Timestamp(int(times[0]), unit="ns")))
+                # Re-read from the last cached candle: it may have been still open.
+                if end_ns >= times[-1]:
+                    ranges.append((pd.Timestamp(int(times[-1]), unit="ns"), end_ts))
+
+            for lo, hi in ranges:
+                df = self.loader(coin, interval, lo, hi)
+                if df is None or df.empty:
+                    continue
+                t, df_tz = _to_ns(df["open_time"])
+                tz = tz or df_tz
+                parts_t.append(t)
+                parts_c.append(df["close"].to_numpy(dtype="float64"))
+                fetched += len(df)
+
+            stored_from = covered_from
+            if ranges:
+                covered_from = min(covered_from, start_ns)
+
+            if fetched:
+                all_t = np.concatenate(parts_t)
+                all_c = np.concatenate(parts_c)
+                # Keep the most recently fetched value for each open_time.
+                rev_t = all_t[::-1]
+                uniq, idx = np.unique(rev_t, return_index=True)
+                all_t, all_c = uniq, all_c[::-1][idx]
+
+                # Age eviction never drops the window being read, or the next
+                # read of the same window would fetch it all over again.
+                cutoff = min(int(time.time() * 1e9) - self.max_age_ns, start_ns)
+                keep = all_t >= cutoff
+                self._write(
+                    key_dir,
+                    all_t[keep],
+                    all_c[keep],
+                    {"tz": tz, "covered_from_ns": max(covered_from, cutoff)},
+                )
+                times, closes = all_t, all_c
+                logger.debug("Kline cache %s %s | fetched=%s cached=%s", coin, interval, fetched, int(keep.sum()))
+            else:
+                times, closes = np.asarray(times), np.asarray(closes)
+                if covered_from < stored_from and len(times):
+                    # The DB has nothing older: remember that, or every call backfills again.
+                    self._write_meta(key_dir, len(times), {**meta, "tz": tz, "covered_from_ns": covered_from})
+
+            lo = np.searchsorted(times, start_ns, side="left")
+            hi = np.searchsorted(times, end_ns, side="right")
+            out_t = np.array(times[lo:hi], dtype="int64")
+            out_c = np.array(closes[lo:hi], dtype="float64")
+
+        if fetched:
+            self._enforce_size()
+
+        open_time = pd.to_datetime(out_t, unit="ns")
+        if tz:
+            open_time = open_time.tz_localize("UTC").tz_convert(tz)
+        return pd.DataFrame({"open_time": open_time, "close": out_c})
@@ -0,0 +1,168 @@
+# app/db/kline_stream.py
+"""
+Chunked kline reads straight into typed NumPy arrays.
+
+binance_klines is read in keyset-paginated chunks of `chunk_rows` candles
+(ORDER BY open_time, resuming after the last open_time seen), so neither the
+server nor the client ever holds more than one chunk of a long lookback.
+Each chunk is a binary COPY decoded without per-value Python objects; when
+binary COPY is unavailable (DB_BINARY_COPY=0, old poolers) the same query runs
+through the text protocol, still one chunk at a time.
+
+- iter_kline_chunks(): generator of {"open_time": datetime64[ns], <col>: float64}
+  dicts for one-pass consumers; peak memory is O(chunk_rows).
+- read_klines(): the whole window in arrays preallocated from the interval
+  length, filled chunk by chunk (no intermediate row objects).
+
+Configuration (env):
+    KLINE_CHUNK_ROWS   (default 50000)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, Optional, Sequence
+
+import numpy as np
+import psycopg2
+
+from app.db.connection import get_connection
+from app.db.models import as_datetime64
+from app.db.pgbinary import BinaryCopyError, binary_copy_enabled, copy_binary
+from app.utils.intervals import interval_seconds
+
+
+logger = logging.getLogger("strategies.db.kline_stream")
+
+KLINE_COLUMNS = ("open", "high", "low", "close", "volume")
+
+KlineChunk = Dict[str, np.ndarray]
+
+
+def default_chunk_rows() -> int:
+    return max(1, int(os.getenv("KLINE_CHUNK_ROWS", "50000")))
+
+
+def _chunk_query(columns: Sequence[str]) -> str:
+    unknown = [c for c in columns if c not in KLINE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown kline columns: {unknown}")
+    # NULL prices become NaN so every binary field stays fixed-width.
+    values = "".join(f", COALESCE({c}::float8, 'NaN'::float8)" for c in columns)
+    return f"""
+        SELECT open_time{values}
+        FROM binance_klines
+        WHERE symbol = %s
+          AND timeframe = %s
+          AND open_time > %s
+          AND open_time <= %s
+        ORDER BY open_time ASC
+        LIMIT %s
+    """
+
+
+def _to_datetime(ts) -> datetime:
+    """Naive UTC datetime from a datetime / pandas Timestamp / date string."""
+    if hasattr(ts, "to_pydatetime"):
+        ts = ts.to_pydatetime()
+    elif isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def iter_kline_chunks(
+    coin: str,
+    interval: str,
+    start,
+    end,
+    columns: Sequence[str] = ("close",),
+    chunk_rows: Optional[int] = None,
+) -> Iterator[KlineChunk]:
+    """
+    Klines with start <= open_time <= end, ascending, in chunks of at most
+    `chunk_rows` rows. One pooled connection is held until the generator is
+    exhausted or closed.
+    """
+    chunk_rows = chunk_rows or default_chunk_rows()
+    query = _chunk_query(columns)
+    kinds = ("timestamp",) + ("float8",) * len(columns)
+    # open_time > after: start one microsecond early so `start` itself is included.
+    after = _to_datetime(start) - timedelta(microseconds=1)
+    end = _to_datetime(end)
+    use_binary = binary_copy_enabled()
+
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            while True:
+                params = (coin, interval, after, end, chunk_rows)
+                arrays = None
+                if use_binary:
+                    try:
+                        arrays = copy_binary(cursor, query, params, kinds)
+                    except (BinaryCopyError, psycopg2.Error) as e:
+                        logger.debug("Binary COPY of binance_klines failed (%s); using text path", e)
+                        conn.rollback()
+                        use_binary = False
+                if arrays is None:
+                    cursor.execute(query, params)
+                    rows = cursor.fetchall()
+                    arrays = (as_datetime64([r[0] for r in rows]),) + tuple(
+                        np.fromiter((r[i + 1] for r in rows), dtype="float64", count=len(rows))
+                        for i in range(len(columns))
+                    )
+                    del rows
+
+                n = len(arrays[0])
+                if n == 0:
+                    return
+                chunk = {"open_time": arrays[0].astype("datetime64[ns]", copy=False)}
+                chunk.update(zip(columns, arrays[1:]))
+                yield chunk
+                if n < chunk_rows:
+                    return
+                after = arrays[0][-1].astype("datetime64[us]").item()
+        finally:
+            cursor.close()
+
+
+def read_klines(
+    coin: str,
+    interval: str,
+    start,
+    end,
+    columns: Sequence[str] = ("close",),
+    chunk_rows: Optional[int] = None,
+) -> KlineChunk:
+    """
+    The whole window as {"open_time", *columns} arrays. Buffers are sized from
+    the window / interval length up front and grown only if the table holds
+    more rows than that (e.g. an unknown interval string).
+    """
+    start_dt, end_dt = _to_datetime(start), _to_datetime(end)
+    try:
+        capacity = int((end_dt - start_dt).total_seconds() // interval_seconds(interval)) + 1
+    except ValueError:
+        capacity = chunk_rows or default_chunk_rows()
+    capacity = max(capacity, 0)
+
+    out: KlineChunk = {"open_time": np.empty(capacity, dtype="datetime64[ns]")}
+    out.update((c, np.empty(capacity, dtype="float64")) for c in columns)
+    n = 0
+    for chunk in iter_kline_chunks(coin, interval, start_dt, end_dt, columns, chunk_rows):
+        m = len(chunk["open_time"])
+        if n + m > len(out["open_time"]):
+            grow = max(n + m, 2 * len(out["open_time"]))
+            for name in out:
+                buf = np.empty(grow, dtype=out[name].dtype)
+                buf[:n] = out[name][:n]
+                out[name] = buf
+        for name, values in chunk.items():
+            out[name][n:n + m] = values
+        n += m
+
+    return {name: buf[:n] for name, buf in out.items()}
@@ -0,0 +1,252 @@
+# app/db/models.py
+"""
+Compact containers for data read from Postgres.
+
+PredictionSeries keeps a prediction package as three contiguous arrays
+(point times, prices, is_historical mask) instead of one dict per point.
+PointsView exposes either half as a read-only sequence of {"date", "price"}
+dicts so legacy callers keep working, while strategies can read `.prices`
+directly without copying.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from app.utils.startup import lazy_import
+
+pd = lazy_import("pandas")
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _naive_utc(values: Sequence[datetime]) -> Sequence[datetime]:
+    """Plain datetimes of one column as naive UTC (tz-aware columns are converted)."""
+    if values and values[0].tzinfo is not None:
+        return [v.astimezone(timezone.utc).replace(tzinfo=None) for v in values]
+    return values
+
+
+def as_datetime64(values: Any) -> np.ndarray:
+    """datetime64[ns] array from datetimes (tz-aware values are converted to naive UTC)."""
+    if isinstance(values, (list, tuple)) and not values:
+        return np.empty(0, dtype="datetime64[ns]")
+    if isinstance(values, (list, tuple)) and all(type(v) is datetime for v in values):
+        # Plain datetimes straight from psycopg2: seconds since the epoch via
+        # timedelta.total_seconds are far cheaper than pandas (or NumPy's own
+        # datetime-object parsing) for the few dozen points of one package.
+        # Microseconds are recovered exactly: they fit a float64 mantissa.
+        seconds = np.array([(v - _EPOCH).total_seconds() for v in _naive_utc(values)], dtype="float64")
+        return np.rint(seconds * 1e6).astype(np.int64).view("datetime64[us]").astype("datetime64[ns]")
+    idx = pd.DatetimeIndex(pd.to_datetime(values))
+    if idx.tz is not None:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    return idx.to_numpy(dtype="datetime64[ns]")
+
+
+class PointsView(Sequence):
+    """
+    Sequence of {"date", "price"} dicts backed by (times, prices) arrays.
+
+    A view built from database rows keeps the original datetimes (`dates`) and
+    converts them to `times` only when that array is first read.
+    """
+
+    __slots__ = ("_times", "_dates", "prices", "series")
+
+    def __init__(
+        self,
+        times: Optional[np.ndarray],
+        prices: np.ndarray,
+        series: Optional["PredictionSeries"] = None,
+        dates: Optional[Sequence[datetime]] = None,
+    ):
+        self._times = times
+        self._dates = dates
+        self.prices = prices
+        self.series = series
+
+    @property
+    def times(self) -> np.ndarray:
+        if self._times is None:
+            self._times = as_datetime64(list(self._dates))
+        return self._times
+
+    def _date_list(self) -> list:
+        if self._dates is not None:
+            return list(self._dates)
+        return self._times.astype("datetime64[us]").tolist()
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[Dict[str, Any], "PointsView"]:
+        if isinstance(i, slice):
+            return PointsView(
+                None if self._times is None else self._times[i],
+                self.prices[i],
+                self.series,
+                None if self._dates is None else self._dates[i],
+            )
+        if self._dates is not None:
+            return {"date": self._dates[i], "price": float(self.prices[i])}
+        return {"date": self._times[i].astype("datetime64[us]").item(), "price": float(self.prices[i])}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for date, price in zip(self._date_list(), self.prices.tolist()):
+            yield {"date": date, "price": price}
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, PointsView):
+            return np.array_equal(self.times, other.times) and np.array_equal(self.prices, other.prices)
+        if isinstance(other, (list, tuple)):
+            return len(other) == len(self) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"PointsView(len={len(self)})"
+
+    def to_list(self) -> list:
+        return list(self)
+
+
+class PredictionSeries:
+    """
+    One prediction package as arrays.
+
+    times are datetime64[ns] (naive UTC), prices float64 and is_historical bool,
+    all ordered by point time. When the historical points all precede the
+    forecast points (the normal case) both halves are zero-copy slices.
+
+    Points without a time or a value are dropped and a NULL is_historical
+    counts as forecast, on every read path (binary COPY, text rows, bulk arrays).
+    """
+
+    __slots__ = ("prediction_id", "_times", "_dates", "prices", "is_historical", "metadata", "_historical", "_forecast")
+
+    def __init__(
+        self,
+        times: Optional[np.ndarray],
+        prices: np.ndarray,
+        is_historical: np.ndarray,
+        metadata: Any = None,
+        prediction_id: Optional[str] = None,
+        dates: Optional[Sequence[datetime]] = None,
+    ):
+        self._times = None if times is None else np.asarray(times, dtype="datetime64[ns]")
+        self._dates = dates
+        self.prices = np.asarray(prices, dtype="float64")
+        self.is_historical = np.asarray(is_historical, dtype=bool)
+        self.metadata = {} if metadata is None else metadata
+        self.prediction_id = prediction_id
+        self._historical: Optional[PointsView] = None
+        self._forecast: Optional[PointsView] = None
+
+    @classmethod
+    def empty(cls) -> "PredictionSeries":
+        return cls(np.empty(0, dtype="datetime64[ns]"), np.empty(0), np.empty(0, dtype=bool))
+
+    @classmethod
+    def from_columns(
+        cls,
+        times: Sequence[Any],
+        values: Sequence[Any],
+        hist: Sequence[Any],
+        metadata: Any = None,
+        prediction_id: Optional[str] = None,
+    ) -> "PredictionSeries":
+        """Build from parallel point_time / value / is_historical columns (NULLs as None)."""
+        n = len(times)
+        if None in times or None in values:
+            keep = [i for i in range(n) if times[i] is not None and values[i] is not None]
+            times, values, hist = [times[i] for i in keep], [values[i] for i in keep], [hist[i] for i in keep]
+            n = len(keep)
+        prices = np.fromiter(values, "float64", n)
+        # bool(None) is False: a NULL flag counts as forecast.
+        flags = np.fromiter(hist, bool, n)
+        if n and type(times[0]) is datetime:
+            # Keep psycopg2's datetimes; `times` is converted on first use.
+            return cls(None, prices, flags, metadata, prediction_id, dates=_naive_utc(list(times)))
+        return cls(as_datetime64(list(times)), prices, flags, metadata, prediction_id)
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Sequence[Sequence[Any]],
+        metadata: Any = None,
+        prediction_id: Optional[str] = None,
+    ) -> "PredictionSeries":
+        """Build from (point_time, value, is_historical) rows."""
+        if not rows:
+            series = cls.empty()
+            series.metadata, series.prediction_id = ({} if metadata is None else metadata), prediction_id
+            return series
+        times, values, hist = zip(*rows)
+        return cls.from_columns(times, values, hist, metadata, prediction_id)
+
+    @property
+    def times(self) -> np.ndarray:
+        if self._times is None:
+            self._times = as_datetime64(list(self._dates))
+        return self._times
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def __repr__(self) -> str:
+        return (
+            f"PredictionSeries(prediction_id={self.prediction_id!r}, "
+            f"historical={len(self.historical)}, forecast={len(self.forecast)})"
+        )
+
+    def _split(self) -> None:
+        hist = self.is_historical
+        n_hist = int(np.count_nonzero(hist))
+        times, dates = self._times, self._dates
+        if hist[:n_hist].all():
+            # Contiguous: historical prefix, forecast suffix -> views, no copies.
+            head, tail = slice(None, n_hist), slice(n_hist, None)
+            self._historical = PointsView(
+                None if times is None else times[head], self.prices[head], self,
+                None if dates is None else dates[head],
+            )
+            self._forecast = PointsView(
+                None if times is None else times[tail], self.prices[tail], self,
+                None if dates is None else dates[tail],
+            )
+        else:
+            flags = hist.tolist()
+            self._historical = PointsView(
+                None if times is None else times[hist], self.prices[hist], self,
+                None if dates is None else [d for d, h in zip(dates, flags) if h],
+            )
+            self._forecast = PointsView(
+                None if times is None else times[~hist], self.prices[~hist], self,
+                None if dates is None else [d for d, h in zip(dates, flags) if not h],
+            )
+
+    @property
+    def historical(self) -> PointsView:
+        if self._historical is None:
+            self._split()
+        return self._historical
+
+    @property
+    def forecast(self) -> PointsView:
+        if self._forecast is None:
+            self._split()
+        return self._forecast
+
+    @property
+    def entry_price(self) -> float:
+        """Last historical price (NaN when there is none)."""
+        prices = self.historical.prices
+        return float(prices[-1]) if len(prices) else float("nan")
+
+    def as_legacy(self) -> tuple:
+        """(historical, forecast, metadata) as returned by fetch_latest_prediction_with_metadata."""
+        return self.historical, self.forecast, self.metadata
@@ -0,0 +1,99 @@
+# app/db/pgbinary.py
+"""
+Binary COPY transfer into typed NumPy arrays.
+
+`COPY (SELECT ...) TO STDOUT WITH (FORMAT binary)` sends each row as
+fixed-width big-endian fields when every column is a fixed-size type and
+non-NULL. Such a stream can be viewed as a NumPy structured array directly,
+with no per-value Python objects.
+
+Supported column kinds: "timestamp" (timestamp/timestamptz -> datetime64[ns]),
+"float8", "int8", "int4", "bool". Queries must cast to these types and must
+not return NULLs; anything else raises BinaryCopyError so callers can fall
+back to the text path. DB_BINARY_COPY=0 turns the binary path off.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+from typing import Any, Dict, Sequence, Tuple
+
+import numpy as np
+
+
+SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+
+# kind -> (wire dtype, payload size)
+_KINDS: Dict[str, Tuple[str, int]] = {
+    "timestamp": (">i8", 8),
+    "float8": (">f8", 8),
+    "int8": (">i8", 8),
+    "int4": (">i4", 4),
+    "bool": ("u1", 1),
+}
+
+# Postgres timestamps are microseconds since 2000-01-01.
+_PG_EPOCH_US = np.int64(946684800 * 1_000_000)
+
+
+class BinaryCopyError(ValueError):
+    pass
+
+
+def binary_copy_enabled() -> bool:
+    return os.getenv("DB_BINARY_COPY", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def row_dtype(kinds: Sequence[str]) -> np.dtype:
+    fields = [("nfields", ">i2")]
+    for i, kind in enumerate(kinds):
+        if kind not in _KINDS:
+            raise BinaryCopyError(f"Unsupported binary COPY column kind: {kind}")
+        fields.append((f"len{i}", ">i4"))
+        fields.append((f"f{i}", _KINDS[kind][0]))
+    return np.dtype(fields)
+
+
+def header_size(buf: memoryview) -> int:
+    if bytes(buf[:11]) != SIGNATURE:
+        raise BinaryCopyError("Not a binary COPY stream")
+    ext_len = int.from_bytes(bytes(buf[15:19]), "big")
+    return 19 + ext_len
+
+
+def decode_rows(raw: np.ndarray, kinds: Sequence[str]) -> Tuple[np.ndarray, ...]:
+    """Validate a structured chunk of rows and convert each field to native arrays."""
+    if len(raw) and (raw["nfields"] != len(kinds)).any():
+        raise BinaryCopyError("Unexpected field count in binary COPY row")
+    cols = []
+    for i, kind in enumerate(kinds):
+        if len(raw) and (raw[f"len{i}"] != _KINDS[kind][1]).any():
+            raise BinaryCopyError(f"Column {i} has NULLs or an unexpected width")
+        col = raw[f"f{i}"]
+        if kind == "timestamp":
+            cols.append(((col.astype(np.int64) + _PG_EPOCH_US) * 1000).view("datetime64[ns]"))
+        elif kind == "bool":
+            cols.append(col.astype(bool))
+        else:
+            cols.append(col.astype(col.dtype.newbyteorder("=")))
+    return tuple(cols)
+
+
+def parse_copy_binary(data: bytes, kinds: Sequence[str]) -> Tuple[np.ndarray, ...]:
+    buf = memoryview(data)
+    start = header_size(buf)
+    dtype = row_dtype(kinds)
+    body = len(buf) - start - 2  # trailer: int16 -1
+    if body < 0 or body % dtype.itemsize or bytes(buf[-2:]) != b"\xff\xff":
+        raise BinaryCopyError("Binary COPY stream has variable-width rows or no trailer")
+    raw = np.frombuffer(buf, dtype=dtype, count=body // dtype.itemsize, offset=start)
+    return decode_rows(raw, kinds)
+
+
+def copy_binary(cursor, query: str, params: Any, kinds: Sequence[str]) -> Tuple[np.ndarray, ...]:
+    """Run `query` (a SELECT) through binary COPY and return one array per column."""
+    select = cursor.mogrify(query, params).decode("utf-8")
+    out = io.BytesIO()
+    cursor.copy_expert(f"COPY ({select}) TO STDOUT WITH (FORMAT binary)", out)
+    return parse_copy_binary(out.getbuffer(), kinds)
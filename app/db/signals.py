@@ -0,0 +1,29 @@
+# app/db/signals.py
+"""
+Rows of the open-signal tracker: signals read from strategy_signals and the
+outcomes written to strategy_signal_outcomes.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from typing import NamedTuple
+
+
+class OpenSignal(NamedTuple):
+    signal_id: str
+    coin: str
+    model_name: str
+    created_at: datetime
+    action: str  # BUY / SHORT
+    entry: float
+    stop_loss: float
+    take_profit: float
+
+
+class SignalOutcome(NamedTuple):
+    signal: OpenSignal
+    outcome: str  # stop_loss / take_profit / expired
+    exit_price: float
+    exit_time: datetime  # open_time of the resolving candle
+    return_pct: float
@@ -1,25 +1,265 @@
-import psycopg2
-import os
 import uuid
 import json
-from dotenv import load_dotenv
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from psycopg2.extras import execute_values
+
+from app.db.connection import execute_prepared, get_connection
+from app.db.signals import OpenSignal, SignalOutcome
+from app.utils.intervals import interval_seconds
+from app.utils.metrics import REGISTRY
+
+
+logger = logging.getLogger("strategies.db")
 
-load_dotenv(".env")
 
 def save_strategy_signal(coin: str, model_name: str, signal: dict):
-    conn = psycopg2.connect(
-        dbname="crypto_predictions",
-        user=os.getenv("DBUSER"),
-        password=os.getenv("DBPASSWORD"),
-        host=os.getenv("DBHOST")
-    )
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        INSERT INTO strategy_signals (id, coin, model_name, signal)
-        VALUES (%s, %s, %s, %s)
-    """, (str(uuid.uuid4()), coin, model_name, json.dumps(signal)))
-
-    conn.commit()
-    cursor.close()
-    conn.close()
\ No newline at end of file
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_prepared(
+            cursor,
+            "insert_strategy_signal",
+            (str(uuid.uuid4()), coin, model_name, json.dumps(signal)),
+        )
+        cursor.close()
+
+
+def load_run_memo(slot: Tuple[str, str, str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """(memo_key, decision) stored for (coin, interval, model_name), or None."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_prepared(cursor, "run_memo", slot)
+        row = cursor.fetchone()
+        cursor.close()
+    if row is None:
+        return None
+    key, decision = row
+    return key, decision if isinstance(decision, dict) else json.loads(decision)
+
+
+def save_run_memo(slot: Tuple[str, str, str], key: str, decision: Dict[str, Any]) -> None:
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_prepared(cursor, "upsert_run_memo", (*slot, key, json.dumps(decision)))
+        cursor.close()
+
+
+def ensure_signal_partitions(months_ahead: int = 3) -> int:
+    """Create the strategy_signals partitions up to `months_ahead` months out; returns how many were added."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT ensure_strategy_signal_partitions(NOW()::date, %s)", (int(months_ahead),))
+        created = cursor.fetchone()[0]
+        cursor.close()
+    return created
+
+
+def load_open_signals(after: Tuple[datetime, str]) -> List[OpenSignal]:
+    """
+    Confirmed BUY/SHORT signals written after the (created_at, id) cursor that
+    have no recorded outcome yet, oldest first.
+    """
+    after_ts, after_id = after
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT s.id, s.coin, s.model_name, s.created_at, s.action, s.entry, s.stop_loss, s.take_profit
+            FROM strategy_signals s
+            WHERE s.action IN ('BUY', 'SHORT')
+              AND s.source = 'Confirmed'
+              AND (s.created_at, s.id) > (%s, %s::uuid)
+              AND NOT EXISTS (SELECT 1 FROM strategy_signal_outcomes o WHERE o.signal_id = s.id)
+            ORDER BY s.created_at, s.id
+            """,
+            (after_ts, after_id),
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+    return [OpenSignal(str(r[0]), *r[1:]) for r in rows]
+
+
+def fetch_candles_after(interval: str, after: Dict[str, datetime]) -> List[Tuple[str, datetime, float, float, float]]:
+    """
+    Closed (symbol, open_time, high, low, close) candles with open_time after
+    each symbol's cursor, in time order across symbols.
+    """
+    if not after:
+        return []
+    try:
+        closed_before = datetime.utcnow() - timedelta(seconds=interval_seconds(interval))
+    except ValueError:
+        # Calendar intervals ("1M") have no fixed length: treat each symbol's
+        # newest stored candle as the one still open.
+        closed_before = None
+    symbols = list(after)
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT k.symbol, k.open_time, k.high::float8, k.low::float8, k.close::float8
+            FROM unnest(%(symbols)s::text[], %(after)s::timestamp[]) AS q(symbol, after_time)
+            JOIN binance_klines k
+              ON k.symbol = q.symbol
+             AND k.timeframe = %(interval)s
+             AND k.open_time > q.after_time
+             AND k.open_time <= COALESCE(
+                 %(closed_before)s::timestamp,
+                 (SELECT max(m.open_time) - interval '1 microsecond' FROM binance_klines m
+                  WHERE m.symbol = q.symbol AND m.timeframe = %(interval)s)
+             )
+            ORDER BY k.open_time, k.symbol
+            """,
+            {
+                "symbols": symbols,
+                "after": [after[s] for s in symbols],
+                "interval": interval,
+                "closed_before": closed_before,
+            },
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
+
+def save_signal_outcomes(outcomes: Sequence[SignalOutcome]) -> None:
+    """Record resolutions; re-recording a signal (replay after restart) is a no-op."""
+    if not outcomes:
+        return
+    rows = [
+        (o.signal.signal_id, o.signal.coin, o.signal.model_name, o.signal.created_at, o.signal.action,
+         o.signal.entry, o.signal.stop_loss, o.signal.take_profit, o.outcome, o.exit_price, o.exit_time,
+         o.return_pct)
+        for o in outcomes
+    ]
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        execute_values(
+            cursor,
+            """
+            INSERT INTO strategy_signal_outcomes
+                (signal_id, coin, model_name, signal_created_at, action, entry, stop_loss, take_profit,
+                 outcome, exit_price, exit_time, return_pct)
+            VALUES %s
+            ON CONFLICT (signal_id) DO NOTHING
+            """,
+            rows,
+            page_size=1000,
+        )
+        cursor.close()
+
+
+class SignalSink:
+    """
+    Buffered writer for strategy_signals.
+
+    Signals are queued in memory and written with one multi-row INSERT and a
+    single commit per flush. A flush happens when `batch_size` rows are pending,
+    on `flush()`, and on `close()` / leaving the context manager.
+
+    The queue is bounded by `max_pending`: if flushes keep failing (DB down) the
+    oldest rows are dropped with a warning instead of growing without limit.
+
+    `after_flush` callbacks run once the rows pending when they were registered
+    are committed; they are discarded if rows are dropped.
+    """
+
+    def __init__(self, batch_size: int = 500, max_pending: int = 10_000):
+        self.batch_size = max(1, int(batch_size))
+        self.max_pending = max(self.batch_size, int(max_pending))
+        self._pending: Deque[Tuple[str, str, str, str]] = deque()
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    def __enter__(self) -> "SignalSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, coin: str, model_name: str, signal: dict) -> None:
+        row = (str(uuid.uuid4()), coin, model_name, json.dumps(signal))
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+                self._callbacks.clear()  # can't tell whose rows were lost
+                logger.warning("SignalSink full (max_pending=%s); dropped oldest signal", self.max_pending)
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("SignalSink flush failed; %s signals kept pending", len(self._pending))
+
+    def after_flush(self, callback: Callable[[], None]) -> None:
+        """Call `callback` (on the flushing thread) once everything pending now is written."""
+        with self._lock:
+            self._callbacks.append(callback)
+
+    def _run_callbacks(self, callbacks: List[Callable[[], None]]) -> None:
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("SignalSink after_flush callback failed")
+
+    def flush(self) -> int:
+        """Write everything pending in one transaction. Returns rows written."""
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, []
+            batch: List[Tuple[str, str, str, str]] = list(self._pending)
+            self._pending.clear()
+        if not batch:
+            self._run_callbacks(callbacks)
+            return 0
+
+        t0 = time.perf_counter()
+        try:
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                execute_values(
+                    cursor,
+                    "INSERT INTO strategy_signals (id, coin, model_name, signal) VALUES %s",
+                    batch,
+                    page_size=len(batch),
+                )
+                cursor.close()
+        except Exception:
+            # Put the batch back in front (respecting the bound) so a later flush can retry.
+            with self._lock:
+                room = self.max_pending - len(self._pending)
+                keep = batch[-room:] if room > 0 else []
+                lost = len(batch) - len(keep)
+                self.dropped += lost
+                self._pending.extendleft(reversed(keep))
+                if not lost:
+                    self._callbacks[:0] = callbacks
+            if lost:
+                logger.warning("SignalSink full (max_pending=%s); dropped %s signals of a failed batch", self.max_pending, lost)
+            REGISTRY.observe_stage("signal_flush", time.perf_counter() - t0, len(batch), ok=False)
+            raise
+
+        REGISTRY.observe_stage("signal_flush", time.perf_counter() - t0, len(batch))
+        self.written += len(batch)
+        logger.debug("SignalSink flushed %s signals", len(batch))
+        self._run_callbacks(callbacks)
+        return len(batch)
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("SignalSink final flush failed; %s signals lost", len(self._pending))
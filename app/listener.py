@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Event-driven strategy runs.
+
+    python -m app.listener --symbols-file symbols.txt --intervals 1h,4h
+
+Subscribes to the Postgres NOTIFY channel fed by
+app/postgress_tables/prediction_runs_notify.sql and runs `run_for_coin` for
+exactly the (coin, interval, model) whose prediction run just landed, instead
+of polling on a cron. Bursts for the same key are debounced into one run; a key
+notified while its run is in flight is re-run once afterwards.
+
+The LISTEN connection is asynchronous (libpq non-blocking mode, driven from the
+event loop) and heartbeated; after a reconnect every key with a run created
+while we were away is dispatched, so no notification is lost for good.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+
+logger = logging.getLogger("strategies.listener")
+
+DEFAULT_CHANNEL = "prediction_runs"
+
+RunKey = Tuple[str, str, str]  # (coin, interval, model_name)
+
+
+def parse_notification(payload: str) -> Optional[RunKey]:
+    """(coin, interval, model_name) from a trigger payload, or None if it is malformed."""
+    try:
+        data = json.loads(payload)
+        key = (str(data["coin"]), str(data["interval"]), str(data["model_name"]))
+    except (ValueError, TypeError, KeyError):
+        return None
+    return key if all(key) else None
+
+
+# ----------------------------
+# Debounce
+# ----------------------------
+class Debouncer:
+    """
+    Per-key trailing debounce: a key fires `delay` seconds after its latest
+    event, but never later than `max_delay` after the first one. At most
+    `concurrency` dispatches run at once and a key never runs twice concurrently.
+    """
+
+    def __init__(
+        self,
+        dispatch: Callable[[Hashable], Awaitable[None]],
+        delay: float = 0.25,
+        max_delay: float = 2.0,
+        concurrency: int = 8,
+    ):
+        self.dispatch = dispatch
+        self.delay = float(delay)
+        self.max_delay = max(float(max_delay), self.delay)
+        self._sem = asyncio.Semaphore(max(1, int(concurrency)))
+        self._first: Dict[Hashable, float] = {}
+        self._handles: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._running: Set[Hashable] = set()
+        self._dirty: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self.dispatched = 0
+
+    def push(self, key: Hashable) -> None:
+        if key in self._running:
+            self._dirty.add(key)
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        first = self._first.setdefault(key, now)
+        handle = self._handles.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+        self._handles[key] = loop.call_at(min(now + self.delay, first + self.max_delay), self._fire, key)
+
+    def pending(self) -> int:
+        return len(self._handles) + len(self._running)
+
+    def _fire(self, key: Hashable) -> None:
+        self._handles.pop(key, None)
+        self._first.pop(key, None)
+        self._running.add(key)
+        task = asyncio.get_running_loop().create_task(self._run(key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: Hashable) -> None:
+        try:
+            async with self._sem:
+                self.dispatched += 1
+                await self.dispatch(key)
+        except Exception:
+            logger.exception("Dispatch failed | key=%s", key)
+        finally:
+            self._running.discard(key)
+            if key in self._dirty:
+                self._dirty.discard(key)
+                self.push(key)
+
+    async def drain(self) -> None:
+        """Wait until nothing is scheduled or running."""
+        while self._handles or self._tasks:
+            if self._tasks:
+                await asyncio.gather(*list(self._tasks), return_exceptions=True)
+            else:
+                await asyncio.sleep(min(self.delay, 0.05) or 0.01)
+
+    async def close(self, flush: bool = True) -> None:
+        """Stop debouncing: fire (or drop) whatever is scheduled and wait for running dispatches."""
+        for key, handle in list(self._handles.items()):
+            handle.cancel()
+            if flush:
+                self._fire(key)
+        self._handles.clear()
+        self._first.clear()
+        if not flush:
+            self._dirty.clear()
+        await self.drain()
+
+
+# ----------------------------
+# LISTEN connection
+# ----------------------------
+class PredictionListener:
+    """
+    Holds a dedicated asynchronous connection LISTENing on `channel` and calls
+    `on_key` for every well-formed notification. Heartbeat queries are sent
+    without blocking the loop and must answer within `heartbeat` seconds.
+    Reconnects with backoff; after a reconnect `on_key` is also called for each
+    key with a run created since the last successful heartbeat.
+    """
+
+    def __init__(
+        self,
+        on_key: Callable[[RunKey], None],
+        channel: str = DEFAULT_CHANNEL,
+        heartbeat: float = 30.0,
+        max_backoff: float = 30.0,
+    ):
+        self.on_key = on_key
+        self.channel = channel
+        self.heartbeat = float(heartbeat)
+        self.max_backoff = float(max_backoff)
+        self.notifications = 0
+        self._conn = None
+        self._lost: Optional[asyncio.Future] = None
+        self._query: Optional[Tuple[Any, asyncio.Future]] = None  # (cursor, result) of the heartbeat in flight
+        self._writing = False
+        self._last_seen_db: Any = None  # server clock at the last successful heartbeat
+
+    def _connect(self):
+        """Open the async connection and LISTEN (blocking; runs on a worker thread)."""
+        import psycopg2
+        from psycopg2 import sql
+        from psycopg2.extras import wait_select
+
+        from app.db.connection import connect_kwargs
+
+        # TCP keepalives so a silently dropped peer errors out instead of hanging.
+        conn = psycopg2.connect(**connect_kwargs(), async_=True, keepalives=1, keepalives_idle=30,
+                                keepalives_interval=10, keepalives_count=3)
+        try:
+            wait_select(conn)
+            cursor = conn.cursor()
+            cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(self.channel)))
+            wait_select(conn)
+            cursor.execute("SELECT now()::timestamp")
+            wait_select(conn)
+            server_now = cursor.fetchone()[0]
+            cursor.close()
+        except Exception:
+            conn.close()
+            raise
+        return conn, server_now
+
+    def _on_readable(self) -> None:
+        import psycopg2
+        from psycopg2.extensions import POLL_OK, POLL_WRITE
+
+        conn = self._conn
+        try:
+            state = conn.poll()
+        except psycopg2.Error as e:
+            self._mark_lost(e)
+            return
+        # libpq may need the socket writable to flush a query it was given.
+        if (state == POLL_WRITE) != self._writing:
+            loop = asyncio.get_running_loop()
+            if self._writing:
+                loop.remove_writer(conn.fileno())
+            else:
+                loop.add_writer(conn.fileno(), self._on_readable)
+            self._writing = not self._writing
+        if state == POLL_OK and self._query is not None:
+            cursor, result = self._query
+            self._query = None
+            if not result.done():
+                try:
+                    result.set_result(cursor.fetchone()[0])
+                except psycopg2.Error as e:
+                    result.set_exception(e)
+            cursor.close()
+        while conn.notifies:
+            note = conn.notifies.pop(0)
+            key = parse_notification(note.payload)
+            if key is None:
+                logger.warning("Ignoring malformed notification | payload=%r", note.payload)
+                continue
+            self.notifications += 1
+            logger.debug("Notification | key=%s", key)
+            self.on_key(key)
+
+    def _mark_lost(self, exc: BaseException) -> None:
+        if self._lost is not None and not self._lost.done():
+            self._lost.set_result(exc)
+
+    async def _heartbeat(self) -> None:
+        import psycopg2
+
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            result = loop.create_future()
+            try:
+                cursor = self._conn.cursor()
+                cursor.execute("SELECT now()::timestamp")  # only sends; the reader collects the answer
+                self._query = (cursor, result)
+                self._on_readable()
+                self._last_seen_db = await asyncio.wait_for(result, timeout=self.heartbeat)
+            except asyncio.TimeoutError:
+                self._mark_lost(TimeoutError(f"heartbeat unanswered after {self.heartbeat:g}s"))
+                return
+            except psycopg2.Error as e:
+                self._mark_lost(e)
+                return
+
+    async def _catch_up(self, since: Any) -> None:
+        from app.db.connection import run_db
+        from app.db.fetch import fetch_prediction_run_keys_since
+
+        try:
+            keys = await run_db(fetch_prediction_run_keys_since, since)
+        except Exception:
+            logger.exception("Catch-up query failed | since=%s", since)
+            return
+        logger.info("Catch-up after reconnect | since=%s keys=%s", since, len(keys))
+        for key in keys:
+            self.on_key((str(key[0]), str(key[1]), str(key[2])))
+
+    async def run(self, stop: asyncio.Event) -> None:
+        from app.db.connection import run_db
+
+        loop = asyncio.get_running_loop()
+        backoff = 1.0
+        reconnecting = False
+        while not stop.is_set():
+            try:
+                self._conn, server_now = await run_db(self._connect)
+            except Exception as e:
+                logger.warning("LISTEN connect failed: %s; retrying in %.0fs", e, backoff)
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=backoff)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(self.max_backoff, backoff * 2)
+                continue
+
+            logger.info("Listening | channel=%s", self.channel)
+            backoff = 1.0
+            if reconnecting and self._last_seen_db is not None:
+                await self._catch_up(self._last_seen_db)
+            self._last_seen_db = server_now
+
+            self._lost = loop.create_future()
+            fd = self._conn.fileno()  # fileno() raises once the connection is closed
+            loop.add_reader(fd, self._on_readable)
+            heartbeat = loop.create_task(self._heartbeat())
+            stopped = loop.create_task(stop.wait())
+            try:
+                await asyncio.wait({self._lost, stopped}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                heartbeat.cancel()
+                stopped.cancel()
+                loop.remove_reader(fd)
+                if self._writing:
+                    loop.remove_writer(fd)
+                    self._writing = False
+                self._query = None
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+
+            if self._lost.done():
+                logger.warning("LISTEN connection lost: %s; reconnecting", self._lost.result())
+                reconnecting = True
+
+
+# ----------------------------
+# Entrypoint
+# ----------------------------
+async def run_listener(
+    symbols: Optional[Set[str]],
+    intervals: Optional[Set[str]],
+    models: Optional[Set[str]],
+    since_days: int = 21,
+    concurrency: int = 8,
+    debounce: float = 0.25,
+    max_delay: float = 2.0,
+    signal_batch_size: int = 500,
+    channel: str = DEFAULT_CHANNEL,
+    stop: Optional[asyncio.Event] = None,
+) -> None:
+    from app.db.connection import run_db
+    from app.db.strategy import SignalSink
+    from app.main import run_for_coin
+    from app.notifications.outbox import TelegramOutbox
+    from app.notifications.telegram import bot, chat_id
+
+    stop = stop or asyncio.Event()
+    received_at: Dict[RunKey, float] = {}
+
+    with SignalSink(batch_size=signal_batch_size) as sink:
+        async with TelegramOutbox.from_env(bot, chat_id) as outbox:
+
+            async def _dispatch(key: RunKey) -> None:
+                coin, interval, model_name = key
+                await run_for_coin(coin, interval, since_days=since_days, sink=sink, outbox=outbox,
+                                   model_name=model_name)
+                await run_db(sink.flush)
+                t0 = received_at.pop(key, None)
+                if t0 is not None:
+                    logger.info("Event run done | key=%s latency=%.3fs", key, time.perf_counter() - t0)
+
+            debouncer = Debouncer(_dispatch, delay=debounce, max_delay=max_delay, concurrency=concurrency)
+
+            def _on_key(key: RunKey) -> None:
+                coin, interval, model_name = key
+                if (symbols and coin.upper() not in symbols) or (intervals and interval not in intervals) \
+                        or (models and model_name not in models):
+                    return
+                received_at.setdefault(key, time.perf_counter())
+                debouncer.push(key)
+
+            listener = PredictionListener(_on_key, channel=channel)
+            try:
+                await listener.run(stop)
+            finally:
+                await debouncer.close(flush=True)
+
+
+def main() -> None:
+    from app.db.connection import close_pool
+    from app.main import DEFAULT_MODEL, setup_logging
+    from app.utils.symbols import load_symbols
+
+    parser = argparse.ArgumentParser(description="Run strategies when new prediction runs are inserted.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--symbols", help="Only these symbols (default: every notified symbol)")
+    target.add_argument("--symbols-file", help="File with one symbol per line")
+    parser.add_argument("--intervals", type=str, default=None, help="Only these intervals, comma separated (default: all)")
+    parser.add_argument("--models", type=str, default=DEFAULT_MODEL,
+                        help=f"Only these models, comma separated; '*' for all (default: {DEFAULT_MODEL})")
+    parser.add_argument("--channel", type=str, default=os.getenv("PREDICTION_NOTIFY_CHANNEL", DEFAULT_CHANNEL))
+    parser.add_argument("--debounce", type=float, default=0.25, help="Quiet period per key in seconds (default: 0.25)")
+    parser.add_argument("--max-delay", type=float, default=2.0,
+                        help="Longest a key waits after its first notification (default: 2.0)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max runs in flight (default: 8)")
+    parser.add_argument("--since-days", type=int, default=21, help="History window in days (default: 21)")
+    parser.add_argument("--signal-batch-size", type=int, default=500)
+    parser.add_argument("--log-level", type=str, default="INFO", help="DEBUG, INFO, WARNING, ERROR")
+    parser.add_argument("--log-file", type=str, default=None, help="Optional log file path (rotating)")
+    args = parser.parse_args()
+
+    setup_logging(args.log_level, args.log_file)
+
+    symbols = set(load_symbols(args.symbols, args.symbols_file)) or None
+    intervals = {iv.strip() for iv in (args.intervals or "").split(",") if iv.strip()} or None
+    models = None if args.models.strip() == "*" else {m.strip() for m in args.models.split(",") if m.strip()} or None
+
+    async def _run() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        await run_listener(
+            symbols,
+            intervals,
+            models,
+            since_days=args.since_days,
+            concurrency=args.concurrency,
+            debounce=args.debounce,
+            max_delay=args.max_delay,
+            signal_batch_size=args.signal_batch_size,
+            channel=args.channel,
+            stop=stop,
+        )
+
+    try:
+        asyncio.run(_run())
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
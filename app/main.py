@@ -2,30 +2,85 @@
 """
 run_strategies.py
 
-Runs ForecastStrategy + RSIMomentumStrategy for a single symbol and:
+Runs ForecastStrategy + its confirmation strategies (RSIMomentumStrategy by
+default; CONFIRMATION_STRATEGIES=rsi,ema adds EMACrossoverStrategy) for one or
+many symbols and:
+- only fetches klines / evaluates confirmations when the forecast is BUY/SHORT
 - saves individual strategy signals
 - saves a combined "confirmed" signal
 - optionally sends Telegram if confirmed BUY/SHORT
+
+Batch mode (--symbols / --symbols-file) drives many symbols from a single
+process with bounded concurrency; a failure in one symbol never aborts the others.
+Several models / intervals (--models GRU,LSTM --interval 1h,4h,1d) are evaluated
+in the same pass, loading predictions and klines once for all of them.
 """
 
+import sys
+
+if "--profile-startup" in sys.argv:
+    # Installed before anything else is imported so every module is timed.
+    from app.utils.startup import import_timer
+
+    import_timer.install()
+
 import asyncio
 import argparse
+import atexit
 import logging
+import os
+import signal
+import time
 import traceback
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 from logging.handlers import RotatingFileHandler
 
-from app.db.fetch import fetch_latest_prediction_with_metadata, get_stored_klines
-from app.strategies.forecast import ForecastStrategy
+from app.db.fetch import (
+    fetch_latest_prediction_with_metadata,
+    fetch_latest_kline_open_time,
+    fetch_latest_predictions_bulk,
+    get_stored_klines,
+    SharedKlines,
+)
+from app.strategies.base import BaseStrategy
+from app.strategies.crossover import EMACrossoverStrategy
+from app.strategies.forecast import ForecastStrategy, right_align
+from app.strategies.indicators import IndicatorService
+from app.strategies.memo import RunMemo, memo_key, params_hash
+from app.strategies.pipeline import RunContext, StrategyPipeline
 from app.strategies.rsi_momentum import RSIMomentumStrategy
-from app.db.strategy import save_strategy_signal
-from app.notifications.telegram import send_strategy_signal_via_telegram
+from app.strategies.rsi_state import RSIStateStore
+from app.db.strategy import SignalSink, save_strategy_signal
+from app.db.connection import close_pool, run_db
+from app.utils.metrics import REGISTRY, RunMetrics
+from app.utils.symbols import load_symbols
+from app.notifications.outbox import TelegramOutbox
+from app.notifications.telegram import bot, chat_id, queue_strategy_signal
 
 
 logger = logging.getLogger("strategies")
 
+DEFAULT_MODEL = "GRU"
+
+# Whether confirmations skipped after a forecast HOLD still get a (skipped HOLD) signal row.
+RECORD_SKIPPED_SIGNALS = os.getenv("RECORD_SKIPPED_SIGNALS", "1").lower() not in ("0", "false", "no")
+
+# Incremental RSI state per (symbol, interval); persisted across runs when RSI_STATE_DIR is set.
+rsi_store = RSIStateStore.from_env()
+
+# Indicators per (symbol, interval, last candle), shared by every confirmation on that candle.
+indicator_service = IndicatorService.from_env()
+
+# Confirmation strategies, in evaluation order (comma list of "rsi", "ema").
+CONFIRMATION_STRATEGIES = [
+    name.strip().lower() for name in os.getenv("CONFIRMATION_STRATEGIES", "rsi").split(",") if name.strip()
+]
+
+# Outcome of the last run per (coin, interval, model); unchanged inputs skip the run (RUN_MEMO).
+run_memo = RunMemo.from_env()
+
 
 def setup_logging(level: str = "INFO", log_file: Optional[str] = None) -> None:
     """
@@ -64,9 +119,93 @@ def _safe_action(d: Optional[Dict[str, Any]]) -> str:
     return str(d.get("action", "HOLD") or "HOLD").upper()
 
 
-async def run_for_coin(coin: str, interval: str, since_days: int = 21) -> None:
+def make_forecast_strategy(fee_pct: float = 0.0) -> ForecastStrategy:
+    return ForecastStrategy(
+        fee_pct=fee_pct,
+        extra_gain=0.00001,
+        extra_loss=0.000015,
+    )
+
+
+def make_confirmations(fee_pct: float = 0.0) -> List[BaseStrategy]:
+    factories = {
+        "rsi": lambda: RSIMomentumStrategy(fee_pct=fee_pct, rsi_threshold=55, rsi_store=rsi_store),
+        "ema": lambda: EMACrossoverStrategy(fast=12, slow=26),
+    }
+    unknown = [name for name in CONFIRMATION_STRATEGIES if name not in factories]
+    if unknown:
+        raise ValueError(f"Unknown CONFIRMATION_STRATEGIES entries: {unknown}")
+    return [factories[name]() for name in CONFIRMATION_STRATEGIES]
+
+
+def _batch_forecast_decisions(predictions: Dict[tuple, tuple]) -> Dict[tuple, Dict[str, Any]]:
+    """ForecastStrategy decisions for every prefetched package in one vectorized pass."""
+    keys = list(predictions)
+    if not keys:
+        return {}
+    entries = [
+        float(predictions[k][0][-1]["price"]) if predictions[k][0] else float("nan")
+        for k in keys
+    ]
+    # PointsView halves expose their price arrays directly; plain lists are parsed.
+    forecasts = [
+        getattr(predictions[k][1], "prices", None)
+        if hasattr(predictions[k][1], "prices")
+        else [float(p["price"]) for p in predictions[k][1]]
+        for k in keys
+    ]
+    decisions = make_forecast_strategy().evaluate_batch(entries, right_align(forecasts), [len(f) for f in forecasts])
+    return dict(zip(keys, decisions))
+
+
+def _save_signal(sink: Optional[SignalSink], coin: str, model_name: str, signal: Dict[str, Any]) -> None:
+    if sink is not None:
+        sink.add(coin, model_name, signal)
+    else:
+        save_strategy_signal(coin, model_name, signal)
+
+
+async def run_for_coin(
+    coin: str,
+    interval: str,
+    since_days: int = 21,
+    sink: Optional[SignalSink] = None,
+    prediction: Optional[tuple] = None,
+    forecast_decision: Optional[Dict[str, Any]] = None,
+    outbox: Optional[TelegramOutbox] = None,
+    model_name: str = DEFAULT_MODEL,
+    record_skipped: bool = RECORD_SKIPPED_SIGNALS,
+    klines: Optional[SharedKlines] = None,
+) -> None:
+    """Evaluate one coin; per-stage timings are logged as a JSON summary and exported as metrics."""
+    metrics = RunMetrics(coin=coin, interval=interval, model=model_name, prefetched=prediction is not None)
+    final_decision: Optional[Dict[str, Any]] = None
+    status = "error"
+    try:
+        final_decision = await _run_for_coin(
+            coin, interval, since_days, sink, prediction, forecast_decision, outbox, model_name, record_skipped,
+            klines, metrics,
+        )
+        status = "cached" if metrics.context.get("memo") == "hit" else "ok"
+    finally:
+        metrics.finish(status, action=_safe_action(final_decision) if final_decision is not None else None)
+
+
+async def _run_for_coin(
+    coin: str,
+    interval: str,
+    since_days: int,
+    sink: Optional[SignalSink],
+    prediction: Optional[tuple],
+    forecast_decision: Optional[Dict[str, Any]],
+    outbox: Optional[TelegramOutbox],
+    model_name: str,
+    record_skipped: bool,
+    klines: Optional[SharedKlines],
+    metrics: RunMetrics,
+) -> Dict[str, Any]:
     fee_pct = 0.0
-    model = "GRU"
+    model = model_name
 
     logger.info("Starting run | coin=%s interval=%s since_days=%s model=%s", coin, interval, since_days, model)
 
@@ -74,129 +213,404 @@ async def run_for_coin(coin: str, interval: str, since_days: int = 21) -> None:
     start = end - timedelta(days=since_days)
     logger.debug("Time window | start=%s end=%s (UTC)", start.isoformat(), end.isoformat())
 
-    # Fetch latest prediction package
-    logger.info("Fetching latest prediction package...")
-    historical, forecast, metadata = fetch_latest_prediction_with_metadata(coin, interval, model)
+    # Fetch latest prediction package (unless the batch already prefetched it)
+    if prediction is None:
+        logger.info("Fetching latest prediction package...")
+        with metrics.span("prediction_fetch") as span:
+            prediction = await run_db(fetch_latest_prediction_with_metadata, coin, interval, model)
+            span.rows = len(prediction[0]) + len(prediction[1])
+    historical, forecast, metadata = prediction
     logger.debug("Fetched predictions | historical=%s forecast=%s metadata_keys=%s",
                  len(historical) if historical else 0,
                  len(forecast) if forecast else 0,
                  list(metadata.keys()) if isinstance(metadata, dict) else type(metadata).__name__)
 
-    # Fetch klines for RSI confirmation
-    logger.info("Fetching stored klines...")
-    df = get_stored_klines(
-        coin,
-        start=start.strftime("%Y-%m-%d"),
-        end=end.strftime("%Y-%m-%d"),
-        interval=interval,
-    )
-    try:
-        rows = 0 if df is None else len(df)
-        cols = [] if df is None else list(df.columns)
-        logger.debug("Fetched klines | rows=%s cols=%s", rows, cols)
-    except Exception:
-        logger.debug("Could not introspect klines df (non-pandas or custom type).")
+    def _load_klines():
+        # Blocking; runs on the DB thread pool, and only when a confirmation needs klines.
+        logger.info("Fetching stored klines...")
+        with metrics.span("kline_fetch") as span:
+            if klines is not None:
+                # Shared with the other models of this batch (usually already prefetched).
+                df = klines.get(coin, interval)
+            else:
+                # Full timestamps: the window must include the candles of the current day.
+                df = get_stored_klines(coin, start=start.isoformat(), end=end.isoformat(), interval=interval)
+            span.rows = 0 if df is None else len(df)
+        try:
+            rows = 0 if df is None else len(df)
+            cols = [] if df is None else list(df.columns)
+            logger.debug("Fetched klines | rows=%s cols=%s", rows, cols)
+        except Exception:
+            logger.debug("Could not introspect klines df (non-pandas or custom type).")
+        return df
 
     # ----------------------------
     # Strategy 1: Forecast
     # ----------------------------
-    forecast_strategy = ForecastStrategy(
-        fee_pct=fee_pct,
-        extra_gain=0.00001,
-        extra_loss=0.000015,
-    )
-    logger.info("Evaluating ForecastStrategy | %s", forecast_strategy)
-
-    decision = forecast_strategy.evaluate(historical, forecast)
+    forecast_strategy = make_forecast_strategy(fee_pct)
+    if forecast_decision is not None:
+        # Already evaluated for the whole batch (identical to evaluate()).
+        decision = forecast_decision
+    else:
+        logger.info("Evaluating ForecastStrategy | %s", forecast_strategy)
+        with metrics.span("evaluate.ForecastStrategy", rows=len(forecast)):
+            decision = forecast_strategy.evaluate(historical, forecast)
     logger.info("ForecastStrategy decision | %s", decision)
 
-    # ----------------------------
-    # Strategy 2: RSI Confirmation
-    # ----------------------------
-    rsi_strategy = RSIMomentumStrategy(fee_pct=fee_pct, rsi_threshold=55)
-    logger.info("Evaluating RSIMomentumStrategy | %s", rsi_strategy)
+    pipeline = StrategyPipeline(make_confirmations(fee_pct), record_skipped=record_skipped)
 
-    decision_rsi = rsi_strategy.evaluate(historical, forecast, df)
-    logger.info("RSIMomentumStrategy decision | %s", decision_rsi)
+    # Klines are only needed when the forecast can still be confirmed; start loading
+    # them now so the query overlaps with the memo lookups below.
+    needs_klines = _safe_action(decision) in ("BUY", "SHORT") and "klines" in pipeline.requires
+    klines_task = asyncio.ensure_future(run_db(_load_klines)) if needs_klines else None
 
-    # Persist individual signals (best-effort)
-    logger.info("Persisting individual signals...")
     try:
-        save_strategy_signal(coin, model, decision)
-        logger.debug("Saved ForecastStrategy signal")
-    except Exception:
-        logger.exception("Failed to save ForecastStrategy signal")
-
-    try:
-        save_strategy_signal(coin, "RSIMomentumStrategy", decision_rsi)
-        logger.debug("Saved RSIMomentumStrategy signal")
-    except Exception:
-        logger.exception("Failed to save RSIMomentumStrategy signal")
+        # ----------------------------
+        # Memo: same prediction run, same newest candle, same parameters -> same outcome
+        # ----------------------------
+        memo_slot, key = (coin, interval, model), None
+        prediction_id = getattr(getattr(historical, "series", None), "prediction_id", None)
+        if run_memo.enabled and prediction_id is not None:
+            last_open_time = None
+            if needs_klines:
+                with metrics.span("kline_last_open_time"):
+                    last_open_time = await run_db(fetch_latest_kline_open_time, coin, interval)
+            key = memo_key(
+                prediction_id,
+                last_open_time,
+                params_hash(forecast_strategy, *pipeline.confirmations, record_skipped=record_skipped),
+            )
+            cached = await run_db(run_memo.get, memo_slot, key)
+            if cached is not None:
+                metrics.context["memo"] = "hit"
+                logger.info("Inputs unchanged since last run; reusing decision | coin=%s interval=%s decision=%s",
+                            coin, interval, cached)
+                return cached
+
+        df = await klines_task if klines_task is not None else None
+    finally:
+        if klines_task is not None and not klines_task.done():
+            klines_task.cancel()  # memo hit or error: the result is not needed
+    REGISTRY.count_signal("ForecastStrategy", decision)
 
     # ----------------------------
-    # Combine signals
+    # Confirmations (lazy: skipped while the forecast holds)
     # ----------------------------
-    action_forecast = _safe_action(decision)
-    action_rsi = _safe_action(decision_rsi)
-
-    final_decision: Dict[str, Any] = {"action": "HOLD", "source": "Unconfirmed"}
-
-    if action_forecast in ("BUY", "SHORT") and action_rsi == action_forecast:
-        final_decision = {
-            **(decision or {}),
-            "action": action_forecast,
-            "rsi": (decision_rsi or {}).get("rsi"),
-            "confirmed_by": "RSI",
-            "source": "Confirmed",
-        }
+    ctx = RunContext(
+        coin, interval, historical, forecast,
+        loaders={
+            "klines": (lambda: df) if klines_task is not None else _load_klines,
+            "indicators": lambda: indicator_service.frame(coin, interval, ctx.get("klines")),
+        },
+    )
+    result = pipeline.run(decision, ctx, metrics=metrics)
+    final_decision = result.final
 
+    for strategy, decision_confirm in result.confirmations:
+        if decision_confirm is not None:
+            REGISTRY.count_signal(type(strategy).__name__, decision_confirm)
+    REGISTRY.count_signal("Combined", final_decision)
     logger.info("Final decision | %s", final_decision)
 
-    # Persist combined signal
-    logger.info("Persisting combined signal...")
-    try:
-        save_strategy_signal(coin, f"{model}+RSIMomentumStrategy", final_decision)
-        logger.debug("Saved combined signal")
-    except Exception:
-        logger.exception("Failed to save combined signal")
+    # ----------------------------
+    # Persist signals (best-effort; the writes overlap on the DB thread pool)
+    # ----------------------------
+    async def _persist(stage: str, label: str, name: str, signal: Dict[str, Any]) -> bool:
+        try:
+            with metrics.span(stage, rows=1):
+                await run_db(_save_signal, sink, coin, name, signal)
+            logger.debug("Saved %s signal", label)
+            return True
+        except Exception:
+            logger.exception("Failed to save %s signal", label)
+            return False
+
+    logger.info("Persisting signals...")
+    writes = [_persist("save.forecast", "ForecastStrategy", model, decision)]
+    writes += [
+        _persist(f"save.{type(strategy).__name__}", type(strategy).__name__, type(strategy).__name__, decision_confirm)
+        for strategy, decision_confirm in result.confirmations
+        if decision_confirm is not None  # skipped and not recorded
+    ]
+    combined_name = "+".join([model, *(type(s).__name__ for s in pipeline.confirmations)])
+    writes.append(_persist("save.combined", "combined", combined_name, final_decision))
+    saved = all(await asyncio.gather(*writes))
 
     # ----------------------------
     # Notify (Telegram)
     # ----------------------------
     if _safe_action(final_decision) in ("BUY", "SHORT") and final_decision.get("source") == "Confirmed":
-        logger.info("Sending Telegram signal...")
-        try:
-            await send_strategy_signal_via_telegram(final_decision, coin, confirmations=[rsi_strategy])
-            logger.info("Telegram sent successfully")
-            await asyncio.sleep(2)  # gentle rate limit
-        except Exception:
-            logger.exception("Failed to send Telegram signal")
+        if outbox is not None:
+            # Hand off to the background sender; strategy latency never waits on Telegram.
+            with metrics.span("telegram_enqueue", rows=1):
+                queue_strategy_signal(outbox, final_decision, coin, confirmations=pipeline.confirmations)
+            logger.info("Telegram signal queued | pending=%s", outbox.pending())
+        else:
+            logger.warning("No Telegram outbox; confirmed %s signal not sent | coin=%s", _safe_action(final_decision), coin)
     else:
         logger.info("No Telegram notification (not confirmed BUY/SHORT).")
 
+    # Memoize only once every signal is stored; otherwise the next run must write them again.
+    if key is not None and saved:
+        if sink is not None:
+            sink.after_flush(lambda: run_memo.put(memo_slot, key, final_decision))
+        else:
+            await run_db(run_memo.put, memo_slot, key, final_decision)  # may upsert strategy_run_memo
+    elif key is not None:
+        logger.warning("Not memoizing run with unsaved signals | coin=%s interval=%s", coin, interval)
+
     logger.info("Run finished | coin=%s interval=%s", coin, interval)
+    return final_decision
+
+
+async def run_matrix(
+    symbols: List[str],
+    intervals: List[str],
+    models: List[str],
+    since_days: int = 21,
+    concurrency: int = 8,
+    sink: Optional[SignalSink] = None,
+    outbox: Optional[TelegramOutbox] = None,
+    record_skipped: bool = RECORD_SKIPPED_SIGNALS,
+) -> Dict[str, Any]:
+    """
+    Run `run_for_coin` for every symbol x interval x model with at most
+    `concurrency` runs in flight, sharing the data loading between them:
+
+    - one query for all prediction packages, one vectorized ForecastStrategy pass;
+    - klines are loaded once per (symbol, interval), all pairs concurrently on the
+      DB thread pool, and only for pairs where some model's forecast is BUY/SHORT
+      (the rest never need them);
+    - signals of every combination go through the same sink and are flushed together.
+
+    Errors are isolated per combination and reported in the returned summary,
+    keyed "SYMBOL/interval/model".
+    """
+    sem = asyncio.Semaphore(max(1, int(concurrency)))
+    keys = [(sym, iv, model) for sym in symbols for iv in intervals for model in models]
+    results: Dict[str, Dict[str, Any]] = {}
+
+    batch_metrics = RunMetrics(intervals=list(intervals), models=list(models), symbols=len(symbols))
+
+    # One set-based query for every combination's latest prediction package.
+    try:
+        with batch_metrics.span("prediction_fetch_bulk") as span:
+            predictions = await run_db(fetch_latest_predictions_bulk, keys)
+            span.rows = len(predictions)
+    except Exception:
+        logger.exception("Bulk prediction fetch failed; falling back to per-symbol fetches")
+        predictions = {}
+
+    try:
+        with batch_metrics.span("evaluate_batch.ForecastStrategy", rows=len(predictions)):
+            forecast_decisions = _batch_forecast_decisions(predictions)
+    except Exception:
+        logger.exception("Batch ForecastStrategy evaluation failed; falling back to per-symbol evaluation")
+        forecast_decisions = {}
+
+    end = datetime.utcnow()
+    start = end - timedelta(days=since_days)
+    klines = SharedKlines(start.isoformat(), end.isoformat())
+    needed = list(dict.fromkeys(
+        (sym, iv) for (sym, iv, _), d in forecast_decisions.items() if _safe_action(d) in ("BUY", "SHORT")
+    ))
+    if needed:
+        with batch_metrics.span("kline_prefetch") as span:
+            frames = await asyncio.gather(*(run_db(klines.get, sym, iv) for sym, iv in needed), return_exceptions=True)
+            span.rows = sum(not isinstance(f, BaseException) for f in frames)
+        failed_pairs = [pair for pair, f in zip(needed, frames) if isinstance(f, BaseException)]
+        if failed_pairs:
+            # The runs that need these pairs try again on their own.
+            logger.warning("Kline prefetch failed | pairs=%s error=%s", failed_pairs,
+                           next(f for f in frames if isinstance(f, BaseException)))
+
+    async def _one(sym: str, iv: str, model: str) -> None:
+        label = f"{sym}/{iv}/{model}"
+        async with sem:
+            t0 = time.perf_counter()
+            try:
+                await run_for_coin(
+                    sym,
+                    iv,
+                    since_days=since_days,
+                    sink=sink,
+                    prediction=predictions.get((sym, iv, model)),
+                    forecast_decision=forecast_decisions.get((sym, iv, model)),
+                    outbox=outbox,
+                    model_name=model,
+                    record_skipped=record_skipped,
+                    klines=klines,
+                )
+                results[label] = {"ok": True, "seconds": round(time.perf_counter() - t0, 3)}
+            except Exception as e:
+                logger.exception("Run failed | coin=%s interval=%s model=%s", sym, iv, model)
+                results[label] = {
+                    "ok": False,
+                    "seconds": round(time.perf_counter() - t0, 3),
+                    "error": f"{type(e).__name__}: {e}",
+                }
+
+    t_start = time.perf_counter()
+    await asyncio.gather(*(_one(*key) for key in keys))
+    if sink is not None:
+        try:
+            await run_db(sink.flush)  # persist every combination's decisions together
+        except Exception:
+            logger.exception("Signal flush failed; signals stay pending in the sink")
+    elapsed = time.perf_counter() - t_start
+
+    labels = [f"{sym}/{iv}/{model}" for sym, iv, model in keys]
+    failed = [label for label in labels if not results.get(label, {}).get("ok")]
+    summary = {
+        "intervals": list(intervals),
+        "models": list(models),
+        "total": len(keys),
+        "succeeded": len(keys) - len(failed),
+        "failed": len(failed),
+        "failed_runs": failed,
+        "kline_loads": klines.loads,
+        "seconds": round(elapsed, 3),
+        "stages": batch_metrics.summary()["spans"],
+        "results": results,
+    }
+
+    logger.info(
+        "Batch finished | symbols=%s intervals=%s models=%s total=%s succeeded=%s failed=%s "
+        "kline_loads=%s seconds=%.2f",
+        len(symbols), ",".join(intervals), ",".join(models), summary["total"], summary["succeeded"],
+        summary["failed"], klines.loads, elapsed,
+    )
+    for label in failed:
+        logger.warning("Batch failure | run=%s error=%s", label, results[label].get("error"))
+
+    return summary
+
+
+async def run_batch(
+    symbols: List[str],
+    interval: str,
+    since_days: int = 21,
+    concurrency: int = 8,
+    sink: Optional[SignalSink] = None,
+    outbox: Optional[TelegramOutbox] = None,
+    record_skipped: bool = RECORD_SKIPPED_SIGNALS,
+    models: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    `run_matrix` for one interval. With a single model, results and
+    failed_symbols are keyed by symbol as before.
+    """
+    models = list(models or [DEFAULT_MODEL])
+    summary = await run_matrix(
+        symbols, [interval], models,
+        since_days=since_days, concurrency=concurrency, sink=sink, outbox=outbox, record_skipped=record_skipped,
+    )
+    summary["interval"] = interval
+    if len(models) == 1:
+        summary["results"] = {label.split("/", 1)[0]: r for label, r in summary["results"].items()}
+        summary["failed_symbols"] = [label.split("/", 1)[0] for label in summary["failed_runs"]]
+    return summary
 
 
 async def main() -> None:
     parser = argparse.ArgumentParser(description="Run strategies and emit signals.")
-    parser.add_argument("--symbol", required=True, help="Single symbol, e.g. BTCUSDT")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--symbol", help="Single symbol, e.g. BTCUSDT")
+    target.add_argument("--symbols", help="Batch mode: comma separated symbols, e.g. BTCUSDT,ETHUSDT")
+    target.add_argument("--symbols-file", help="Batch mode: file with one symbol per line")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max symbols in flight in batch mode (default: 8)")
+    parser.add_argument("--signal-batch-size", type=int, default=500,
+                        help="Rows per bulk INSERT into strategy_signals (default: 500)")
     parser.add_argument("--since-days", type=int, default=21, help="History window in days (default: 21)")
-    parser.add_argument("--interval", type=str, default="1h", help="Kline interval (default: 1h)")
+    parser.add_argument("--interval", type=str, default="1h",
+                        help="Kline interval, or several comma separated, e.g. 1h,4h,1d (default: 1h)")
+    parser.add_argument("--models", type=str, default=DEFAULT_MODEL,
+                        help=f"Comma separated prediction models, e.g. GRU,LSTM (default: {DEFAULT_MODEL})")
     parser.add_argument("--log-level", type=str, default="INFO", help="DEBUG, INFO, WARNING, ERROR")
     parser.add_argument("--log-file", type=str, default=None, help="Optional log file path (rotating)")
+    parser.add_argument("--no-record-skipped", dest="record_skipped", action="store_false",
+                        default=RECORD_SKIPPED_SIGNALS,
+                        help="Do not write signal rows for confirmations skipped after a forecast HOLD "
+                             "(env RECORD_SKIPPED_SIGNALS=0)")
+    parser.add_argument("--metrics-file", type=str, default=os.getenv("METRICS_TEXTFILE"),
+                        help="Write Prometheus metrics here on exit (node_exporter textfile format)")
+    parser.add_argument("--metrics-json", type=str, default=None,
+                        help="Append one JSON timing summary per run to this file (env RUN_METRICS_JSON)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print per-module import times (including lazy imports) on exit")
     args = parser.parse_args()
 
     setup_logging(args.log_level, args.log_file)
+    if args.metrics_json:
+        os.environ["RUN_METRICS_JSON"] = args.metrics_json
+    if args.metrics_file:
+        atexit.register(_write_metrics_file, args.metrics_file)
+
+    logger.info("CLI args | symbol=%s symbols=%s symbols_file=%s concurrency=%s interval=%s models=%s "
+                "since_days=%s log_level=%s log_file=%s",
+                args.symbol, args.symbols, args.symbols_file, args.concurrency, args.interval, args.models,
+                args.since_days, args.log_level, args.log_file)
+
+    intervals = [iv.strip() for iv in args.interval.split(",") if iv.strip()]
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    if not intervals or not models:
+        parser.error("--interval and --models need at least one value")
+
+    # Signals are buffered and written in bulk; the sink flushes on exit (incl. SIGTERM).
+    # Telegram messages go through the outbox, which drains (or persists) on exit.
+    with SignalSink(batch_size=args.signal_batch_size) as sink:
+        async with TelegramOutbox.from_env(bot, chat_id) as outbox:
+            if args.symbol and len(intervals) == 1 and len(models) == 1:
+                try:
+                    await run_for_coin(args.symbol, intervals[0], since_days=args.since_days, sink=sink, outbox=outbox,
+                                       model_name=models[0], record_skipped=args.record_skipped)
+                except Exception as e:
+                    logger.exception("Fatal error processing %s: %s", args.symbol, e)
+                    raise  # keep non-zero exit code
+                return
+
+            symbols = [args.symbol] if args.symbol else load_symbols(args.symbols, args.symbols_file)
+            if not symbols:
+                parser.error("no symbols given")
+
+            # Every symbol x interval x model in one pass with shared prediction/kline loading.
+            summary = await run_matrix(
+                symbols,
+                intervals,
+                models,
+                since_days=args.since_days,
+                concurrency=args.concurrency,
+                sink=sink,
+                outbox=outbox,
+                record_skipped=args.record_skipped,
+            )
+
+    if summary["failed"]:
+        raise SystemExit(1)  # keep non-zero exit code when any run failed
+
+
+def _write_metrics_file(path: str) -> None:
+    try:
+        REGISTRY.write_textfile(path)
+    except OSError:
+        logger.exception("Could not write metrics to %s", path)
+
+
+def _raise_system_exit(signum, frame) -> None:
+    raise SystemExit(128 + signum)
 
-    logger.info("CLI args | symbol=%s interval=%s since_days=%s log_level=%s log_file=%s",
-                args.symbol, args.interval, args.since_days, args.log_level, args.log_file)
 
+async def _main_and_close() -> None:
+    # Turn SIGTERM (pod shutdown) into SystemExit so buffered signals get flushed.
+    signal.signal(signal.SIGTERM, _raise_system_exit)
     try:
-        await run_for_coin(args.symbol, args.interval, since_days=args.since_days)
-    except Exception as e:
-        logger.exception("Fatal error processing %s: %s", args.symbol, e)
-        raise  # keep non-zero exit code
+        await main()
+    finally:
+        close_pool()
+        if "--profile-startup" in sys.argv:
+            import_timer.uninstall()
+            print(import_timer.report(), file=sys.stderr)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    asyncio.run(_main_and_close())
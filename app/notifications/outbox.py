@@ -0,0 +1,411 @@
+# app/notifications/outbox.py
+"""
+Non-blocking Telegram outbox.
+
+Strategy code calls `enqueue()` and moves on; a background task drains the
+queue under a token-bucket rate limit, coalesces bursts into digest messages
+and retries transient failures with exponential backoff.
+
+With a persist path every message is journaled on enqueue: appended to this
+outbox's `<path>.<pid>-<n>.journal` and dropped from it (the journal is rewritten
+with what is left) once delivered. A crash or SIGKILL therefore loses nothing;
+on a clean close whatever is still undelivered moves to the shared `<path>`
+spool. `start()` re-queues the spool plus journals left behind by processes
+that are gone.
+
+Works with any bot exposing `async send_message(chat_id=..., text=..., parse_mode=...)`,
+so tests can pass a local fake instead of telegram.Bot.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import glob
+import itertools
+import json
+import logging
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.utils.metrics import REGISTRY
+
+
+logger = logging.getLogger("strategies.notifications")
+
+# Telegram rejects messages above 4096 characters.
+MAX_MESSAGE_CHARS = 4096
+
+# Journals owned by outboxes alive in this process; never claimed by start().
+_ACTIVE_JOURNALS: set = set()
+
+# _send_with_retry outcomes.
+_SENT, _REJECTED, _FAILED = "sent", "rejected", "failed"
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, at most `capacity` banked."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until one token is available (0 if available now)."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    async def acquire(self) -> None:
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                self.tokens -= 1
+                return
+            await asyncio.sleep(wait)
+
+
+def _retry_after_seconds(exc: BaseException) -> Optional[float]:
+    retry_after = getattr(exc, "retry_after", None)
+    if retry_after is None:
+        return None
+    total = getattr(retry_after, "total_seconds", None)
+    return float(total()) if callable(total) else float(retry_after)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    try:
+        from telegram.error import BadRequest, Forbidden, InvalidToken
+    except ImportError:  # fake bots in tests
+        return True
+    return not isinstance(exc, (BadRequest, Forbidden, InvalidToken))
+
+
+class TelegramOutbox:
+    def __init__(
+        self,
+        bot: Any,
+        chat_id: Any,
+        rate_per_sec: float = 20 / 60,
+        burst: int = 3,
+        digest_threshold: int = 4,
+        digest_window: float = 1.0,
+        max_retries: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        max_queue: int = 1000,
+        persist_path: Optional[str] = None,
+        parse_mode: str = "Markdown",
+    ):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self.digest_threshold = max(2, int(digest_threshold))
+        self.digest_window = float(digest_window)
+        self.max_retries = int(max_retries)
+        self.base_backoff = float(base_backoff)
+        self.max_backoff = float(max_backoff)
+        self.persist_path = persist_path
+        self.parse_mode = parse_mode
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, int(max_queue)))
+        self._task: Optional[asyncio.Task] = None
+        # Every message not delivered yet (queued, in flight, or parked when the
+        # queue was full / retries ran out), by id; mirrored by the journal.
+        self._live: Dict[int, Dict[str, Any]] = {}
+        self._ids = itertools.count()
+        self._journal = f"{persist_path}.{os.getpid()}-{time.time_ns()}.journal" if persist_path else None
+        if self._journal:
+            _ACTIVE_JOURNALS.add(self._journal)
+        self.sent = 0
+        self.failed = 0
+
+    @classmethod
+    def from_env(cls, bot: Any, chat_id: Any) -> "TelegramOutbox":
+        return cls(
+            bot,
+            chat_id,
+            rate_per_sec=float(os.getenv("TELEGRAM_RATE_PER_MIN", "20")) / 60,
+            burst=int(os.getenv("TELEGRAM_BURST", "3")),
+            digest_threshold=int(os.getenv("TELEGRAM_DIGEST_THRESHOLD", "4")),
+            persist_path=os.getenv("TELEGRAM_OUTBOX_PATH") or None,
+        )
+
+    # ----------------------------
+    # Producer side
+    # ----------------------------
+    def enqueue(self, text: str, key: Optional[str] = None) -> bool:
+        """
+        Queue a message without waiting. Returns False if the queue is full; the
+        message is still kept (journaled) and persisted for the next start.
+        """
+        item = {"id": next(self._ids), "text": text, "key": key, "queued_at": time.time()}
+        self._live[item["id"]] = item
+        self._journal_append(item)
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            logger.warning("Telegram outbox full; persisting message for later delivery | key=%s", key)
+            return False
+
+    def pending(self) -> int:
+        return len(self._live)
+
+    # ----------------------------
+    # Lifecycle
+    # ----------------------------
+    async def start(self) -> None:
+        items, claimed = self._load_persisted()
+        for item in items:
+            self.enqueue(item["text"], item.get("key"))
+        # Only forget the claimed files once their messages are in our journal.
+        for path in claimed:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="telegram-outbox")
+
+    async def close(self, timeout: float = 30.0) -> None:
+        """Drain the queue (up to `timeout` seconds), then persist whatever is left."""
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Telegram outbox drain timed out; %s messages left", self._queue.qsize())
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        self._persist()
+        _ACTIVE_JOURNALS.discard(self._journal)
+
+    async def __aenter__(self) -> "TelegramOutbox":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    # ----------------------------
+    # Consumer side
+    # ----------------------------
+    async def _collect_burst(self, batch: List[Dict[str, Any]]) -> None:
+        # Appends in place so a cancelled collect never loses what it already took.
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.digest_window
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                return
+
+    def _coalesce(self, batch: List[Dict[str, Any]]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+        """(text to send, queued items it delivers) pairs."""
+        if len(batch) < self.digest_threshold:
+            return [(item["text"], [item]) for item in batch]
+
+        # Digest: pack as many messages as fit under Telegram's size limit.
+        out: List[Tuple[str, List[Dict[str, Any]]]] = []
+        chunk: List[Dict[str, Any]] = []
+        sep = "\n\n———\n\n"
+        for item in batch:
+            candidate = sep.join([c["text"] for c in chunk] + [item["text"]])
+            if chunk and len(candidate) + 40 > MAX_MESSAGE_CHARS:
+                out.append((self._digest([c["text"] for c in chunk]), chunk))
+                chunk = []
+            chunk.append(item)
+        if chunk:
+            out.append((self._digest([c["text"] for c in chunk]), chunk))
+        return out
+
+    @staticmethod
+    def _digest(texts: List[str]) -> str:
+        if len(texts) == 1:
+            return texts[0]
+        return f"🗞 *{len(texts)} signals*\n\n" + "\n\n———\n\n".join(texts)
+
+    async def _send_with_retry(self, text: str, parse_mode: Optional[str] = None) -> str:
+        """_SENT, _REJECTED (not retryable, e.g. bad markup) or _FAILED (retries ran out)."""
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            t0 = time.perf_counter()
+            try:
+                await self.bot.send_message(chat_id=self.chat_id, text=text, parse_mode=parse_mode)
+                REGISTRY.observe_stage("telegram_send", time.perf_counter() - t0, 1)
+                self.sent += 1
+                return _SENT
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                REGISTRY.observe_stage("telegram_send", time.perf_counter() - t0, ok=False)
+                if not _is_retryable(e):
+                    logger.warning("Telegram rejected message (not retrying): %s", e)
+                    return _REJECTED
+                if attempt >= self.max_retries:
+                    break
+                wait = _retry_after_seconds(e)
+                if wait is None:
+                    wait = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+                    wait *= 1 + random.random() * 0.2  # jitter
+                logger.warning("Telegram send failed (attempt %s/%s): %s; retrying in %.1fs",
+                               attempt + 1, self.max_retries + 1, e, wait)
+                await asyncio.sleep(wait)
+
+        self.failed += 1
+        return _FAILED
+
+    async def _deliver(self, text: str, items: List[Dict[str, Any]]) -> None:
+        """
+        Send `text` (delivering `items`). A rejected digest is split back into its
+        messages so one bad message doesn't drop the rest; a rejected message is
+        retried once without markup before it is dropped. Messages that ran out
+        of retries stay live: persisted on close, retried after a restart.
+        """
+        outcome = await self._send_with_retry(text, self.parse_mode)
+        if outcome == _REJECTED and len(items) > 1:
+            logger.warning("Telegram rejected a %s-message digest; sending them one by one", len(items))
+            for item in items:
+                await self._deliver(item["text"], [item])
+            return
+        if outcome == _REJECTED and self.parse_mode:
+            outcome = await self._send_with_retry(text, None)
+        if outcome == _REJECTED:
+            logger.error("Telegram rejected message without markup too; dropping it")
+            self.failed += 1
+        if outcome == _FAILED:
+            logger.error("Telegram message undeliverable after retries; persisting")
+            return
+        self._delivered(items)  # sent, or dropped: retrying can't help
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                await self._collect_burst(batch)
+                for text, items in self._coalesce(batch):
+                    await self._deliver(text, items)
+            finally:
+                # Cancelled mid-batch: anything not sent is still live and gets persisted.
+                for _ in batch:
+                    self._queue.task_done()
+
+    # ----------------------------
+    # Persistence
+    # ----------------------------
+    @staticmethod
+    def _line(item: Dict[str, Any]) -> str:
+        return json.dumps({"text": item["text"], "key": item.get("key"), "queued_at": item["queued_at"]}) + "\n"
+
+    def _journal_append(self, item: Dict[str, Any]) -> None:
+        if not self._journal:
+            return
+        try:
+            with open(self._journal, "a", encoding="utf-8") as fh:
+                fh.write(self._line(item))
+        except OSError:
+            logger.exception("Could not journal Telegram message to %s", self._journal)
+
+    def _delivered(self, items: List[Dict[str, Any]]) -> None:
+        for item in items:
+            self._live.pop(item["id"], None)
+        if not self._journal:
+            return
+        # Compact: the journal only ever holds what is still undelivered.
+        try:
+            if not self._live:
+                if os.path.exists(self._journal):
+                    os.remove(self._journal)
+                return
+            tmp = f"{self._journal}.tmp"
+            with open(tmp, "w", encoding="utf-8") as fh:
+                fh.writelines(self._line(item) for item in self._live.values())
+            os.replace(tmp, self._journal)
+        except OSError:
+            logger.exception("Could not compact Telegram journal %s", self._journal)
+
+    def _persist(self) -> None:
+        if not self._live:
+            return
+        if not self.persist_path:
+            logger.error("Dropping %s undelivered Telegram messages (TELEGRAM_OUTBOX_PATH not set)", len(self._live))
+            self._live.clear()
+            return
+        try:
+            with open(self.persist_path, "a", encoding="utf-8") as fh:
+                fh.writelines(self._line(item) for item in self._live.values())
+            logger.info("Persisted %s undelivered Telegram messages to %s", len(self._live), self.persist_path)
+            self._live.clear()
+            if os.path.exists(self._journal):
+                os.remove(self._journal)
+        except OSError:
+            logger.exception("Could not persist undelivered Telegram messages")
+
+    def _orphaned_journals(self) -> List[str]:
+        """Journals of outboxes that are gone (same pid but not active here: a previous life of this process)."""
+        out = []
+        for path in glob.glob(f"{glob.escape(self.persist_path)}.*-*.journal"):
+            pid = path[len(self.persist_path) + 1:-len(".journal")].split("-", 1)[0]
+            if not pid.isdigit() or path in _ACTIVE_JOURNALS:
+                continue
+            if int(pid) != os.getpid():
+                try:
+                    os.kill(int(pid), 0)
+                    continue  # still running
+                except ProcessLookupError:
+                    pass
+                except OSError:
+                    continue  # exists, not ours to signal
+            out.append(path)
+        return out
+
+    def _load_persisted(self) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Messages from the spool and orphaned journals, plus the claimed files to remove once re-queued."""
+        if not self.persist_path:
+            return [], []
+        items: List[Dict[str, Any]] = []
+        claimed_paths: List[str] = []
+        for path in [self.persist_path, *self._orphaned_journals()]:
+            claimed = f"{path}.claimed-{os.getpid()}"
+            try:
+                os.replace(path, claimed)  # claim the file so concurrent starts don't double-send
+            except OSError:
+                continue
+            claimed_paths.append(claimed)
+            try:
+                with open(claimed, "r", encoding="utf-8") as fh:
+                    for line in fh:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            items.append(json.loads(line))
+                        except ValueError:
+                            # e.g. the last line of a journal cut short by a kill
+                            logger.warning("Skipping unreadable persisted Telegram message in %s", claimed)
+            except OSError:
+                logger.exception("Could not load persisted Telegram messages from %s", claimed)
+        if items:
+            logger.info("Re-queued %s persisted Telegram messages", len(items))
+        return items, claimed_paths
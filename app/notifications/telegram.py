@@ -1,12 +1,46 @@
-from telegram import Bot
 from app.strategies.base import BaseStrategy
+from app.utils.startup import load_env
 import os
-from dotenv import load_dotenv
+import threading
 
-load_dotenv(".env")
+# python-telegram-bot (and its httpx stack) is only imported, and the Bot only
+# built, when the first message is actually sent.
+_bot = None
+_bot_lock = threading.Lock()
+
+
+def get_bot():
+    global _bot
+    if _bot is None:
+        with _bot_lock:
+            if _bot is None:
+                from telegram import Bot
+
+                load_env()
+                _bot = Bot(token=os.getenv("TELEGRAM_BOT_TOKEN"))
+    return _bot
+
+
+def get_chat_id():
+    load_env()
+    return os.getenv("TELEGRAM_CHANNEL_ID")
+
+
+class _LazyBot:
+    """Stand-in for the module-level `bot`: builds the real Bot on first use."""
+
+    def __getattr__(self, name):
+        return getattr(get_bot(), name)
+
+
+bot = _LazyBot()
+
+
+def __getattr__(name):
+    if name == "chat_id":
+        return get_chat_id()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-bot = Bot(token=os.getenv("TELEGRAM_BOT_TOKEN"))
-chat_id = os.getenv("TELEGRAM_CHANNEL_ID")
 
 def format_message(coin: str, signal: dict, confirmations: list[BaseStrategy]) -> str:
     action = signal.get("action", "HOLD")
@@ -33,4 +67,11 @@ async def send_strategy_signal_via_telegram(signal: dict, coin: str, confirmatio
         return
 
     message = format_message(coin, signal, confirmations)
-    await bot.send_message(chat_id=chat_id, text=message, parse_mode="Markdown")
+    await get_bot().send_message(chat_id=get_chat_id(), text=message, parse_mode="Markdown")
+
+def queue_strategy_signal(outbox, signal: dict, coin: str, confirmations: list[BaseStrategy]) -> bool:
+    """Non-blocking variant: hand the message to a TelegramOutbox instead of sending inline."""
+    if signal.get("action") not in ["BUY", "SHORT"]:
+        return False
+
+    return outbox.enqueue(format_message(coin, signal, confirmations), key=coin)
@@ -0,0 +1,73 @@
+-- Forecast accuracy rollups (python -m app.analytics).
+--
+-- Rollups hold sums, not averages, so each batch of newly realized prediction
+-- runs is added with an upsert; forecast_accuracy_runs records the runs that
+-- are already counted (written in the same transaction as their sums), and
+-- forecast_accuracy_state is where the next update starts scanning.
+-- Safe to re-run.
+
+CREATE TABLE IF NOT EXISTS forecast_accuracy_runs (
+    prediction_id UUID PRIMARY KEY,
+    coin TEXT NOT NULL,
+    "interval" TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    created_at TIMESTAMP,
+    points INT NOT NULL,          -- forecast points with a realized close
+    processed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Per horizon step (1 = first forecast point after the last historical one).
+CREATE TABLE IF NOT EXISTS forecast_accuracy_steps (
+    coin TEXT NOT NULL,
+    "interval" TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    step INT NOT NULL,
+    points BIGINT NOT NULL,
+    direction_hits BIGINT NOT NULL,   -- sign(forecast - entry) = sign(realized - entry)
+    abs_err_sum DOUBLE PRECISION NOT NULL,
+    abs_pct_err_sum DOUBLE PRECISION NOT NULL,
+    sq_err_sum DOUBLE PRECISION NOT NULL,
+    err_sum DOUBLE PRECISION NOT NULL,  -- forecast - realized (bias)
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (coin, "interval", model_name, step)
+);
+
+-- Per run, bucketed by the ForecastStrategy signal the forecast produced:
+--   up_votes / down_votes  votes in the vote window   hit: realized end above / below entry
+--   path_buy / path_short  forecast path clears stop  hit: realized path clears stop
+--   action                 BUY / SHORT / HOLD         hit: realized move agrees
+CREATE TABLE IF NOT EXISTS forecast_signal_calibration (
+    coin TEXT NOT NULL,
+    "interval" TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    signal TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    runs BIGINT NOT NULL,
+    hits BIGINT NOT NULL,
+    return_sum DOUBLE PRECISION NOT NULL,  -- realized end / entry - 1
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (coin, "interval", model_name, signal, bucket)
+);
+
+-- Single row: the (created_at, prediction_id) keyset position just before the
+-- oldest run that is not counted yet. Everything up to it is counted, so
+-- updates start here instead of at the first prediction run.
+CREATE TABLE IF NOT EXISTS forecast_accuracy_state (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    after_created_at TIMESTAMP NOT NULL,
+    after_prediction_id UUID NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE VIEW forecast_accuracy AS
+SELECT coin, "interval", model_name, step, points,
+       direction_hits::float8 / NULLIF(points, 0) AS hit_rate,
+       abs_err_sum / NULLIF(points, 0) AS mae,
+       abs_pct_err_sum / NULLIF(points, 0) AS mape,
+       sqrt(sq_err_sum / NULLIF(points, 0)) AS rmse,
+       err_sum / NULLIF(points, 0) AS bias
+FROM forecast_accuracy_steps;
+
+-- Pending-run lookup and per-run point reads.
+CREATE INDEX IF NOT EXISTS prediction_runs_created_at ON prediction_runs (created_at, prediction_id);
+CREATE INDEX IF NOT EXISTS prediction_points_prediction_time ON prediction_points (prediction_id, point_time);
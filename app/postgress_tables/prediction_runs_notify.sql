@@ -0,0 +1,27 @@
+-- Event-driven strategy runs: NOTIFY listeners (python -m app.listener)
+-- whenever a prediction run is inserted.
+--
+-- NOTIFY is only delivered when the inserting transaction commits, so writers
+-- should insert the prediction_runs row and its prediction_points together in
+-- one transaction; the listener's debounce window covers writers that don't.
+
+CREATE OR REPLACE FUNCTION notify_prediction_run() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'prediction_runs',
+        json_build_object(
+            'prediction_id', NEW.prediction_id,
+            'coin', NEW.coin,
+            'interval', NEW."interval",
+            'model_name', NEW.model_name
+        )::text
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS prediction_runs_notify ON prediction_runs;
+
+CREATE TRIGGER prediction_runs_notify
+    AFTER INSERT ON prediction_runs
+    FOR EACH ROW EXECUTE FUNCTION notify_prediction_run();
@@ -0,0 +1,128 @@
+-- strategy_signals with typed columns and monthly partitions on created_at.
+--
+-- Safe to run on a fresh database and on one with the original
+-- (id, coin, model_name, created_at, signal) table, and safe to re-run:
+--   * an unpartitioned strategy_signals is renamed to strategy_signals_legacy
+--     and copied into the new table (drop the legacy table once verified);
+--   * action / entry / stop_loss / take_profit / rsi / source are generated
+--     from the JSONB, so writers (save_strategy_signal, SignalSink) keep
+--     inserting (id, coin, model_name, signal) unchanged;
+--   * rows outside the existing partitions land in strategy_signals_default;
+--     ensure_strategy_signal_partitions() creates the upcoming months (the
+--     daemon calls it daily; one-shot deployments should cron it) and moves
+--     any default-partition rows into the new partition.
+--
+-- The rename and backfill run in one transaction and hold an exclusive lock
+-- on the old table: run it while no strategy runs are in flight.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION ensure_strategy_signal_partitions(
+    from_month DATE DEFAULT NOW()::date,
+    months_ahead INT DEFAULT 3
+) RETURNS INT AS $$
+DECLARE
+    month_start TIMESTAMP := date_trunc('month', from_month);
+    last_month TIMESTAMP := date_trunc('month', NOW()) + make_interval(months => months_ahead);
+    part TEXT;
+    created INT := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        part := format('strategy_signals_%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(part) IS NULL THEN
+            IF EXISTS (
+                SELECT 1 FROM strategy_signals_default
+                WHERE created_at >= month_start AND created_at < month_start + INTERVAL '1 month'
+            ) THEN
+                -- The default partition already holds rows for this month: move them before attaching.
+                EXECUTE format('CREATE TABLE %I (LIKE strategy_signals INCLUDING DEFAULTS INCLUDING GENERATED)', part);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM strategy_signals_default
+                                     WHERE created_at >= %L AND created_at < %L
+                                     RETURNING id, coin, model_name, created_at, signal)
+                     INSERT INTO %I (id, coin, model_name, created_at, signal) SELECT * FROM moved',
+                    month_start, month_start + INTERVAL '1 month', part
+                );
+                EXECUTE format(
+                    'ALTER TABLE strategy_signals ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    part, month_start, month_start + INTERVAL '1 month'
+                );
+            ELSE
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF strategy_signals FOR VALUES FROM (%L) TO (%L)',
+                    part, month_start, month_start + INTERVAL '1 month'
+                );
+            END IF;
+            created := created + 1;
+        END IF;
+        month_start := month_start + INTERVAL '1 month';
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF to_regclass('strategy_signals') IS NOT NULL
+       AND NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'strategy_signals'::regclass) THEN
+        ALTER TABLE strategy_signals RENAME TO strategy_signals_legacy;
+        ALTER INDEX IF EXISTS strategy_signals_pkey RENAME TO strategy_signals_legacy_pkey;
+    END IF;
+END $$;
+
+CREATE TABLE IF NOT EXISTS strategy_signals (
+    id UUID NOT NULL,
+    coin TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    signal JSONB,  -- full decision as written by the strategies
+    action TEXT GENERATED ALWAYS AS (signal->>'action') STORED,
+    entry DOUBLE PRECISION GENERATED ALWAYS AS (
+        CASE WHEN jsonb_typeof(signal->'entry') = 'number' THEN (signal->>'entry')::float8 END
+    ) STORED,
+    stop_loss DOUBLE PRECISION GENERATED ALWAYS AS (
+        CASE WHEN jsonb_typeof(signal->'stop_loss') = 'number' THEN (signal->>'stop_loss')::float8 END
+    ) STORED,
+    take_profit DOUBLE PRECISION GENERATED ALWAYS AS (
+        CASE WHEN jsonb_typeof(signal->'take_profit') = 'number' THEN (signal->>'take_profit')::float8 END
+    ) STORED,
+    rsi DOUBLE PRECISION GENERATED ALWAYS AS (
+        CASE WHEN jsonb_typeof(signal->'rsi') = 'number' THEN (signal->>'rsi')::float8 END
+    ) STORED,
+    source TEXT GENERATED ALWAYS AS (signal->>'source') STORED,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE IF NOT EXISTS strategy_signals_default PARTITION OF strategy_signals DEFAULT;
+
+-- "Latest signal(s) per coin/model": index-only scans, no JSON parsing.
+CREATE INDEX IF NOT EXISTS strategy_signals_coin_model_time
+    ON strategy_signals (coin, model_name, created_at DESC)
+    INCLUDE (action, entry, stop_loss, take_profit, rsi, source);
+
+-- "All BUY/SHORT signals in the last day": only actionable rows are indexed.
+CREATE INDEX IF NOT EXISTS strategy_signals_actionable_time
+    ON strategy_signals (created_at DESC)
+    INCLUDE (coin, model_name, action, entry, stop_loss, take_profit, rsi)
+    WHERE action IN ('BUY', 'SHORT');
+
+DO $$
+DECLARE
+    first_month DATE := NOW()::date;
+BEGIN
+    IF to_regclass('strategy_signals_legacy') IS NOT NULL THEN
+        SELECT COALESCE(min(created_at)::date, first_month) INTO first_month FROM strategy_signals_legacy;
+    END IF;
+    PERFORM ensure_strategy_signal_partitions(first_month, 3);
+
+    IF to_regclass('strategy_signals_legacy') IS NOT NULL THEN
+        INSERT INTO strategy_signals (id, coin, model_name, created_at, signal)
+        SELECT l.id, l.coin, l.model_name, COALESCE(l.created_at, 'epoch'::timestamp), l.signal
+        FROM strategy_signals_legacy l
+        WHERE NOT EXISTS (SELECT 1 FROM strategy_signals s WHERE s.id = l.id);
+    END IF;
+END $$;
+
+COMMIT;
+
+ANALYZE strategy_signals;
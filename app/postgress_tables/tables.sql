@@ -1,7 +1,30 @@
-CREATE TABLE strategy_signals (
-    id UUID PRIMARY KEY,
+-- strategy_signals (typed columns, monthly partitions on created_at) is created
+-- and migrated by strategy_signals_partitioned.sql.
+-- Last run outcome per (coin, interval, model); see app/strategies/memo.py (RUN_MEMO=postgres).
+CREATE TABLE strategy_run_memo (
     coin TEXT NOT NULL,
+    "interval" TEXT NOT NULL,
     model_name TEXT NOT NULL,
-    created_at TIMESTAMP DEFAULT NOW(),
-    signal JSONB  -- contains action, entry, stop_loss, take_profit
-);
\ No newline at end of file
+    memo_key TEXT NOT NULL,
+    decision JSONB NOT NULL,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (coin, "interval", model_name)
+);
+-- Resolution of each tracked BUY/SHORT signal; see app/tracker.py. A signal
+-- with a row here is closed; the rest are loaded as open on start.
+CREATE TABLE strategy_signal_outcomes (
+    signal_id UUID PRIMARY KEY,  -- strategy_signals.id
+    coin TEXT NOT NULL,
+    model_name TEXT NOT NULL,
+    signal_created_at TIMESTAMP NOT NULL,
+    action TEXT NOT NULL,
+    entry DOUBLE PRECISION NOT NULL,
+    stop_loss DOUBLE PRECISION NOT NULL,
+    take_profit DOUBLE PRECISION NOT NULL,
+    outcome TEXT NOT NULL,  -- stop_loss / take_profit / expired
+    exit_price DOUBLE PRECISION NOT NULL,
+    exit_time TIMESTAMP NOT NULL,  -- open_time of the resolving candle
+    return_pct DOUBLE PRECISION NOT NULL,
+    resolved_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+CREATE INDEX strategy_signal_outcomes_coin_time ON strategy_signal_outcomes (coin, exit_time DESC);
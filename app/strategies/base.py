@@ -1,9 +1,15 @@
 # app/strategies/base.py
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Union
+from typing import Any, List, Dict, Tuple, Union
 
 class BaseStrategy(ABC):
+    # Data a confirmation strategy needs beyond predictions (see app.strategies.pipeline).
+    requires: Tuple[str, ...] = ()
+    # Shown in "confirmed_by" and copied into the combined signal when it confirms.
+    confirmation_label: str = ""
+    confirmation_fields: Tuple[str, ...] = ()
+
     @abstractmethod
     def evaluate(self, predictions: List[Dict]) -> Dict[str, Union[str, float]]:
         """
@@ -18,3 +24,7 @@ class BaseStrategy(ABC):
         pass
     def justification_text(self, signal: dict) -> str:
         return "No specific justification provided."
+
+    def evaluate_context(self, ctx: Any) -> Dict[str, Union[str, float]]:
+        """Evaluate from a pipeline RunContext; strategies with `requires` override this."""
+        return self.evaluate(ctx.historical, ctx.forecast)
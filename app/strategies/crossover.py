@@ -0,0 +1,77 @@
+# app/strategies/crossover.py
+
+from __future__ import annotations
+
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+
+from app.strategies.base import BaseStrategy
+from app.strategies.indicators import IndicatorFrame
+
+
+logger = logging.getLogger("strategies.crossover")
+
+
+class EMACrossoverStrategy(BaseStrategy):
+    """
+    Trend confirmation: BUY when the fast EMA is above the slow EMA and the
+    forecast points up, SHORT when it is below and the forecast points down.
+
+    Reads the run's shared IndicatorFrame, so the EMAs are the same arrays
+    MACD and any other EMA-based confirmation use on that candle.
+    """
+
+    requires = ("klines", "indicators")
+    confirmation_label = "EMA"
+    confirmation_fields = ("ema_fast", "ema_slow")
+
+    def __init__(self, fast: int = 12, slow: int = 26):
+        if int(fast) >= int(slow):
+            raise ValueError(f"fast span ({fast}) must be shorter than slow span ({slow})")
+        self.fast = int(fast)
+        self.slow = int(slow)
+
+    def __str__(self) -> str:
+        return f"EMACrossoverStrategy(fast={self.fast}, slow={self.slow})"
+
+    def evaluate(
+        self,
+        historical: List[Dict[str, Any]],
+        forecast: List[Dict[str, Any]],
+        indicators: Optional[IndicatorFrame],
+    ) -> Dict[str, Union[str, float]]:
+        if not historical or not forecast or indicators is None or len(indicators) == 0:
+            return {"action": "HOLD", "reason": "Insufficient data"}
+
+        fast = indicators.latest(("ema", self.fast))
+        slow = indicators.latest(("ema", self.slow))
+        if not (np.isfinite(fast) and np.isfinite(slow)):
+            return {"action": "HOLD", "reason": "EMA not ready"}
+
+        entry = float(historical[-1]["price"])
+        target = float(forecast[-1]["price"])
+        values = {"ema_fast": round(fast, 6), "ema_slow": round(slow, 6)}
+
+        if target > entry and fast > slow:
+            decision = {"action": "BUY", **values}
+        elif target < entry and fast < slow:
+            decision = {"action": "SHORT", **values}
+        else:
+            decision = {"action": "HOLD", **values}
+        logger.info("EMA crossover %s | %s", decision["action"], decision)
+        return decision
+
+    def evaluate_context(self, ctx: Any) -> Dict[str, Union[str, float]]:
+        return self.evaluate(ctx.historical, ctx.forecast, ctx.get("indicators"))
+
+    def justification_text(self, signal: dict) -> str:
+        fast, slow = signal.get("ema_fast"), signal.get("ema_slow")
+        if fast is None or slow is None:
+            return "EMA trend not available."
+        if signal.get("action") == "BUY":
+            return f"EMA{self.fast} {fast} is above EMA{self.slow} {slow}, confirming the uptrend."
+        if signal.get("action") == "SHORT":
+            return f"EMA{self.fast} {fast} is below EMA{self.slow} {slow}, confirming the downtrend."
+        return f"EMA{self.fast}/EMA{self.slow} did not confirm the move."
@@ -3,15 +3,55 @@
 from __future__ import annotations
 
 import logging
-from typing import List, Dict, Union, Optional, Any
+from typing import List, Dict, NamedTuple, Sequence, Union, Optional, Any
 
-import pandas as pd
+import numpy as np
 
 from .base import BaseStrategy
+from app.utils.startup import lazy_import
+
+pd = lazy_import("pandas")
 
 
 logger = logging.getLogger("strategies.forecast")
 
+# Array-path action codes
+BUY, HOLD, SHORT = 1, 0, -1
+
+# Array-path status codes (why a row could not be evaluated at all)
+STATUS_OK, STATUS_INSUFFICIENT, STATUS_NOT_ENOUGH_POINTS = 0, 1, 2
+
+# Array-path HOLD reason bits, in the order the scalar path reports them
+HOLD_REASONS = (
+    (1, "move<required"),
+    (2, "buy_votes<required"),
+    (4, "short_votes<required"),
+    (8, "buy_path_hits_stop"),
+    (16, "short_path_hits_stop"),
+)
+
+
+class ForecastSignals(NamedTuple):
+    action: np.ndarray       # int8: BUY / SHORT / HOLD
+    stop_loss: np.ndarray    # float64, NaN on HOLD
+    take_profit: np.ndarray  # float64, NaN on HOLD
+    status: np.ndarray       # int8: STATUS_*
+    hold_flags: np.ndarray   # int8 bitmask of HOLD_REASONS
+
+
+def right_align(rows: Sequence[Sequence[float]], width: Optional[int] = None) -> np.ndarray:
+    """
+    Stack ragged price rows into a (rows, width) float matrix, right-aligned and
+    NaN-padded on the left (the layout the array entry points expect).
+    """
+    width = max((len(r) for r in rows), default=0) if width is None else int(width)
+    out = np.full((len(rows), width), np.nan)
+    for i, r in enumerate(rows):
+        r = np.asarray(r, dtype="float64")[-width:] if width else np.empty(0)
+        if len(r):
+            out[i, width - len(r):] = r
+    return out
+
 
 class ForecastStrategy(BaseStrategy):
     """
@@ -85,10 +125,16 @@ class ForecastStrategy(BaseStrategy):
             )
             return {"action": "HOLD", "reason": "Not enough forecast points"}
 
+        # Array-backed inputs (PointsView from app.db.models) hand over their
+        # price arrays directly instead of materializing per-point dicts.
         try:
-            entry = float(historical[-1]["price"])
-            end = float(preds[-1]["price"])
-            pred_prices = [float(p["price"]) for p in preds]
+            if hasattr(historical, "prices") and hasattr(preds, "prices"):
+                entry = float(historical.prices[-1])
+                pred_prices = preds.prices.tolist()
+            else:
+                entry = float(historical[-1]["price"])
+                pred_prices = [float(p["price"]) for p in preds]
+            end = pred_prices[-1]
         except Exception:
             logger.exception("Failed to parse prices from historical/forecast")
             return {"action": "HOLD", "reason": "Bad price data"}
@@ -100,13 +146,9 @@ class ForecastStrategy(BaseStrategy):
         required_gain_pct = max(self.min_gain, self.min_abs_gain_pct)
 
         # --- Voting window ---
-        lastN = preds[-self.vote_window :] if len(preds) >= self.vote_window else preds
-        try:
-            up_votes = sum(float(p["price"]) > entry for p in lastN)
-            down_votes = sum(float(p["price"]) < entry for p in lastN)
-        except Exception:
-            logger.exception("Failed computing votes from forecast prices")
-            return {"action": "HOLD", "reason": "Bad forecast price data"}
+        lastN = pred_prices[-self.vote_window :] if len(pred_prices) >= self.vote_window else pred_prices
+        up_votes = sum(p > entry for p in lastN)
+        down_votes = sum(p < entry for p in lastN)
 
         required_votes = len(lastN) if self.vote_strict else max(1, len(lastN) - 1)
 
@@ -185,3 +227,166 @@ class ForecastStrategy(BaseStrategy):
         reason = ",".join(reasons) if reasons else "no_signal"
         logger.info("Forecast HOLD | entry=%s end=%s reason=%s", round(entry, 4), round(end, 4), reason)
         return {"action": "HOLD", "reason": reason}
+
+    # ----------------------------
+    # Array / batch entry points
+    # ----------------------------
+    @staticmethod
+    def _slice_len(length: np.ndarray, window: int) -> np.ndarray:
+        """len(row[-window:]) for rows of `length` items (a window <= 0 keeps from index -window)."""
+        if window > 0:
+            return np.minimum(length, window)
+        return np.maximum(length + window, 0)
+
+    def evaluate_arrays(
+        self,
+        entry: np.ndarray,
+        forecast: np.ndarray,
+        lengths: Optional[Sequence[int]] = None,
+    ) -> ForecastSignals:
+        """
+        Vectorized evaluate() for many coins (or runs) in one pass.
+
+        entry:    (n,) last historical price per row, NaN when there is none
+        forecast: (n, horizon) forecast prices, right-aligned (see right_align)
+                  so the newest point is the last column
+        lengths:  (n,) forecast points per row (the row's last `lengths[i]`
+                  columns; more than horizon means the row was truncated).
+                  Without it, the left padding is taken to be every column
+                  before a row's first non-NaN value, so a row that starts
+                  with a genuinely NaN price needs explicit lengths.
+
+        Same thresholds, votes and path-stop checks as evaluate(use_forecast_only=True),
+        NaN prices included (they never count as votes and fail the path check
+        when they are the first of the sliced points, like Python's min/max).
+        """
+        entry = np.asarray(entry, dtype="float64")
+        forecast = np.asarray(forecast, dtype="float64")
+        n = len(entry)
+        if forecast.ndim != 2 or forecast.shape[0] != n:
+            raise ValueError("forecast must be a (n, horizon) matrix aligned with entry")
+        horizon = forecast.shape[1]
+
+        if lengths is None:
+            real = ~np.isnan(forecast)
+            n_forecast = np.where(real.any(axis=1), horizon - real.argmax(axis=1), 0)
+        else:
+            n_forecast = np.asarray(lengths, dtype=np.int64)
+            if n_forecast.shape != (n,):
+                raise ValueError("lengths must have one entry per row")
+        # Same slicing semantics as the list path (forecast[-label_width:], lastN),
+        # capped at the columns that are actually there.
+        n_preds = self._slice_len(n_forecast, self.label_width)
+        n_votes = np.where(
+            n_preds >= self.vote_window, self._slice_len(n_preds, self.vote_window), n_preds
+        )
+        n_preds, n_votes = np.minimum(n_preds, horizon), np.minimum(n_votes, horizon)
+
+        status = np.where(
+            ~np.isfinite(entry) | (n_forecast < 2),
+            STATUS_INSUFFICIENT,
+            np.where(n_preds < 2, STATUS_NOT_ENOUGH_POINTS, STATUS_OK),
+        ).astype(np.int8)
+        ok = status == STATUS_OK
+
+        end = forecast[:, -1] if horizon else np.full(n, np.nan)
+        required_gain_pct = max(self.min_gain, self.min_abs_gain_pct)
+
+        col = np.arange(horizon)[None, :]
+        in_preds = col >= (horizon - n_preds)[:, None]
+        in_votes = col >= (horizon - n_votes)[:, None]
+        with np.errstate(invalid="ignore"):
+            up_votes = ((forecast > entry[:, None]) & in_votes).sum(axis=1)
+            down_votes = ((forecast < entry[:, None]) & in_votes).sum(axis=1)
+        required_votes = n_votes if self.vote_strict else np.maximum(1, n_votes - 1)
+
+        buy_stop_level = entry * (1 - self.min_loss)
+        short_stop_level = entry * (1 + self.min_loss)
+        if horizon:
+            usable = in_preds & ~np.isnan(forecast)
+            first = forecast[np.arange(n), np.clip(horizon - n_preds, 0, horizon - 1)]
+            # Python's min()/max() return NaN when the first item is NaN and skip NaNs after it.
+            min_pred = np.where(np.isnan(first), np.nan, np.where(usable, forecast, np.inf).min(axis=1))
+            max_pred = np.where(np.isnan(first), np.nan, np.where(usable, forecast, -np.inf).max(axis=1))
+        else:
+            min_pred = max_pred = np.full(n, np.nan)
+
+        with np.errstate(invalid="ignore"):
+            buy_move_ok = end > entry * (1 + required_gain_pct)
+            buy_votes_ok = up_votes >= required_votes
+            buy_path_ok = np.full(n, True) if not self.enforce_path_stop else (min_pred >= buy_stop_level)
+
+            short_move_ok = end < entry * (1 - required_gain_pct)
+            short_votes_ok = down_votes >= required_votes
+            short_path_ok = np.full(n, True) if not self.enforce_path_stop else (max_pred <= short_stop_level)
+
+        buy = ok & buy_move_ok & buy_votes_ok & buy_path_ok
+        short = ok & ~buy & short_move_ok & short_votes_ok & short_path_ok
+
+        action = np.where(buy, BUY, np.where(short, SHORT, HOLD)).astype(np.int8)
+        stop_loss = np.where(buy, buy_stop_level, np.where(short, short_stop_level, np.nan))
+        take_profit = np.where(
+            buy,
+            entry * (1 + 2 * required_gain_pct),
+            np.where(short, entry * (1 - 2 * required_gain_pct), np.nan),
+        )
+
+        hold = ok & ~buy & ~short
+        hold_flags = (
+            (hold & ~buy_move_ok & ~short_move_ok) * 1
+            | (hold & buy_move_ok & ~buy_votes_ok) * 2
+            | (hold & short_move_ok & ~short_votes_ok) * 4
+            | (hold & buy_move_ok & buy_votes_ok & ~buy_path_ok) * 8
+            | (hold & short_move_ok & short_votes_ok & ~short_path_ok) * 16
+        ).astype(np.int8)
+
+        return ForecastSignals(action, stop_loss, take_profit, status, hold_flags)
+
+    def evaluate_batch(
+        self,
+        entry: np.ndarray,
+        forecast: np.ndarray,
+        lengths: Optional[Sequence[int]] = None,
+    ) -> List[Dict[str, Union[str, float]]]:
+        """
+        evaluate_arrays() turned into the same decision dicts (and HOLD reasons)
+        that evaluate() returns, one per row.
+        """
+        entry = np.asarray(entry, dtype="float64")
+        sig = self.evaluate_arrays(entry, forecast, lengths)
+        labels = {BUY: ("BUY", "Forecast up + votes + path ok"), SHORT: ("SHORT", "Forecast down + votes + path ok")}
+
+        out: List[Dict[str, Union[str, float]]] = []
+        for i in range(len(entry)):
+            status = sig.status[i]
+            if status == STATUS_INSUFFICIENT:
+                out.append({"action": "HOLD", "reason": "Insufficient data"})
+                continue
+            if status == STATUS_NOT_ENOUGH_POINTS:
+                out.append({"action": "HOLD", "reason": "Not enough forecast points"})
+                continue
+
+            action = int(sig.action[i])
+            if action != HOLD:
+                name, reason = labels[action]
+                out.append({
+                    "action": name,
+                    "entry": round(float(entry[i]), 4),
+                    "stop_loss": round(float(sig.stop_loss[i]), 4),
+                    "take_profit": round(float(sig.take_profit[i]), 4),
+                    "reason": reason,
+                })
+                continue
+
+            flags = int(sig.hold_flags[i])
+            reasons = [text for bit, text in HOLD_REASONS if flags & bit]
+            out.append({"action": "HOLD", "reason": ",".join(reasons) if reasons else "no_signal"})
+
+        logger.debug(
+            "Forecast batch | rows=%s buy=%s short=%s hold=%s",
+            len(out),
+            int((sig.action == BUY).sum()),
+            int((sig.action == SHORT).sum()),
+            int((sig.action == HOLD).sum()),
+        )
+        return out
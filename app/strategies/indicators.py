@@ -0,0 +1,244 @@
+# app/strategies/indicators.py
+"""
+Technical indicators shared by confirmation strategies.
+
+IndicatorFrame computes indicators over one klines window on demand and keeps
+every result, including intermediates: the EMAs behind MACD are the same
+arrays an EMA crossover reads, ATR and any other range-based indicator share
+one true-range series, and so on. IndicatorService hands out one frame per
+(symbol, interval, last candle open_time) from an LRU, so every strategy
+evaluated on the same candle reads the same frame.
+
+Values follow the ta library (fillna=False): NaN until an indicator has
+enough candles.
+
+Configuration (env):
+    INDICATOR_CACHE_SIZE   frames kept (default 256; 0 disables caching)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.utils.startup import lazy_import
+
+pd = lazy_import("pandas")
+
+
+logger = logging.getLogger("strategies.indicators")
+
+# Indicator name -> default parameters; a spec is (name, *params) or just the name.
+DEFAULT_PARAMS: Dict[str, Tuple] = {
+    "ema": (12,),
+    "sma": (20,),
+    "rsi": (14,),
+    "macd": (12, 26, 9),
+    "bollinger": (20, 2.0),
+    "true_range": (),
+    "atr": (14,),
+}
+
+
+def _spec(spec: Any) -> Tuple:
+    name, *params = (spec,) if isinstance(spec, str) else tuple(spec)
+    if name not in DEFAULT_PARAMS:
+        raise ValueError(f"Unknown indicator: {name!r}")
+    defaults = DEFAULT_PARAMS[name]
+    return (name, *params, *defaults[len(params):])
+
+
+class IndicatorFrame:
+    """
+    Indicators for one klines window. Each (indicator, params) is computed once
+    and memoized; arrays are aligned with the window's candles.
+
+    ATR uses high/low when the klines carry them; with closes only the true
+    range degrades to |close - previous close|.
+    """
+
+    def __init__(
+        self,
+        open_time: np.ndarray,
+        close: np.ndarray,
+        high: Optional[np.ndarray] = None,
+        low: Optional[np.ndarray] = None,
+    ):
+        self.open_time = open_time
+        self.close = np.asarray(close, dtype="float64")
+        self.high = None if high is None else np.asarray(high, dtype="float64")
+        self.low = None if low is None else np.asarray(low, dtype="float64")
+        self._values: Dict[Tuple, Any] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_klines(cls, klines_df: pd.DataFrame) -> "IndicatorFrame":
+        """Frame over a get_stored_klines() DataFrame (NaN closes dropped)."""
+        close = pd.to_numeric(klines_df["close"], errors="coerce").to_numpy(dtype="float64")
+        valid = np.isfinite(close)
+        cols = {c: klines_df[c].to_numpy(dtype="float64")[valid] for c in ("high", "low") if c in klines_df.columns}
+        open_time = klines_df["open_time"].to_numpy()[valid] if "open_time" in klines_df.columns else None
+        return cls(open_time, close[valid], cols.get("high"), cols.get("low"))
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def _memo(self, key: Tuple, compute) -> Any:
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = compute()
+            return self._values[key]
+
+    # ----------------------------
+    # Intermediates
+    # ----------------------------
+    def _series(self) -> pd.Series:
+        return self._memo(("_close_series",), lambda: pd.Series(self.close, copy=False))
+
+    def _ewm(self, values: np.ndarray, min_periods: int, **kwargs) -> np.ndarray:
+        return pd.Series(values, copy=False).ewm(min_periods=min_periods, adjust=False, **kwargs).mean().to_numpy()
+
+    def ema(self, span: int) -> np.ndarray:
+        span = int(span)
+        return self._memo(("ema", span), lambda: self._ewm(self.close, span, span=span))
+
+    def sma(self, window: int) -> np.ndarray:
+        window = int(window)
+        return self._memo(("sma", window), lambda: self._series().rolling(window, min_periods=window).mean().to_numpy())
+
+    def true_range(self) -> np.ndarray:
+        def compute():
+            prev = np.concatenate(([np.nan], self.close[:-1]))
+            if self.high is None or self.low is None:
+                return np.abs(self.close - prev)
+            ranges = np.vstack((self.high - self.low, np.abs(self.high - prev), np.abs(self.low - prev)))
+            return np.nanmax(ranges, axis=0)
+
+        return self._memo(("true_range",), compute)
+
+    # ----------------------------
+    # Indicators
+    # ----------------------------
+    def rsi(self, window: int = 14) -> np.ndarray:
+        window = int(window)
+
+        def compute():
+            diff = np.diff(self.close, prepend=np.nan)
+            up = np.where(diff > 0, diff, 0.0)
+            down = np.where(diff < 0, -diff, 0.0)
+            avg_up = self._ewm(up, window, alpha=1 / window)
+            avg_down = self._ewm(down, window, alpha=1 / window)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rsi = np.where(avg_down == 0, 100.0, 100 - 100 / (1 + avg_up / avg_down))
+            rsi[np.isnan(avg_up) | np.isnan(avg_down)] = np.nan
+            return rsi
+
+        return self._memo(("rsi", window), compute)
+
+    def macd(self, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(macd, signal, histogram); reuses ema(fast) and ema(slow)."""
+        fast, slow, signal = int(fast), int(slow), int(signal)
+
+        def compute():
+            line = self.ema(fast) - self.ema(slow)
+            signal_line = self._ewm(line, signal, span=signal)
+            return line, signal_line, line - signal_line
+
+        return self._memo(("macd", fast, slow, signal), compute)
+
+    def bollinger(self, window: int = 20, num_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(middle, upper, lower); the middle band is sma(window)."""
+        window, num_std = int(window), float(num_std)
+
+        def compute():
+            mid = self.sma(window)
+            std = self._memo(
+                ("_rolling_std", window),
+                lambda: self._series().rolling(window, min_periods=window).std(ddof=0).to_numpy(),
+            )
+            return mid, mid + num_std * std, mid - num_std * std
+
+        return self._memo(("bollinger", window, num_std), compute)
+
+    def atr(self, window: int = 14) -> np.ndarray:
+        """Wilder ATR seeded with the mean true range of the first `window` candles."""
+        window = int(window)
+
+        def compute():
+            tr = self.true_range()
+            out = np.full(len(tr), np.nan)
+            if len(tr) < window:
+                return out
+            seeded = np.concatenate(([tr[:window].mean()], tr[window:]))
+            out[window - 1:] = self._ewm(seeded, 0, alpha=1 / window)
+            return out
+
+        return self._memo(("atr", window), compute)
+
+    # ----------------------------
+    # Batch access
+    # ----------------------------
+    def compute(self, specs: Iterable[Any]) -> Dict[Tuple, Any]:
+        """
+        Every spec in one call, e.g. ["rsi", ("ema", 50), ("macd", 12, 26, 9)].
+        Results are keyed by the normalized spec (defaults filled in).
+        """
+        return {spec: getattr(self, spec[0])(*spec[1:]) for spec in map(_spec, specs)}
+
+    def latest(self, spec: Any) -> Any:
+        """Last value of an indicator (a tuple of floats for multi-line ones)."""
+        value = self.compute([spec])[_spec(spec)]
+        if isinstance(value, tuple):
+            return tuple(float(v[-1]) if len(v) else np.nan for v in value)
+        return float(value[-1]) if len(value) else np.nan
+
+
+class IndicatorService:
+    """
+    IndicatorFrames per (symbol, interval, last candle open_time), LRU-evicted.
+
+    A new candle changes the key, so a frame never serves stale values; older
+    frames simply age out.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(0, int(max_entries))
+        self._frames: "OrderedDict[Tuple[Hashable, ...], IndicatorFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "IndicatorService":
+        return cls(max_entries=int(os.getenv("INDICATOR_CACHE_SIZE", "256")))
+
+    def frame(self, symbol: str, interval: str, klines_df: Optional[pd.DataFrame]) -> Optional[IndicatorFrame]:
+        """Shared frame for the klines' newest candle; None without usable klines."""
+        if klines_df is None or getattr(klines_df, "empty", True) or "close" not in klines_df.columns:
+            return None
+        last = klines_df["open_time"].iloc[-1] if "open_time" in klines_df.columns else None
+        # Row count guards against two callers passing different windows ending on the same candle.
+        key = (symbol, interval, last, len(klines_df))
+
+        with self._lock:
+            frame = self._frames.get(key) if last is not None else None
+            if frame is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return frame
+            self.misses += 1
+
+        frame = IndicatorFrame.from_klines(klines_df)
+        if last is not None and self.max_entries:
+            with self._lock:
+                frame = self._frames.setdefault(key, frame)
+                self._frames.move_to_end(key)
+                while len(self._frames) > self.max_entries:
+                    self._frames.popitem(last=False)
+        logger.debug("Indicator frame built | symbol=%s interval=%s rows=%s", symbol, interval, len(frame))
+        return frame
@@ -0,0 +1,119 @@
+# app/strategies/memo.py
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.strategies.base import BaseStrategy
+
+
+logger = logging.getLogger("strategies.memo")
+
+RunSlot = Tuple[str, str, str]  # (coin, interval, model_name)
+
+_SCALARS = (str, int, float, bool, type(None))
+
+
+def strategy_params(strategy: BaseStrategy) -> Dict[str, Any]:
+    """Scalar constructor parameters of a strategy (helpers like rsi_store are left out)."""
+    params = {k: v for k, v in sorted(vars(strategy).items()) if isinstance(v, _SCALARS)}
+    params["class"] = type(strategy).__name__
+    return params
+
+
+def params_hash(*strategies: BaseStrategy, **extra: Any) -> str:
+    payload = {"strategies": [strategy_params(s) for s in strategies], **extra}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def memo_key(prediction_id: str, last_open_time: Any, params: str) -> str:
+    """
+    Everything a run's outcome depends on. `last_open_time` is None when the
+    decision did not need klines (forecast HOLD), so new candles don't bust it.
+    """
+    return f"{prediction_id}|{'' if last_open_time is None else last_open_time}|{params}"
+
+
+class RunMemo:
+    """
+    Last outcome per (coin, interval, model_name) and the key it was computed for.
+
+    A run whose inputs produce the same key as the stored one returns the
+    cached final decision without writing signals or notifying. Only the latest
+    key per slot is kept, so a changed input simply overwrites it.
+
+    Entries live in an in-process LRU (enough for the daemon and retries within
+    a batch). With a `backend` (RUN_MEMO=postgres) they are also read from and
+    written to the strategy_run_memo table, so retried one-shot pods see them.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        max_entries: int = 10_000,
+        load: Optional[Callable[[RunSlot], Optional[Tuple[str, Dict[str, Any]]]]] = None,
+        save: Optional[Callable[[RunSlot, str, Dict[str, Any]], None]] = None,
+    ):
+        self.enabled = enabled
+        self.max_entries = max(1, int(max_entries))
+        self._load = load
+        self._save = save
+        self._entries: "OrderedDict[RunSlot, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls) -> "RunMemo":
+        """RUN_MEMO: "memory" (default), "postgres", or "off"."""
+        mode = os.getenv("RUN_MEMO", "memory").strip().lower()
+        if mode in ("off", "0", "false", "no"):
+            return cls(enabled=False)
+        if mode == "postgres":
+            from app.db.strategy import load_run_memo, save_run_memo
+
+            return cls(load=load_run_memo, save=save_run_memo)
+        return cls()
+
+    def _remember(self, slot: RunSlot, key: str, decision: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[slot] = (key, decision)
+            self._entries.move_to_end(slot)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, slot: RunSlot, key: str) -> Optional[Dict[str, Any]]:
+        """Cached final decision when `slot` was last run with exactly `key`."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(slot)
+        if entry is None and self._load is not None:
+            try:
+                entry = self._load(slot)
+            except Exception:
+                logger.exception("Run memo lookup failed | slot=%s", slot)
+                entry = None
+            if entry is not None:
+                self._remember(slot, *entry)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return None
+
+    def put(self, slot: RunSlot, key: str, decision: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        self._remember(slot, key, decision)
+        if self._save is not None:
+            try:
+                self._save(slot, key, decision)
+            except Exception:
+                logger.exception("Run memo save failed | slot=%s", slot)
@@ -0,0 +1,125 @@
+# app/strategies/pipeline.py
+
+from __future__ import annotations
+
+import logging
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.strategies.base import BaseStrategy
+
+
+logger = logging.getLogger("strategies.pipeline")
+
+ACTIONS = ("BUY", "SHORT")
+
+
+def _action(decision: Optional[Dict[str, Any]]) -> str:
+    if not isinstance(decision, dict):
+        return "HOLD"
+    return str(decision.get("action", "HOLD") or "HOLD").upper()
+
+
+class RunContext:
+    """
+    Inputs of one (coin, interval) run.
+
+    Predictions are always present; anything else a confirmation strategy
+    `requires` (e.g. "klines") comes from a loader that is called at most once,
+    on first `get()`, so data nobody asks for is never fetched.
+    """
+
+    def __init__(
+        self,
+        coin: str,
+        interval: str,
+        historical: List[Dict[str, Any]],
+        forecast: List[Dict[str, Any]],
+        loaders: Optional[Dict[str, Callable[[], Any]]] = None,
+    ):
+        self.coin = coin
+        self.interval = interval
+        self.historical = historical
+        self.forecast = forecast
+        self.loaders = dict(loaders or {})
+        self._loaded: Dict[str, Any] = {}
+
+    def get(self, name: str) -> Any:
+        if name not in self._loaded:
+            loader = self.loaders.get(name)
+            if loader is None:
+                raise KeyError(f"No loader for {name!r}")
+            self._loaded[name] = loader()
+        return self._loaded[name]
+
+    def loaded(self) -> List[str]:
+        return list(self._loaded)
+
+
+class PipelineResult(NamedTuple):
+    primary: Dict[str, Any]
+    # (strategy, decision); decision is None for skipped confirmations that are not recorded
+    confirmations: List[Tuple[BaseStrategy, Optional[Dict[str, Any]]]]
+    final: Dict[str, Any]
+
+
+def skipped_decision(reason: str) -> Dict[str, Any]:
+    return {"action": "HOLD", "reason": f"Skipped: {reason}", "skipped": True}
+
+
+class StrategyPipeline:
+    """
+    Primary decision followed by confirmation strategies, evaluated lazily.
+
+    The combined signal is only BUY/SHORT when the primary is BUY/SHORT and
+    every confirmation agrees, so a confirmation (and the data it `requires`)
+    is only evaluated while the outcome can still change: never after a
+    primary HOLD, and not after an earlier confirmation disagreed.
+
+    With `record_skipped` the skipped confirmations get a HOLD decision with
+    `"skipped": True` so their signal rows keep being written.
+    """
+
+    def __init__(self, confirmations: Sequence[BaseStrategy], record_skipped: bool = True):
+        self.confirmations = list(confirmations)
+        self.record_skipped = record_skipped
+
+    @property
+    def requires(self) -> List[str]:
+        return sorted({dep for s in self.confirmations for dep in s.requires})
+
+    def __str__(self) -> str:
+        return f"StrategyPipeline({', '.join(type(s).__name__ for s in self.confirmations)})"
+
+    def run(self, primary: Dict[str, Any], ctx: RunContext, metrics: Any = None) -> PipelineResult:
+        primary_action = _action(primary)
+        skip_reason: Optional[str] = None if primary_action in ACTIONS else f"primary {primary_action}"
+        results: List[Tuple[BaseStrategy, Optional[Dict[str, Any]]]] = []
+
+        for strategy in self.confirmations:
+            name = type(strategy).__name__
+            if skip_reason is not None:
+                logger.info("Skipping %s | %s", name, skip_reason)
+                results.append((strategy, skipped_decision(skip_reason) if self.record_skipped else None))
+                continue
+
+            for dependency in strategy.requires:
+                ctx.get(dependency)  # loaded (and timed by its loader) outside the evaluate span
+            span = metrics.span(f"evaluate.{name}") if metrics is not None else nullcontext()
+            with span:
+                decision = strategy.evaluate_context(ctx)
+            logger.info("%s decision | %s", name, decision)
+            results.append((strategy, decision))
+            if _action(decision) != primary_action:
+                skip_reason = f"{name} {_action(decision)}"
+
+        final: Dict[str, Any] = {"action": "HOLD", "source": "Unconfirmed"}
+        if primary_action in ACTIONS and skip_reason is None:
+            final = {**(primary or {}), "action": primary_action}
+            for strategy, decision in results:
+                for field in strategy.confirmation_fields:
+                    final[field] = (decision or {}).get(field)
+            final["confirmed_by"] = "+".join(s.confirmation_label for s, _ in results) or None
+            final["source"] = "Confirmed"
+
+        return PipelineResult(primary, results, final)
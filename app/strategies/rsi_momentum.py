@@ -3,13 +3,15 @@
 from __future__ import annotations
 
 import logging
-from typing import List, Dict, Union, Any
+from typing import List, Dict, Union, Any, Optional, Tuple
 
 import numpy as np
-import pandas as pd
-from ta.momentum import RSIIndicator
 
 from app.strategies.base import BaseStrategy
+from app.strategies.rsi_state import RSIStateStore
+from app.utils.startup import lazy_import
+
+pd = lazy_import("pandas")
 
 
 logger = logging.getLogger("strategies.rsi")
@@ -23,10 +25,24 @@ def sanitize_decision(decision: dict) -> dict:
 
 
 class RSIMomentumStrategy(BaseStrategy):
-    def __init__(self, fee_pct: float = 0.005, rsi_threshold: float = 55):
+    requires = ("klines",)
+    confirmation_label = "RSI"
+    confirmation_fields = ("rsi",)
+
+    def __init__(
+        self,
+        fee_pct: float = 0.005,
+        rsi_threshold: float = 55,
+        rsi_window: int = 14,
+        rsi_store: Optional[RSIStateStore] = None,
+    ):
         self.fee_pct = float(fee_pct)
         self.rsi_threshold = float(rsi_threshold)
+        self.rsi_window = int(rsi_window)
         self.min_gain = 2 * self.fee_pct
+        # When set, RSI is updated incrementally per (symbol, interval) instead of
+        # recomputed over the whole klines window.
+        self.rsi_store = rsi_store
 
     def __str__(self) -> str:
         return f"RSIMomentumStrategy(fee_pct={self.fee_pct}, rsi_threshold={self.rsi_threshold})"
@@ -36,6 +52,7 @@ class RSIMomentumStrategy(BaseStrategy):
         historical: List[Dict[str, Any]],
         forecast: List[Dict[str, Any]],
         klines_df: pd.DataFrame,
+        state_key: Optional[Tuple[str, str]] = None,
     ) -> Dict[str, Union[str, float]]:
         # Basic input checks
         if historical is None or forecast is None or klines_df is None:
@@ -52,30 +69,20 @@ class RSIMomentumStrategy(BaseStrategy):
             return sanitize_decision({"action": "HOLD", "reason": "Insufficient data"})
 
         try:
-            # Defensive copy + numeric close
-            df = klines_df.copy()
-            if "close" not in df.columns:
-                logger.warning("Klines df missing 'close' column. cols=%s", list(df.columns))
+            if "close" not in klines_df.columns:
+                logger.warning("Klines df missing 'close' column. cols=%s", list(klines_df.columns))
                 return sanitize_decision({"action": "HOLD", "reason": "Missing close column"})
 
-            df["close"] = pd.to_numeric(df["close"], errors="coerce")
-            before = len(df)
-            df = df.dropna(subset=["close"])
-            after = len(df)
+            if self.rsi_store is not None and state_key is not None and "open_time" in klines_df.columns:
+                latest_rsi = self._latest_rsi_incremental(klines_df, state_key)
+            else:
+                latest_rsi = self._latest_rsi_full(klines_df)
 
-            if after == 0:
-                logger.info("No valid close prices after coercion/dropna. before=%s after=%s", before, after)
+            if latest_rsi is None:
                 return sanitize_decision({"action": "HOLD", "reason": "No valid close prices"})
 
-            if after != before:
-                logger.debug("Dropped NaN closes. before=%s after=%s", before, after)
-
-            # RSI calculation
-            df["rsi"] = RSIIndicator(close=df["close"]).rsi()
-            latest_rsi = float(df["rsi"].iloc[-1])
-
             if not np.isfinite(latest_rsi):
-                logger.info("RSI not ready (latest is NaN/inf). last_5_rsi=%s", df["rsi"].tail(5).tolist())
+                logger.info("RSI not ready (latest is NaN/inf). latest_rsi=%s", latest_rsi)
                 return sanitize_decision({"action": "HOLD", "reason": "RSI not ready"})
 
             entry = float(historical[-1]["price"])
@@ -121,6 +128,51 @@ class RSIMomentumStrategy(BaseStrategy):
             logger.exception("RSI strategy evaluate() crashed")
             return sanitize_decision({"action": "HOLD", "reason": "Exception in RSI strategy"})
 
+    def evaluate_context(self, ctx: Any) -> Dict[str, Union[str, float]]:
+        return self.evaluate(ctx.historical, ctx.forecast, ctx.get("klines"), state_key=(ctx.coin, ctx.interval))
+
+    def _latest_rsi_full(self, klines_df: pd.DataFrame) -> Optional[float]:
+        # Defensive copy + numeric close
+        df = klines_df.copy()
+        df["close"] = pd.to_numeric(df["close"], errors="coerce")
+        before = len(df)
+        df = df.dropna(subset=["close"])
+        after = len(df)
+
+        if after == 0:
+            logger.info("No valid close prices after coercion/dropna. before=%s after=%s", before, after)
+            return None
+
+        if after != before:
+            logger.debug("Dropped NaN closes. before=%s after=%s", before, after)
+
+        # RSI calculation (ta is only needed on this path)
+        from ta.momentum import RSIIndicator
+
+        rsi = RSIIndicator(close=df["close"], window=self.rsi_window).rsi()
+        latest_rsi = float(rsi.iloc[-1])
+        if not np.isfinite(latest_rsi):
+            logger.debug("RSI not ready | last_5_rsi=%s", rsi.tail(5).tolist())
+        return latest_rsi
+
+    def _latest_rsi_incremental(self, klines_df: pd.DataFrame, state_key: Tuple[str, str]) -> Optional[float]:
+        closes = pd.to_numeric(klines_df["close"], errors="coerce").to_numpy(dtype="float64")
+        open_time = klines_df["open_time"]
+        if not pd.api.types.is_datetime64_any_dtype(open_time):
+            # to_datetime on an already-datetime column still walks every element.
+            open_time = pd.to_datetime(open_time)
+        times = open_time.to_numpy(dtype="datetime64[ns]").view("int64")
+        valid = np.isfinite(closes)
+        if not valid.all():
+            logger.debug("Dropped NaN closes. before=%s after=%s", len(closes), int(valid.sum()))
+            closes, times = closes[valid], times[valid]
+        if len(closes) == 0:
+            logger.info("No valid close prices after coercion/dropna. before=%s after=0", len(valid))
+            return None
+
+        symbol, interval = state_key
+        return float(self.rsi_store.latest(symbol, interval, times, closes, window=self.rsi_window))
+
     def justification_text(self, signal: dict) -> str:
         rsi = signal.get("rsi")
         if rsi is None:
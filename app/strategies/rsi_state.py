@@ -0,0 +1,201 @@
+# app/strategies/rsi_state.py
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+
+logger = logging.getLogger("strategies.rsi_state")
+
+_SAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class IncrementalRSI:
+    """
+    Wilder RSI with O(1) updates.
+
+    Mirrors ta.momentum.RSIIndicator(fillna=False) exactly: the first candle
+    seeds both smoothed series with 0, smoothing is an adjust=False EWM with
+    alpha=1/window, and values are NaN until `window` candles have been seen.
+    """
+
+    __slots__ = ("window", "alpha", "avg_gain", "avg_loss", "last_close", "count", "last_open_time")
+
+    def __init__(self, window: int = 14):
+        self.window = int(window)
+        self.alpha = 1.0 / self.window
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.last_close: Optional[float] = None
+        self.count = 0
+        self.last_open_time: Optional[int] = None  # ns since epoch of the last consumed candle
+
+    def _step(self, avg_gain: float, avg_loss: float, close: float) -> Tuple[float, float]:
+        if self.last_close is None:
+            return 0.0, 0.0
+        diff = close - self.last_close
+        gain = diff if diff > 0 else 0.0
+        loss = -diff if diff < 0 else 0.0
+        return self._ewm(avg_gain, gain), self._ewm(avg_loss, loss)
+
+    def _ewm(self, prev: float, cur: float) -> float:
+        # Same arithmetic as pandas' ewm(adjust=False).mean() so results are bit-identical.
+        if prev == cur:
+            return prev
+        old_wt = 1.0 - self.alpha
+        return (old_wt * prev + self.alpha * cur) / (old_wt + self.alpha)
+
+    def _rsi(self, avg_gain: float, avg_loss: float, count: int) -> float:
+        if count < self.window:
+            return math.nan
+        if avg_loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def update(self, close: float, open_time: Optional[int] = None) -> float:
+        """Consume one closed candle and return the RSI after it."""
+        close = float(close)
+        if not math.isfinite(close):
+            return self.value
+        self.avg_gain, self.avg_loss = self._step(self.avg_gain, self.avg_loss, close)
+        self.last_close = close
+        self.count += 1
+        if open_time is not None:
+            self.last_open_time = int(open_time)
+        return self.value
+
+    def peek(self, close: float) -> float:
+        """RSI if `close` were the next candle, without mutating state (for a still-open candle)."""
+        close = float(close)
+        if not math.isfinite(close):
+            return self.value
+        gain, loss = self._step(self.avg_gain, self.avg_loss, close)
+        return self._rsi(gain, loss, self.count + 1)
+
+    @property
+    def value(self) -> float:
+        return self._rsi(self.avg_gain, self.avg_loss, self.count)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "IncrementalRSI":
+        state = cls(int(d["window"]))
+        for slot in cls.__slots__:
+            if slot in d:
+                setattr(state, slot, d[slot])
+        return state
+
+
+class RSIStateStore:
+    """
+    Per (symbol, interval) IncrementalRSI states.
+
+    States live in memory for the life of the process and, when `persist_dir`
+    (or RSI_STATE_DIR) is set, are also saved as small JSON files so one-shot
+    runs can pick up where the previous run stopped.
+
+    The newest kline is treated as possibly still open: it is applied with
+    `peek()` and only committed once a later candle exists, so a revised close
+    for the current candle never corrupts the smoothed state.
+
+    Note: a continued state carries history from before the current klines
+    window, while a windowed ta RSI re-seeds at the window start. On the same
+    series both are identical; on short windows (e.g. 21 daily candles) the
+    incremental value is the better-converged one.
+    """
+
+    def __init__(self, persist_dir: Optional[str] = None):
+        self.persist_dir = persist_dir
+        self._states: Dict[Tuple[str, str, int], IncrementalRSI] = {}
+        self._lock = threading.Lock()
+        if persist_dir:
+            os.makedirs(persist_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> "RSIStateStore":
+        return cls(os.getenv("RSI_STATE_DIR") or None)
+
+    def _path(self, key: Tuple[str, str, int]) -> str:
+        symbol, interval, window = key
+        return os.path.join(self.persist_dir, f"{_SAFE.sub('_', symbol)}__{_SAFE.sub('_', interval)}__{window}.json")
+
+    def _load(self, key: Tuple[str, str, int]) -> Optional[IncrementalRSI]:
+        if not self.persist_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as fh:
+                return IncrementalRSI.from_dict(json.load(fh))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, key: Tuple[str, str, int], state: IncrementalRSI) -> None:
+        if not self.persist_dir:
+            return
+        path = self._path(key)
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(state.to_dict(), fh)
+            os.replace(tmp, path)
+        except OSError:
+            logger.exception("Could not persist RSI state %s", key)
+
+    def latest(
+        self,
+        symbol: str,
+        interval: str,
+        open_times: np.ndarray,
+        closes: np.ndarray,
+        window: int = 14,
+    ) -> float:
+        """
+        Latest RSI for the series (ascending open_times as int64 ns, float closes
+        with NaNs already removed). Only candles newer than the stored state are
+        consumed; the state is rebuilt from the series if it can't be continued.
+        """
+        if len(closes) == 0:
+            return math.nan
+
+        key = (symbol, interval, int(window))
+        with self._lock:
+            state = self._states.get(key) or self._load(key)
+
+            start = 0
+            if state is not None and state.last_open_time is not None:
+                pos = int(np.searchsorted(open_times, state.last_open_time, side="left"))
+                continuous = (
+                    pos < len(open_times)
+                    and int(open_times[pos]) == state.last_open_time
+                    and float(closes[pos]) == state.last_close
+                )
+                if continuous:
+                    start = pos + 1
+                else:
+                    logger.debug("RSI state %s can't be continued from series; rebuilding", key)
+                    state = None
+            if state is None:
+                state = IncrementalRSI(window)
+
+            # Commit every candle except the newest, which may still be open.
+            last = len(closes) - 1
+            for i in range(start, last):
+                state.update(closes[i], int(open_times[i]))
+
+            self._states[key] = state
+            if start < last:
+                self._save(key, state)
+
+            if start > last:
+                # No new candle since the last commit: the committed one is the newest.
+                return state.value
+            return state.peek(closes[last])
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Open-signal tracker: follows every confirmed BUY/SHORT until its stop-loss or
+take-profit is hit.
+
+    python -m app.tracker --interval 1m --notify
+
+Open signals are kept per symbol in price-level heaps (one per side and
+level), so a candle only touches the positions whose level it crossed:
+O(log n) per resolved position instead of a scan of every open signal. At each
+close of `--interval` the tracker loads newly written signals, feeds the new
+candles of the symbols that have open positions, and records every resolution
+in strategy_signal_outcomes (optionally announcing it on Telegram).
+
+Resolution rules match app.backtest: a signal is live from the first candle
+opening at/after its created_at; the exit is at the level that was crossed;
+when a candle crosses both the stop and the target, the stop wins. With
+--max-age-hours unresolved signals expire at the close of the first candle past
+that age.
+
+Outcomes are the checkpoint: on restart, signals without an outcome are loaded
+again and their candles replayed from created_at (writes are idempotent).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import os
+import signal
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.db.signals import OpenSignal, SignalOutcome
+
+
+logger = logging.getLogger("strategies.tracker")
+
+_NIL_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+def _valid_levels(sig: OpenSignal) -> bool:
+    values = (sig.entry, sig.stop_loss, sig.take_profit)
+    if not all(isinstance(v, (int, float)) and math.isfinite(v) for v in values):
+        return False
+    if sig.action == "BUY":
+        return sig.stop_loss < sig.entry < sig.take_profit
+    if sig.action == "SHORT":
+        return sig.take_profit < sig.entry < sig.stop_loss
+    return False
+
+
+def outcome_return(sig: OpenSignal, exit_price: float) -> float:
+    side = 1.0 if sig.action == "BUY" else -1.0
+    return side * (exit_price - sig.entry) / sig.entry
+
+
+class _Book:
+    """
+    Open signals of one symbol.
+
+    Each heap is ordered so its top is the level the market reaches first:
+        buy_stops      max-heap on stop_loss    hit when low  <= level
+        buy_targets    min-heap on take_profit  hit when high >= level
+        short_stops    min-heap on stop_loss    hit when high >= level
+        short_targets  max-heap on take_profit  hit when low  <= level
+    A live signal sits in two of them; entries of resolved signals are left
+    behind and skipped when they surface (lazy deletion).
+    """
+
+    __slots__ = ("buy_stops", "buy_targets", "short_stops", "short_targets", "pending", "by_age", "open", "stale")
+
+    def __init__(self):
+        self.buy_stops: List[Tuple[float, int, str]] = []
+        self.buy_targets: List[Tuple[float, int, str]] = []
+        self.short_stops: List[Tuple[float, int, str]] = []
+        self.short_targets: List[Tuple[float, int, str]] = []
+        self.pending: List[Tuple[datetime, int, str]] = []  # not live yet, by created_at
+        self.by_age: List[Tuple[datetime, int, str]] = []   # live, by created_at (expiry)
+        self.open = 0   # signals tracked (pending or live)
+        self.stale = 0  # level-heap entries of resolved signals
+
+
+class OpenSignalTracker:
+    """Resolves stop-loss / take-profit hits of open signals candle by candle."""
+
+    def __init__(self, max_age: Optional[timedelta] = None):
+        self.max_age = max_age
+        self._books: Dict[str, _Book] = {}
+        self._open: Dict[str, OpenSignal] = {}
+        self._live: Set[str] = set()
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._open)
+
+    def __contains__(self, signal_id: str) -> bool:
+        return signal_id in self._open
+
+    def symbols(self) -> List[str]:
+        return [coin for coin, book in self._books.items() if book.open]
+
+    def add(self, sig: OpenSignal) -> bool:
+        """Track `sig`; False for duplicates and signals without usable levels."""
+        if sig.signal_id in self._open:
+            return False
+        if not _valid_levels(sig):
+            logger.debug("Not tracking signal without usable levels | %s", sig)
+            return False
+        self._open[sig.signal_id] = sig
+        book = self._books.setdefault(sig.coin, _Book())
+        book.open += 1
+        heapq.heappush(book.pending, (sig.created_at, next(self._seq), sig.signal_id))
+        return True
+
+    def _activate(self, book: _Book, open_time: datetime) -> None:
+        while book.pending and book.pending[0][0] <= open_time:
+            created_at, seq, sid = heapq.heappop(book.pending)
+            sig = self._open.get(sid)
+            if sig is None:
+                continue
+            self._live.add(sid)
+            if self.max_age is not None:  # only needed for expiry
+                heapq.heappush(book.by_age, (created_at, seq, sid))
+            if sig.action == "BUY":
+                heapq.heappush(book.buy_stops, (-sig.stop_loss, seq, sid))
+                heapq.heappush(book.buy_targets, (sig.take_profit, seq, sid))
+            else:
+                heapq.heappush(book.short_stops, (sig.stop_loss, seq, sid))
+                heapq.heappush(book.short_targets, (-sig.take_profit, seq, sid))
+
+    def _pop_crossed(self, heap: List[Tuple[float, int, str]], crossed, hits: Set[str], book: _Book) -> None:
+        while heap and crossed(heap[0][0]):
+            sid = heapq.heappop(heap)[2]
+            if sid in self._live:
+                hits.add(sid)
+            else:
+                book.stale -= 1
+
+    def on_candle(
+        self,
+        coin: str,
+        open_time: datetime,
+        high: float,
+        low: float,
+        close: Optional[float] = None,
+    ) -> List[SignalOutcome]:
+        """Resolve every open `coin` signal whose stop or target this candle reached."""
+        book = self._books.get(coin)
+        if book is None:
+            return []
+        self._activate(book, open_time)
+
+        stops: Set[str] = set()
+        targets: Set[str] = set()
+        self._pop_crossed(book.buy_stops, lambda neg: -neg >= low, stops, book)
+        self._pop_crossed(book.short_stops, lambda level: level <= high, stops, book)
+        self._pop_crossed(book.buy_targets, lambda level: level <= high, targets, book)
+        self._pop_crossed(book.short_targets, lambda neg: -neg >= low, targets, book)
+
+        outcomes = [self._resolve(sid, "stop_loss", open_time) for sid in stops]
+        # Both levels inside one candle: the stop wins (conservative, as in the backtest).
+        outcomes += [self._resolve(sid, "take_profit", open_time) for sid in targets - stops]
+
+        # A signal resolved through one level leaves its other level's entry behind.
+        book.stale += len(stops ^ targets)
+
+        if self.max_age is not None and close is not None and math.isfinite(close):
+            while book.by_age and book.by_age[0][0] < open_time - self.max_age:
+                sid = heapq.heappop(book.by_age)[2]
+                if sid in self._live:
+                    outcomes.append(self._resolve(sid, "expired", open_time, exit_price=close))
+                    book.stale += 2
+
+        entries = len(book.buy_stops) + len(book.buy_targets) + len(book.short_stops) + len(book.short_targets)
+        if book.stale > 1024 and 2 * book.stale > entries:
+            self._compact(book)
+        return outcomes
+
+    def _resolve(self, sid: str, outcome: str, open_time: datetime, exit_price: Optional[float] = None) -> SignalOutcome:
+        sig = self._open.pop(sid)
+        self._live.discard(sid)
+        self._books[sig.coin].open -= 1
+        if exit_price is None:
+            exit_price = sig.stop_loss if outcome == "stop_loss" else sig.take_profit
+        return SignalOutcome(sig, outcome, float(exit_price), open_time, outcome_return(sig, exit_price))
+
+    def _compact(self, book: _Book) -> None:
+        for name in ("buy_stops", "buy_targets", "short_stops", "short_targets", "by_age"):
+            heap = [entry for entry in getattr(book, name) if entry[2] in self._live]
+            heapq.heapify(heap)
+            setattr(book, name, heap)
+        book.stale = 0
+
+
+# ----------------------------
+# Notifications
+# ----------------------------
+_OUTCOME_LABELS = {"stop_loss": "🛑 Stop loss hit", "take_profit": "🎯 Take profit hit", "expired": "⌛ Expired"}
+
+
+def format_outcome_message(result: SignalOutcome) -> str:
+    sig = result.signal
+    return (
+        f"{_OUTCOME_LABELS.get(result.outcome, result.outcome)} *{sig.coin}*\n\n"
+        f"🧠 *Signal:* `{sig.action}` ({sig.model_name}, {sig.created_at:%Y-%m-%d %H:%M} UTC)\n"
+        f"💰 *Entry:* `{sig.entry}` → *Exit:* `{round(result.exit_price, 6)}`\n"
+        f"📊 *Return:* `{result.return_pct * 100:+.2f}%`"
+    )
+
+
+# ----------------------------
+# Loop
+# ----------------------------
+async def track_once(
+    tracker: OpenSignalTracker,
+    interval: str,
+    signal_cursor: Tuple[datetime, str],
+    candle_cursor: Dict[str, datetime],
+    outbox=None,
+) -> Tuple[Tuple[datetime, str], List[SignalOutcome]]:
+    """
+    One pass: load signals written after `signal_cursor`, feed the new candles
+    of every symbol with open signals and record the outcomes. Returns the
+    advanced signal cursor and the outcomes; `candle_cursor` is updated in place.
+    """
+    from app.db.connection import run_db
+    from app.db.strategy import fetch_candles_after, load_open_signals, save_signal_outcomes
+    from app.utils.metrics import REGISTRY
+
+    for sig in await run_db(load_open_signals, signal_cursor):
+        signal_cursor = max(signal_cursor, (sig.created_at, sig.signal_id))
+        if tracker.add(sig) and sig.coin not in candle_cursor:
+            # First signal of this symbol: replay from its creation.
+            candle_cursor[sig.coin] = sig.created_at - timedelta(microseconds=1)
+        elif sig.coin in candle_cursor and sig.created_at <= candle_cursor[sig.coin]:
+            logger.debug("Signal written after its candles were processed; tracked from now on | %s", sig.signal_id)
+
+    symbols = tracker.symbols()
+    if not symbols:
+        return signal_cursor, []
+
+    t0 = time.perf_counter()
+    candles = await run_db(fetch_candles_after, interval, {s: candle_cursor[s] for s in symbols if s in candle_cursor})
+    outcomes: List[SignalOutcome] = []
+    for coin, open_time, high, low, close in candles:
+        outcomes += tracker.on_candle(coin, open_time, high, low, close)
+        candle_cursor[coin] = open_time
+    REGISTRY.observe_stage("tracker_candles", time.perf_counter() - t0, len(candles))
+
+    if outcomes:
+        await run_db(save_signal_outcomes, outcomes)
+        for result in outcomes:
+            logger.info("Signal resolved | coin=%s action=%s outcome=%s return=%.4f",
+                        result.signal.coin, result.signal.action, result.outcome, result.return_pct)
+            if outbox is not None:
+                outbox.enqueue(format_outcome_message(result), key=result.signal.coin)
+    return signal_cursor, outcomes
+
+
+async def run_tracker(
+    interval: str = "1m",
+    since_days: int = 30,
+    max_age: Optional[timedelta] = None,
+    settle_seconds: float = 2.0,
+    notify: bool = False,
+    stop: Optional[asyncio.Event] = None,
+) -> None:
+    from app.daemon import CandleScheduler
+    from app.notifications.outbox import TelegramOutbox
+    from app.notifications.telegram import bot, chat_id
+
+    stop = stop or asyncio.Event()
+    scheduler = CandleScheduler([interval])
+    tracker = OpenSignalTracker(max_age=max_age)
+    signal_cursor = (datetime.utcnow() - timedelta(days=since_days), _NIL_UUID)
+    candle_cursor: Dict[str, datetime] = {}
+    logger.info("Tracker started | interval=%s since_days=%s max_age=%s notify=%s",
+                interval, since_days, max_age, notify)
+
+    async def _loop(outbox) -> None:
+        nonlocal signal_cursor
+        while not stop.is_set():
+            try:
+                signal_cursor, outcomes = await track_once(tracker, interval, signal_cursor, candle_cursor, outbox)
+                logger.info("Tracker pass | open=%s symbols=%s resolved=%s",
+                            len(tracker), len(tracker.symbols()), len(outcomes))
+            except Exception:
+                logger.exception("Tracker pass failed")
+            delay = scheduler.next_wake() + settle_seconds - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            scheduler.pop_due(time.time() - settle_seconds)
+
+    if notify:
+        async with TelegramOutbox.from_env(bot, chat_id) as outbox:
+            await _loop(outbox)
+    else:
+        await _loop(None)
+    logger.info("Tracker stopped")
+
+
+def main() -> None:
+    from app.db.connection import close_pool
+    from app.main import setup_logging
+    from app.utils.intervals import interval_seconds
+
+    parser = argparse.ArgumentParser(description="Follow open BUY/SHORT signals until stop-loss or take-profit.")
+    parser.add_argument("--interval", type=str, default=os.getenv("TRACKER_INTERVAL", "1m"),
+                        help="Kline interval whose high/low resolve the levels (default: 1m)")
+    parser.add_argument("--since-days", type=int, default=30, help="Only track signals from the last N days (default: 30)")
+    parser.add_argument("--max-age-hours", type=float, default=None,
+                        help="Expire signals still open after this many hours (default: never)")
+    parser.add_argument("--settle-seconds", type=float, default=2.0,
+                        help="Delay after each candle close before reading it (default: 2)")
+    parser.add_argument("--notify", action="store_true", help="Announce resolutions on Telegram")
+    parser.add_argument("--log-level", type=str, default="INFO", help="DEBUG, INFO, WARNING, ERROR")
+    parser.add_argument("--log-file", type=str, default=None, help="Optional log file path (rotating)")
+    args = parser.parse_args()
+
+    setup_logging(args.log_level, args.log_file)
+    try:
+        interval_seconds(args.interval)
+    except ValueError as e:
+        parser.error(str(e))
+
+    async def _run() -> None:
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(sig, stop.set)
+        await run_tracker(
+            args.interval,
+            since_days=args.since_days,
+            max_age=timedelta(hours=args.max_age_hours) if args.max_age_hours else None,
+            settle_seconds=args.settle_seconds,
+            notify=args.notify,
+            stop=stop,
+        )
+
+    try:
+        asyncio.run(_run())
+    finally:
+        close_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+from typing import Dict
+
+_UNIT_SECONDS: Dict[str, int] = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def interval_seconds(interval: str) -> int:
+    """Length of a Binance kline interval ("15m", "1h", "4h", "1d", "1w") in seconds."""
+    interval = interval.strip()
+    try:
+        n, unit = int(interval[:-1]), interval[-1]
+        return n * _UNIT_SECONDS[unit]
+    except (ValueError, KeyError, IndexError):
+        raise ValueError(f"Unsupported interval: {interval!r}") from None
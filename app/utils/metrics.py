@@ -0,0 +1,216 @@
+"""
+Per-stage timing spans and a small Prometheus-format metrics registry.
+
+RunMetrics collects the spans of one run_for_coin call (stage, seconds, rows,
+ok) and produces a JSON summary. Every span is also observed into the
+process-wide REGISTRY, which renders Prometheus text exposition format for
+the daemon's /metrics endpoint or a node_exporter textfile.
+
+Metrics:
+    strategy_stage_seconds{stage}                histogram
+    strategy_stage_rows_total{stage}             counter
+    strategy_stage_errors_total{stage}           counter
+    strategy_signals_total{strategy,action,reason}  counter (reason only for HOLD)
+    strategy_runs_total{status}                  counter
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+logger = logging.getLogger("strategies.metrics")
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(_labels(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_fmt_labels(key)} {_fmt_value(v)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}  # bucket counts..., count, sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(_labels(labels))
+        return int(series[-2]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, n in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_fmt_labels(key, [('le', _fmt_value(bound))])} {_fmt_value(n)}")
+                lines.append(f"{self.name}_bucket{_fmt_labels(key, [('le', '+Inf')])} {_fmt_value(series[-2])}")
+                lines.append(f"{self.name}_count{_fmt_labels(key)} {_fmt_value(series[-2])}")
+                lines.append(f"{self.name}_sum{_fmt_labels(key)} {_fmt_value(series[-1])}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.stage_seconds = Histogram("strategy_stage_seconds", "Wall time per run stage")
+        self.stage_rows = Counter("strategy_stage_rows_total", "Rows handled per run stage")
+        self.stage_errors = Counter("strategy_stage_errors_total", "Run stages that raised")
+        self.signals = Counter("strategy_signals_total", "Strategy decisions by action and HOLD reason")
+        self.runs = Counter("strategy_runs_total", "run_for_coin calls by outcome")
+
+    def observe_stage(self, stage: str, seconds: float, rows: Optional[int] = None, ok: bool = True) -> None:
+        self.stage_seconds.observe(seconds, stage=stage)
+        if rows is not None:
+            self.stage_rows.inc(rows, stage=stage)
+        if not ok:
+            self.stage_errors.inc(stage=stage)
+
+    def count_signal(self, strategy: str, decision: Optional[Dict[str, Any]]) -> None:
+        decision = decision if isinstance(decision, dict) else {}
+        action = str(decision.get("action") or "HOLD").upper()
+        reason = str(decision.get("reason") or "") if action == "HOLD" else ""
+        self.signals.inc(strategy=strategy, action=action, reason=reason)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in (self.stage_seconds, self.stage_rows, self.stage_errors, self.signals, self.runs):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str) -> None:
+        """Atomically write the exposition (node_exporter textfile collector format)."""
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.render())
+        os.replace(tmp, path)
+
+
+REGISTRY = Registry()
+
+
+# ----------------------------
+# Spans
+# ----------------------------
+class Span:
+    __slots__ = ("stage", "rows", "ok", "seconds", "extra")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.rows: Optional[int] = None
+        self.ok = True
+        self.seconds = 0.0
+        self.extra: Dict[str, Any] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        d: Dict[str, Any] = {"stage": self.stage, "seconds": round(self.seconds, 6), "ok": self.ok}
+        if self.rows is not None:
+            d["rows"] = self.rows
+        d.update(self.extra)
+        return d
+
+
+class RunMetrics:
+    """Spans for one run; `finish()` logs (and optionally appends) the JSON summary."""
+
+    def __init__(self, registry: Registry = REGISTRY, **context: Any):
+        self.registry = registry
+        self.context = context
+        self.spans: List[Span] = []
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    @contextmanager
+    def span(self, stage: str, rows: Optional[int] = None) -> Iterator[Span]:
+        span = Span(stage)
+        span.rows = rows
+        t0 = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.ok = False
+            raise
+        finally:
+            span.seconds = time.perf_counter() - t0
+            self.spans.append(span)
+            self.registry.observe_stage(stage, span.seconds, span.rows, span.ok)
+
+    def summary(self) -> Dict[str, Any]:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return {
+            **self.context,
+            "seconds": round(end - self.started, 6),
+            "spans": [s.to_dict() for s in self.spans],
+        }
+
+    def finish(self, status: str = "ok", json_path: Optional[str] = None, **fields: Any) -> Dict[str, Any]:
+        self.finished = time.perf_counter()
+        self.context.update(fields)
+        self.context["status"] = status
+        self.registry.runs.inc(status=status)
+        summary = self.summary()
+        logger.info("Run metrics | %s", json.dumps(summary, default=str))
+        json_path = json_path or os.getenv("RUN_METRICS_JSON")
+        if json_path:
+            try:
+                with open(json_path, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(summary, default=str) + "\n")
+            except OSError:
+                logger.exception("Could not append run metrics to %s", json_path)
+        return summary
@@ -0,0 +1,147 @@
+"""
+Cold-start helpers.
+
+- lazy_import(): module proxy that only imports on first attribute access
+  (thread-safe), so heavy libraries (pandas) are not paid for by runs that
+  never touch them.
+- load_env(): loads `.env` once per process, however many modules ask for it.
+- ImportTimer: per-module import timings for `--profile-startup`.
+"""
+
+import builtins
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+from types import ModuleType
+from typing import Dict, List, Optional, Tuple
+
+
+class _LazyModule(ModuleType):
+    """
+    Stand-in for a module bound to a module-level name (`pd = lazy_import("pandas")`).
+
+    The real module is imported with importlib.import_module on first attribute
+    access, under a lock, so concurrent first use from worker threads (run_db)
+    blocks until the import has finished instead of seeing a half-initialised
+    module. sys.modules is never touched: other importers get the real module.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_lock"] = threading.Lock()
+        self.__dict__["_lazy_module"] = None
+
+    def _lazy_load(self) -> ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            with self.__dict__["_lazy_lock"]:
+                module = self.__dict__["_lazy_module"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    # Later lookups hit the copied attributes directly; anything
+                    # added afterwards still resolves through __getattr__.
+                    self.__dict__.update(module.__dict__)
+                    self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._lazy_load(), attr)
+
+    def __dir__(self):
+        return dir(self._lazy_load())
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return `name` as a lazily imported module (the real module if it is already imported)."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f"No module named {name!r}")
+    return _LazyModule(name)
+
+
+_env_lock = threading.Lock()
+_env_loaded = False
+
+
+def load_env(path: str = ".env") -> None:
+    """Load `.env` into os.environ the first time it is called; later calls are no-ops."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if _env_loaded:
+            return
+        from dotenv import load_dotenv
+
+        load_dotenv(path)
+        _env_loaded = True
+
+
+class ImportTimer:
+    """
+    Times first-time imports made through `import` statements.
+
+    Each record is (module, self_seconds, cumulative_seconds); self time
+    excludes nested imports, like `python -X importtime`.
+    """
+
+    def __init__(self):
+        self.records: List[Tuple[str, float, float]] = []
+        self.started = time.perf_counter()
+        self._stack: List[float] = []
+        self._original = None
+
+    def install(self) -> "ImportTimer":
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+        return self
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original
+        resolved: Optional[str] = name
+        if level:
+            package = (globals or {}).get("__package__")
+            try:
+                resolved = importlib.util.resolve_name("." * level + name, package) if package else None
+            except (ImportError, ValueError):
+                resolved = None
+        if resolved is None or resolved in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        self._stack.append(0.0)
+        t0 = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - t0
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += total
+            self.records.append((resolved, total - children, total))
+
+    def report(self, top: int = 25) -> str:
+        by_module: Dict[str, Tuple[float, float]] = {}
+        for module, self_s, cum_s in self.records:
+            prev = by_module.get(module, (0.0, 0.0))
+            by_module[module] = (prev[0] + self_s, max(prev[1], cum_s))
+        rows = sorted(by_module.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        lines = [
+            f"Startup profile: {time.perf_counter() - self.started:.3f}s since start, "
+            f"{len(by_module)} modules imported",
+            f"{'cumulative ms':>14} {'self ms':>10}  module",
+        ]
+        lines += [f"{cum * 1000:14.1f} {own * 1000:10.1f}  {module}" for module, (own, cum) in rows]
+        return "\n".join(lines)
+
+
+import_timer = ImportTimer()
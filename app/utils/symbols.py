@@ -0,0 +1,25 @@
+from typing import List, Optional
+
+
+def load_symbols(symbols: Optional[str] = None, symbols_file: Optional[str] = None) -> List[str]:
+    """
+    Collect symbols from a comma/space separated string and/or a file
+    (one symbol per line, '#' starts a comment). Order is kept, duplicates dropped.
+    """
+    raw: List[str] = []
+    if symbols:
+        raw.extend(symbols.replace(",", " ").split())
+    if symbols_file:
+        with open(symbols_file, "r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.split("#", 1)[0]
+                raw.extend(line.replace(",", " ").split())
+
+    seen = set()
+    out: List[str] = []
+    for sym in raw:
+        sym = sym.strip().upper()
+        if sym and sym not in seen:
+            seen.add(sym)
+            out.append(sym)
+    return out
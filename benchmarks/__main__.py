@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Strategy / data-path benchmarks on deterministic synthetic fixtures.
+
+    python -m benchmarks                      # quick profile, compare to the baseline
+    python -m benchmarks --profile full       # up to 10k symbols / 3 years of candles
+    python -m benchmarks --filter rsi         # only cases whose name contains "rsi"
+    python -m benchmarks --update-baseline    # record a machine-local baseline.local.json
+
+Throughput is compared relative to a reference workload timed in the same run
+(see benchmarks.runner). Without --baseline the comparison uses
+baseline.local.json when it exists, else the committed baseline.json.
+
+Exits 1 when peak memory grows past --mem-tolerance, or when throughput drops
+past --tolerance against a baseline other than the committed one; against
+baseline.json throughput drops are only warned about. Re-record baseline.json
+(--update-baseline --baseline benchmarks/baseline.json) only in commits that
+are about the benchmarks themselves.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+from benchmarks.runner import (
+    DEFAULT_BASELINE, LOCAL_BASELINE, compare, load_baseline, run_all, save_baseline, to_json,
+)
+
+
+logger = logging.getLogger("strategies.benchmarks")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark strategies and data paths.")
+    parser.add_argument("--profile", choices=["quick", "full"], default="quick")
+    parser.add_argument("--filter", type=str, default=None, help="Only cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds to spend timing each case (default: 0.2)")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Baseline file (default: baseline.local.json if present, else baseline.json)")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Write results to --baseline (default: baseline.local.json) and exit 0")
+    parser.add_argument("--tolerance", type=float, default=0.30, help="Allowed throughput drop (default: 0.30)")
+    parser.add_argument("--mem-tolerance", type=float, default=0.30, help="Allowed peak memory growth (default: 0.30)")
+    parser.add_argument("--json", type=str, default=None, help="Also write raw results to this path")
+    parser.add_argument("--log-level", type=str, default="INFO")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=getattr(logging, args.log_level.upper(), logging.INFO),
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    )
+    # Strategy INFO logs would dominate both the output and the timings.
+    logging.getLogger("strategies").setLevel(logging.WARNING)
+    logger.setLevel(getattr(logging, args.log_level.upper(), logging.INFO))
+
+    results = run_all(args.profile, args.filter, min_time=args.min_time)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(to_json(results, args.profile), fh, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        path = args.baseline or LOCAL_BASELINE
+        save_baseline(path, results, args.profile)
+        logger.info("Baseline updated | path=%s cases=%s", path, len(results))
+        return 0
+
+    path = args.baseline or (LOCAL_BASELINE if os.path.exists(LOCAL_BASELINE) else DEFAULT_BASELINE)
+    baseline = load_baseline(path)
+    if baseline is None:
+        logger.warning("No baseline at %s; run with --update-baseline to create one", path)
+        return 0
+
+    # The committed baseline was recorded on someone else's machine: only
+    # memory is enforced against it, throughput drops are warnings.
+    local = os.path.abspath(path) != DEFAULT_BASELINE
+    regressions = compare(results, baseline, args.tolerance, args.mem_tolerance, fail_on_throughput=local)
+    if regressions:
+        logger.error("PERFORMANCE REGRESSION (%s):\n  %s", len(regressions), "\n  ".join(regressions))
+        return 1
+    logger.info("No regressions against %s (%s cases)", path, len(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
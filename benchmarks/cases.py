@@ -0,0 +1,163 @@
+# benchmarks/cases.py
+"""
+Benchmark cases. Each case builds its inputs in `setup(size)` (not timed) and
+`run(inputs)` is the measured operation; throughput is `size / seconds` in `unit`.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, NamedTuple
+
+import numpy as np
+
+from app.backtest.engine import simulate_trades
+from app.db.models import PredictionSeries
+from app.strategies.forecast import ForecastStrategy, right_align
+from app.strategies.rsi_momentum import RSIMomentumStrategy
+from app.strategies.rsi_state import RSIStateStore
+from benchmarks.fixtures import (
+    CANDLES,
+    legacy_prediction,
+    synthetic_klines,
+    synthetic_prediction_rows,
+    synthetic_series,
+    synthetic_universe,
+)
+
+
+class Case(NamedTuple):
+    name: str
+    unit: str
+    setup: Callable[[int], Any]
+    run: Callable[[Any], Any]
+    sizes: Dict[str, List[int]]  # profile -> sizes
+
+
+SYMBOLS_QUICK = [1, 100, 1000]
+SYMBOLS_FULL = [1, 100, 1000, 10000]
+CANDLES_QUICK = [CANDLES["week"], CANDLES["month"], CANDLES["year"]]
+CANDLES_FULL = [CANDLES["week"], CANDLES["month"], CANDLES["year"], CANDLES["3years"]]
+
+
+def _forecast_strategy() -> ForecastStrategy:
+    # Same knobs app.main uses.
+    return ForecastStrategy(fee_pct=0.0, extra_gain=0.00001, extra_loss=0.000015)
+
+
+# ----------------------------
+# ForecastStrategy
+# ----------------------------
+def _setup_forecast_dicts(n: int):
+    packages = [legacy_prediction(synthetic_prediction_rows(i)) for i in range(n)]
+    return _forecast_strategy(), packages
+
+
+def _setup_forecast_series(n: int):
+    return _forecast_strategy(), list(synthetic_universe(n).values())
+
+
+def _run_forecast_dicts(inputs) -> None:
+    strategy, packages = inputs
+    for historical, forecast in packages:
+        strategy.evaluate(historical, forecast)
+
+
+def _run_forecast_series(inputs) -> None:
+    strategy, series = inputs
+    for s in series:
+        strategy.evaluate(s.historical, s.forecast)
+
+
+def _setup_forecast_batch(n: int):
+    universe = list(synthetic_universe(n).values())
+    entry = np.array([s.entry_price for s in universe])
+    prices = [s.forecast.prices for s in universe]
+    return _forecast_strategy(), entry, right_align(prices), [len(p) for p in prices]
+
+
+def _run_forecast_batch(inputs) -> None:
+    strategy, entry, forecast, lengths = inputs
+    strategy.evaluate_batch(entry, forecast, lengths)
+
+
+# ----------------------------
+# RSIMomentumStrategy
+# ----------------------------
+def _setup_rsi_full(n: int):
+    s = synthetic_series(0)
+    return RSIMomentumStrategy(fee_pct=0.0, rsi_threshold=55), s.historical.to_list(), s.forecast.to_list(), synthetic_klines(n)
+
+
+def _run_rsi_full(inputs) -> None:
+    strategy, historical, forecast, klines = inputs
+    strategy.evaluate(historical, forecast, klines)
+
+
+def _setup_rsi_incremental(n: int):
+    s = synthetic_series(0)
+    klines = synthetic_klines(n)
+    strategy = RSIMomentumStrategy(fee_pct=0.0, rsi_threshold=55, rsi_store=RSIStateStore())
+    # Warm state as a previous run would have left it; the timed call sees one new candle.
+    strategy.evaluate(s.historical, s.forecast, klines.iloc[:-1], state_key=("BENCH", "1h"))
+    return strategy, s.historical, s.forecast, klines
+
+
+def _run_rsi_incremental(inputs) -> None:
+    strategy, historical, forecast, klines = inputs
+    strategy.evaluate(historical, forecast, klines, state_key=("BENCH", "1h"))
+
+
+# ----------------------------
+# Prediction rows -> in-memory package
+# ----------------------------
+def _setup_rows(n: int):
+    return [synthetic_prediction_rows(i) for i in range(n)]
+
+
+def _run_rows_to_dicts(all_rows) -> None:
+    for rows in all_rows:
+        legacy_prediction(rows)
+
+
+def _run_rows_to_series(all_rows) -> None:
+    for rows in all_rows:
+        PredictionSeries.from_rows(rows).as_legacy()
+
+
+# ----------------------------
+# Backtest
+# ----------------------------
+def _setup_simulate(n: int):
+    rng = np.random.default_rng(0)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, size=n + 48)))
+    start_idx = np.arange(n, dtype=np.int64)
+    entry = closes[start_idx]
+    action = rng.choice(np.array([-1, 0, 1], dtype=np.int8), size=n)
+    stop = entry * (1 - 0.01 * action)
+    tp = entry * (1 + 0.02 * action)
+    return action, entry, stop, tp, start_idx + 1, closes
+
+
+def _run_simulate(inputs) -> None:
+    action, entry, stop, tp, start_idx, closes = inputs
+    simulate_trades(action, entry, stop, tp, start_idx, closes, hold_candles=12)
+
+
+CASES: List[Case] = [
+    Case("forecast.evaluate[dicts]", "symbols", _setup_forecast_dicts, _run_forecast_dicts,
+         {"quick": SYMBOLS_QUICK, "full": SYMBOLS_FULL}),
+    Case("forecast.evaluate[series]", "symbols", _setup_forecast_series, _run_forecast_series,
+         {"quick": SYMBOLS_QUICK, "full": SYMBOLS_FULL}),
+    Case("forecast.evaluate_batch", "symbols", _setup_forecast_batch, _run_forecast_batch,
+         {"quick": SYMBOLS_FULL, "full": SYMBOLS_FULL}),
+    Case("rsi.evaluate[full]", "candles", _setup_rsi_full, _run_rsi_full,
+         {"quick": CANDLES_QUICK, "full": CANDLES_FULL}),
+    Case("rsi.evaluate[incremental]", "candles", _setup_rsi_incremental, _run_rsi_incremental,
+         {"quick": CANDLES_QUICK, "full": CANDLES_FULL}),
+    Case("fetch.rows_to_dicts", "symbols", _setup_rows, _run_rows_to_dicts,
+         {"quick": SYMBOLS_QUICK, "full": SYMBOLS_FULL}),
+    Case("fetch.rows_to_series", "symbols", _setup_rows, _run_rows_to_series,
+         {"quick": SYMBOLS_QUICK, "full": SYMBOLS_FULL}),
+    Case("backtest.simulate_trades", "runs", _setup_simulate, _run_simulate,
+         {"quick": [1000, 10000], "full": [1000, 10000, 100000]}),
+]
@@ -0,0 +1,74 @@
+# benchmarks/fixtures.py
+"""
+Deterministic synthetic data shaped like what app/db returns.
+
+Everything is derived from a seed, so the same (size, seed) always produces
+byte-identical inputs across runs and machines.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.db.models import PredictionSeries
+
+
+START = datetime(2023, 1, 1)
+
+# Candles per common history length on 1h klines.
+CANDLES = {"week": 24 * 7, "month": 24 * 30, "year": 24 * 365, "3years": 24 * 365 * 3}
+
+
+def _walk(rng: np.random.Generator, n: int, start_price: float, vol: float = 0.004) -> np.ndarray:
+    """Geometric random walk with a little drift."""
+    steps = rng.normal(0.00002, vol, size=n)
+    return start_price * np.exp(np.cumsum(steps))
+
+
+def synthetic_klines(n_candles: int, seed: int = 0, interval: timedelta = timedelta(hours=1)) -> pd.DataFrame:
+    """get_stored_klines-shaped frame: open_time (datetime64), close (float)."""
+    rng = np.random.default_rng(seed)
+    open_time = pd.date_range(START, periods=n_candles, freq=pd.Timedelta(interval))
+    return pd.DataFrame({"open_time": open_time, "close": _walk(rng, n_candles, 100.0 + seed % 1000)})
+
+
+def synthetic_prediction_rows(
+    seed: int = 0,
+    n_historical: int = 48,
+    n_forecast: int = 12,
+) -> List[Tuple[datetime, float, bool]]:
+    """(point_time, value, is_historical) rows as the prediction_points query returns them."""
+    rng = np.random.default_rng(seed)
+    prices = _walk(rng, n_historical + n_forecast, 100.0 + seed % 1000)
+    # Bias every forecast a bit so the strategies see BUYs, SHORTs and HOLDs.
+    bias = rng.choice([-0.02, 0.0, 0.02])
+    prices[n_historical:] *= 1 + bias * np.linspace(0, 1, n_forecast)
+    base = START + timedelta(hours=seed % 24)
+    return [
+        (base + timedelta(hours=i), float(p), i < n_historical)
+        for i, p in enumerate(prices)
+    ]
+
+
+def synthetic_series(seed: int = 0, n_historical: int = 48, n_forecast: int = 12) -> PredictionSeries:
+    return PredictionSeries.from_rows(
+        synthetic_prediction_rows(seed, n_historical, n_forecast),
+        metadata={"seed": seed},
+        prediction_id=f"synthetic-{seed}",
+    )
+
+
+def legacy_prediction(rows: List[Tuple[datetime, float, bool]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """The row -> dict conversion fetch_latest_prediction_with_metadata used before PredictionSeries."""
+    historical = [{"date": r[0], "price": float(r[1])} for r in rows if r[2]]
+    forecast = [{"date": r[0], "price": float(r[1])} for r in rows if not r[2]]
+    return historical, forecast
+
+
+def synthetic_universe(n_symbols: int, n_historical: int = 48, n_forecast: int = 12) -> Dict[str, PredictionSeries]:
+    """{symbol: PredictionSeries} for `n_symbols` fake symbols."""
+    return {f"SYM{i:05d}USDT": synthetic_series(i, n_historical, n_forecast) for i in range(n_symbols)}
@@ -0,0 +1,226 @@
+# benchmarks/runner.py
+"""
+Timing, peak-memory measurement and baseline comparison.
+
+Throughput is size / best-of-N seconds (best-of is the least noisy estimate
+of the code's own cost). Peak memory is measured in a separate tracemalloc'd
+call so the tracing overhead never leaks into the timings.
+
+Absolute throughput depends on the machine and its current load, so every
+case is preceded by a fixed reference workload timed the same way. The
+fastest reference time of a run is its machine-speed estimate (one case's
+reference alone swings with interpreter state). Baseline comparisons scale
+throughput by the ratio of the two estimates (this run vs the baseline's).
+
+The reference does not absorb all run-to-run noise (a single case can still
+swing by a third between processes on a shared VM), so throughput only fails
+the comparison against a machine-local baseline (LOCAL_BASELINE, not
+committed). Against the committed baseline.json throughput drops are reported
+as warnings and only peak memory, which does not depend on the machine, fails.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import logging
+import os
+import platform
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from benchmarks.cases import CASES, Case
+
+
+logger = logging.getLogger("strategies.benchmarks")
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+LOCAL_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.local.json")
+
+# Small allocations are dominated by interpreter noise; don't flag them.
+_MEM_SLACK_BYTES = 256 * 1024
+
+
+class Result(NamedTuple):
+    name: str
+    size: int
+    unit: str
+    seconds: float          # best single-call time
+    throughput: float       # units per second
+    peak_bytes: int
+    repeats: int
+    ref_seconds: float = 0.0  # reference workload, timed just before this case
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.size}"
+
+
+def _best_time(fn: Callable[[], Any], min_time: float, max_repeats: int) -> tuple:
+    """(best single-call seconds, calls) with GC paused."""
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        times: List[float] = []
+        started = time.perf_counter()
+        while len(times) < max_repeats and (len(times) < 3 or time.perf_counter() - started < min_time):
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return min(times), len(times)
+
+
+def reference_workload() -> float:
+    """Fixed mix of interpreter work (dicts, loops) and small NumPy calls, like the cases."""
+    total = 0.0
+    for i in range(2000):
+        row = {"date": i, "price": i * 0.5}
+        total += row["price"]
+    values = np.arange(20_000, dtype="float64")[::-1]
+    for _ in range(20):
+        total += float(np.sort(values[:1000]).sum())
+    return total
+
+
+def measure_reference(min_time: float = 0.05) -> float:
+    reference_workload()
+    return _best_time(reference_workload, min_time, max_repeats=50)[0]
+
+
+def measure(case: Case, size: int, min_time: float = 0.2, max_repeats: int = 50) -> Result:
+    inputs = case.setup(size)
+    case.run(inputs)  # warm-up: imports, caches, lazy pandas
+
+    ref_seconds = measure_reference(min(min_time, 0.05))
+    best, repeats = _best_time(lambda: case.run(inputs), min_time, max_repeats)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        case.run(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        case.name, size, case.unit, best, size / best if best > 0 else float("inf"), peak, repeats, ref_seconds,
+    )
+
+
+def run_all(profile: str = "quick", name_filter: Optional[str] = None, min_time: float = 0.2) -> List[Result]:
+    results: List[Result] = []
+    for case in CASES:
+        if name_filter and name_filter not in case.name:
+            continue
+        for size in case.sizes[profile]:
+            result = measure(case, size, min_time=min_time)
+            logger.info(
+                "%-28s size=%-7s %12.1f %s/s  %9.3f ms  peak=%8.1f KiB",
+                result.name, result.size, result.throughput, result.unit,
+                result.seconds * 1000, result.peak_bytes / 1024,
+            )
+            results.append(result)
+    return results
+
+
+# ----------------------------
+# Baseline
+# ----------------------------
+def to_json(results: List[Result], profile: str) -> Dict[str, Any]:
+    return {
+        "profile": profile,
+        "machine": {"python": platform.python_version(), "platform": platform.platform()},
+        "results": {
+            r.key: {
+                "unit": r.unit,
+                "seconds": r.seconds,
+                "throughput": r.throughput,
+                "peak_bytes": r.peak_bytes,
+                "ref_seconds": r.ref_seconds,
+            }
+            for r in results
+        },
+    }
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path: str, results: List[Result], profile: str) -> None:
+    existing = load_baseline(path) or {}
+    merged = to_json(results, profile)
+    # Keep entries for cases/sizes this run didn't cover (e.g. --filter, quick vs full).
+    merged["results"] = {**existing.get("results", {}), **merged["results"]}
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(merged, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def machine_speed(ref_seconds: List[float]) -> Optional[float]:
+    """Fastest reference time of a run (None when it has none)."""
+    measured = [t for t in ref_seconds if t and t > 0]
+    return min(measured) if measured else None
+
+
+def compare(
+    results: List[Result],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.30,
+    mem_tolerance: float = 0.30,
+    fail_on_throughput: bool = True,
+) -> List[str]:
+    """
+    Human-readable regressions: reference-normalized throughput below
+    baseline*(1-tolerance), or peak memory above baseline*(1+mem_tolerance).
+    Baseline entries without a reference time only get the memory check.
+    With fail_on_throughput=False throughput drops are logged, not returned.
+    """
+    regressions: List[str] = []
+    base = baseline.get("results", {})
+    run_ref = machine_speed([r.ref_seconds for r in results])
+    base_ref = machine_speed([ref.get("ref_seconds", 0.0) for ref in base.values()])
+    unnormalized = 0
+    for r in results:
+        ref = base.get(r.key)
+        if ref is None:
+            continue
+        if run_ref and base_ref and ref.get("ref_seconds"):
+            # Same code on a machine (or moment) twice as slow: half the
+            # throughput and twice the reference time -> scale factor 1.
+            scale = run_ref / base_ref
+            relative = r.throughput * scale / ref["throughput"]
+            if relative < 1 - tolerance:
+                message = (
+                    f"{r.key}: throughput {r.throughput:,.1f} {r.unit}/s is {(1 - relative) * 100:.0f}% below "
+                    f"baseline {ref['throughput']:,.1f} after normalizing for machine speed (x{scale:.2f})"
+                )
+                if fail_on_throughput:
+                    regressions.append(message)
+                else:
+                    logger.warning("Slower than baseline (not failing; record a local baseline to enforce): %s",
+                                   message)
+        else:
+            unnormalized += 1
+        ceiling = ref["peak_bytes"] * (1 + mem_tolerance) + _MEM_SLACK_BYTES
+        if r.peak_bytes > ceiling:
+            regressions.append(
+                f"{r.key}: peak memory {r.peak_bytes / 1024:,.0f} KiB > {ceiling / 1024:,.0f} KiB "
+                f"(baseline {ref['peak_bytes'] / 1024:,.0f} KiB)"
+            )
+    if unnormalized:
+        logger.warning("%s baseline entries have no reference time; throughput not compared "
+                       "(re-record with --update-baseline)", unnormalized)
+    return regressions
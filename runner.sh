@@ -11,15 +11,32 @@ for ((i=1; i<=$#; i++)); do
     coin="${!j}"
     break
   fi
+  if [[ "${!i}" == "--symbols" || "${!i}" == "--symbols-file" ]]; then
+    coin="batch"
+    break
+  fi
 done
 
+# `runner.sh daemon ...` starts the resident candle-close scheduler instead of a one-shot run
+entry=(/app/app/main.py)
+if [[ "${1:-}" == "daemon" ]]; then
+  shift
+  coin="daemon"
+  entry=(-m app.daemon)
+elif [[ "${1:-}" == "listen" ]]; then
+  # `runner.sh listen ...` runs strategies on prediction_runs NOTIFY events
+  shift
+  coin="listener"
+  entry=(-m app.listener)
+fi
+
 ts="$(date '+%Y%m%d_%H%M%S')"
 logfile="/app/script_${coin}_${ts}.log"
 echo "📄 logfile=$logfile"
 
 # Do NOT let `set -e` kill us before we can record PIPESTATUS
 set +e
-stdbuf -oL -eL python3 /app/app/main.py "$@" 2>&1 | tee -a "$logfile"
+stdbuf -oL -eL python3 "${entry[@]}" "$@" 2>&1 | tee -a "$logfile"
 status=${PIPESTATUS[0]}
 set -e
 
@@ -0,0 +1,114 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.analytics import accuracy
+from app.analytics.accuracy import accuracy_rollups, align_realized, kline_ranges, update_accuracy_rollups
+from app.strategies.forecast import ForecastStrategy
+
+T0 = datetime(2024, 1, 1)
+HOUR = timedelta(hours=1)
+
+
+def _strategy():
+    return ForecastStrategy(fee_pct=0.0, extra_gain=0.0, extra_loss=0.01, label_width=3,
+                            min_abs_gain_pct=0.01, vote_window=3)
+
+
+def _pending(pid, coin, forecast, start=T0):
+    times = [start + (i + 1) * HOUR for i in range(len(forecast))]
+    return (pid, coin, "1h", "GRU", start, 100.0, times, forecast)
+
+
+def test_align_realized_uses_the_as_of_close_within_one_interval():
+    pending = [_pending("a", "BTCUSDT", [1.0, 2.0, 3.0]), _pending("b", "ETHUSDT", [1.0])]
+    k_times = np.array([T0 + HOUR, T0 + 2 * HOUR + timedelta(minutes=30)], dtype="datetime64[ns]")
+    klines = {("BTCUSDT", "1h"): (k_times, np.array([10.0, 20.0]))}
+
+    assert kline_ranges(pending)[("BTCUSDT", "1h")] == (T0, T0 + 3 * HOUR)
+    rows = align_realized(pending, klines)
+    # Step 2 (02:00) precedes the 02:30 candle, so it reuses 01:00; step 3 gets 02:30.
+    np.testing.assert_array_equal(rows[0][7], [10.0, 10.0, 20.0])
+    assert np.isnan(rows[1][7]).all()  # no klines for ETH
+
+    stale = {("BTCUSDT", "1h"): (np.array([T0 - 5 * HOUR], dtype="datetime64[ns]"), np.array([1.0]))}
+    assert np.isnan(align_realized(pending[:1], stale)[0][7]).all()
+
+
+def test_accuracy_rollups_per_step_and_per_signal():
+    rows = [
+        # Forecast up, price went up: BUY hit.
+        ("a", "BTCUSDT", "1h", "GRU", T0, 100.0, [102.0, 104.0, 106.0], np.array([101.0, 103.0, 105.0])),
+        # Forecast up, price went down: BUY miss.
+        ("b", "BTCUSDT", "1h", "GRU", T0, 100.0, [102.0, 104.0, 106.0], np.array([99.0, 98.0, 97.0])),
+    ]
+    rollups = accuracy_rollups(rows, _strategy())
+
+    assert [r[-1] for r in rollups.runs] == [3, 3]
+    step1 = rollups.steps[0]
+    assert step1[:6] == ("BTCUSDT", "1h", "GRU", 1, 2, 1)
+    assert step1[6] == pytest.approx(1.0 + 3.0)  # |102-101| + |102-99|
+    assert step1[9] == pytest.approx(1.0 + 3.0)  # bias: forecast above realized
+
+    calibration = {(r[3], r[4]): r[5:] for r in rollups.calibration}
+    assert calibration[("action", "BUY")] == (2, 1, pytest.approx(0.05 - 0.03))
+    assert calibration[("up_votes", "3")][:2] == (2, 1)
+    # Forecast path never reached the stop; the realized path of run b did.
+    assert calibration[("path_buy", "ok")][:2] == (2, 1)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """update_accuracy_rollups against canned pending batches; records keyset cursors and watermark moves."""
+    class _DB:
+        watermark = None
+        batches = []
+        afters = []
+        advanced = []
+
+    db = _DB()
+
+    @contextmanager
+    def _connection():
+        class _Conn:
+            def cursor(self):
+                class _Cursor:
+                    def close(self):
+                        pass
+                return _Cursor()
+        yield _Conn()
+
+    def _pending(cursor, after, limit):
+        db.afters.append(after)
+        return db.batches.pop(0) if db.batches else []
+
+    monkeypatch.setattr(accuracy, "get_connection", _connection)
+    monkeypatch.setattr(accuracy, "lock_accuracy_rollups", lambda cursor: None)
+    monkeypatch.setattr(accuracy, "fetch_accuracy_watermark", lambda cursor: db.watermark)
+    monkeypatch.setattr(accuracy, "advance_accuracy_watermark", lambda cursor, start: db.advanced.append(start))
+    monkeypatch.setattr(accuracy, "fetch_pending_accuracy_runs", _pending)
+    monkeypatch.setattr(accuracy, "fetch_kline_ranges", lambda cursor, ranges: {})
+    monkeypatch.setattr(accuracy, "write_accuracy_rollups", lambda cursor, *rollups: None)
+    return db
+
+
+def test_update_resumes_from_the_stored_watermark(fake_db):
+    fake_db.watermark = (T0, "run-9")
+    fake_db.batches = [[_pending("run-10", "BTCUSDT", [1.0], start=T0 + HOUR)]]
+
+    totals = update_accuracy_rollups(_strategy(), batch_runs=1)
+
+    assert fake_db.afters == [(T0, "run-9"), (T0 + HOUR, "run-10")]
+    assert fake_db.advanced == [(T0, "run-9")]  # recomputed from where this call started
+    assert totals["runs"] == 1
+
+
+def test_update_starts_at_the_epoch_without_a_watermark_and_since_leaves_it_alone(fake_db):
+    update_accuracy_rollups(_strategy())
+    assert fake_db.afters[0][0] == datetime(1970, 1, 1) and len(fake_db.advanced) == 1
+
+    fake_db.watermark = (T0, "run-9")
+    update_accuracy_rollups(_strategy(), since=T0 - HOUR)
+    assert fake_db.afters[-1][0] == T0 - HOUR and len(fake_db.advanced) == 1
@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtest.engine import BUY, HOLD, SHORT, backtest_coin, forecast_signals, simulate_trades, summarize
+from app.db.fetch import PredictionHistory
+from app.strategies.forecast import ForecastStrategy
+
+
+def _random_runs(n: int, horizon: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    entry = 100 + rng.normal(0, 5, n)
+    drift = rng.normal(0, 0.004, (n, 1))
+    forecast = entry[:, None] * np.cumprod(1 + drift + rng.normal(0, 0.002, (n, horizon)), axis=1)
+    return entry, forecast
+
+
+def test_forecast_signals_match_scalar_evaluate():
+    entry, forecast = _random_runs(400, 12)
+    strategy = ForecastStrategy(fee_pct=0.0, extra_gain=0.00001, extra_loss=0.02)
+    signals = forecast_signals(strategy, entry, forecast)
+
+    for i in range(len(entry)):
+        decision = strategy.evaluate(
+            [{"date": None, "price": entry[i]}],
+            [{"date": None, "price": p} for p in forecast[i]],
+        )
+        expected = {"BUY": BUY, "SHORT": SHORT, "HOLD": HOLD}[decision["action"]]
+        assert signals.action[i] == expected
+        if expected != HOLD:
+            assert round(signals.stop_loss[i], 4) == decision["stop_loss"]
+            assert round(signals.take_profit[i], 4) == decision["take_profit"]
+
+    assert (signals.action == BUY).any() and (signals.action == SHORT).any()
+
+
+def test_simulate_trades_stop_target_and_time_exits():
+    closes = np.array([100, 101, 103, 99, 97, 100, 100], dtype=float)
+    action = np.array([BUY, SHORT, BUY, HOLD], dtype=np.int8)
+    entry = np.array([100.0, 100.0, 100.0, 100.0])
+    stop = np.array([98.0, 102.0, 90.0, np.nan])
+    target = np.array([102.5, 96.0, 200.0, np.nan])
+    start = np.array([1, 1, 4, 1])
+
+    out = simulate_trades(action, entry, stop, target, start, closes, hold_candles=4)
+
+    assert out["exit_reason"].tolist() == [2, 1, 3, 0]
+    assert out["exit_price"][:3].tolist() == [102.5, 102.0, 100.0]
+    assert out["bars_held"][:3].tolist() == [2, 2, 3]
+    np.testing.assert_allclose(out["pnl_pct"][:3], [0.025, -0.02, 0.0])
+    assert np.isnan(out["pnl_pct"][3])
+
+
+def test_backtest_coin_and_summary():
+    times = pd.date_range("2024-01-01", periods=48, freq="h")
+    klines = pd.DataFrame({"open_time": times, "close": np.linspace(100, 110, 48)})
+    history = PredictionHistory(
+        np.array(["a", "b"], dtype=object),
+        times[[10, 20]].to_numpy(),
+        times[[10, 20]].to_numpy(),
+        np.array([klines["close"][10], klines["close"][20]]),
+        np.vstack([np.linspace(1.01, 1.05, 12) * klines["close"][10], np.full(12, klines["close"][20])]),
+    )
+    strategy = ForecastStrategy(fee_pct=0.0, extra_gain=0.0, extra_loss=0.05, min_abs_gain_pct=0.001)
+
+    trades = backtest_coin("BTCUSDT", history, klines, strategy)
+    assert trades["action"].tolist() == [BUY, HOLD]
+    assert trades["exit_reason"].tolist() == [2, 0]
+
+    summary = summarize(trades)
+    assert summary["coin"].tolist() == ["BTCUSDT", "ALL"]
+    assert summary.loc[summary["coin"] == "ALL", "trades"].item() == 1
+
+
+def test_sweep_parallel_matches_serial():
+    from app.backtest.sweep import SweepData, grid_combos, parse_param_space, random_combos, run_sweep
+
+    rng = np.random.default_rng(1)
+    entry, forecast = _random_runs(60, 12, seed=1)
+    closes = np.concatenate([entry[:30] * (1 + rng.normal(0, 0.01, 30)), entry[30:] * (1 + rng.normal(0, 0.01, 30))])
+    data = SweepData(
+        entry=entry,
+        forecast=forecast,
+        start_idx=np.arange(60, dtype=np.int64),
+        end_idx=np.repeat([30, 60], 30).astype(np.int64),
+        rsi=rng.uniform(0, 100, 60),
+        coin_idx=np.repeat([0, 1], 30).astype(np.int32),
+        closes=closes,
+    )
+    space = parse_param_space(["extra_gain=0,0.002", "vote_strict=true,false", "rsi_threshold=none,50"])
+    combos = grid_combos(space)
+    assert len(combos) == 8
+    assert len(random_combos(space, 5, seed=3)) == 5
+
+    serial = run_sweep(data, combos, workers=1)
+    parallel = run_sweep(data, combos, workers=2, chunk_size=3)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_param_space_dedupes_values_and_rejects_none_for_numeric_params():
+    from app.backtest.sweep import parse_param_space, random_combos
+
+    space = parse_param_space(["extra_gain=0.001,0.001", "vote_window=3,5,3", "hold_candles=none,6"])
+    assert space == {"extra_gain": [0.001], "vote_window": [3, 5], "hold_candles": [None, 6]}
+    assert len(random_combos(space, 100)) == 4  # every distinct combination, then stops
+    assert len(random_combos({"extra_gain": [0.001, 0.001]}, 5)) == 1  # raw lists with repeats, too
+
+    with pytest.raises(ValueError, match="extra_gain"):
+        parse_param_space(["extra_gain=none,0.001"])
+
+
+def test_sweep_loads_coins_through_the_engine_loader(monkeypatch):
+    from app.backtest import sweep
+
+    entry, forecast = _random_runs(3, 4)
+    t0 = np.datetime64("2024-01-02T00:00", "ns")
+    history = PredictionHistory(
+        np.array(["a", "b", "c"], dtype=object),
+        np.array([t0] * 3),
+        t0 + np.arange(3) * np.timedelta64(1, "h"),
+        entry,
+        forecast,
+    )
+    klines = pd.DataFrame({
+        "open_time": pd.date_range("2024-01-01", periods=48, freq="h"),
+        "close": np.linspace(90, 110, 48),
+    })
+    calls = []
+
+    def _load(coin, interval, model_name, start=None, end=None, rsi_warmup_days=30):
+        calls.append(coin)
+        return (history, klines) if coin == "BTCUSDT" else None
+
+    monkeypatch.setattr(sweep, "load_coin", _load)
+    data = sweep.load_sweep_data(["ETHUSDT", "BTCUSDT"], "1h", "GRU")
+
+    assert calls == ["ETHUSDT", "BTCUSDT"]
+    assert data.coin_idx.tolist() == [1, 1, 1] and len(data.closes) == 48
+    assert data.start_idx.tolist() == [25, 26, 27] and np.isfinite(data.rsi).all()
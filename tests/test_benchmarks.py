@@ -0,0 +1,54 @@
+import logging
+
+import pandas as pd
+
+from benchmarks.cases import CASES
+from benchmarks.fixtures import synthetic_klines, synthetic_prediction_rows
+from benchmarks.runner import Result, compare, measure
+
+
+def test_fixtures_are_deterministic():
+    pd.testing.assert_frame_equal(synthetic_klines(100, seed=3), synthetic_klines(100, seed=3))
+    assert synthetic_prediction_rows(7) == synthetic_prediction_rows(7)
+    assert synthetic_prediction_rows(7) != synthetic_prediction_rows(8)
+
+
+def test_every_case_runs_at_its_smallest_size():
+    for case in CASES:
+        size = min(case.sizes["quick"])
+        result = measure(case, size, min_time=0.0, max_repeats=3)
+        assert result.throughput > 0 and result.peak_bytes >= 0
+
+
+def _result(throughput, peak, ref_seconds=0.01):
+    return Result("case", 10, "symbols", 10 / throughput, throughput, peak, 3, ref_seconds)
+
+
+def test_compare_flags_throughput_and_memory_regressions():
+    baseline = {"results": {"case@10": {"throughput": 1000.0, "peak_bytes": 1_000_000, "ref_seconds": 0.01}}}
+    assert compare([_result(800.0, 1_000_000)], baseline) == []
+    slow = compare([_result(500.0, 1_000_000)], baseline)
+    assert len(slow) == 1 and "throughput" in slow[0]
+    fat = compare([_result(1000.0, 3_000_000)], baseline)
+    assert len(fat) == 1 and "peak memory" in fat[0]
+    assert compare([_result(1.0, 1)], {"results": {}}) == []
+
+
+def test_compare_normalizes_throughput_by_the_reference_workload():
+    baseline = {"results": {"case@10": {"throughput": 1000.0, "peak_bytes": 1_000_000, "ref_seconds": 0.01}}}
+    # Machine (or load) twice as slow: half the throughput, twice the reference time.
+    assert compare([_result(500.0, 1_000_000, ref_seconds=0.02)], baseline) == []
+    # Same machine speed, half the throughput: a real regression.
+    assert len(compare([_result(500.0, 1_000_000, ref_seconds=0.01)], baseline)) == 1
+    # Legacy baselines without a reference time are not compared on throughput.
+    legacy = {"results": {"case@10": {"throughput": 1000.0, "peak_bytes": 1_000_000}}}
+    assert compare([_result(1.0, 1_000_000)], legacy) == []
+
+
+def test_compare_only_warns_about_throughput_when_asked_to(caplog):
+    baseline = {"results": {"case@10": {"throughput": 1000.0, "peak_bytes": 1_000_000, "ref_seconds": 0.01}}}
+    with caplog.at_level(logging.WARNING, logger="strategies.benchmarks"):
+        assert compare([_result(500.0, 1_000_000)], baseline, fail_on_throughput=False) == []
+    assert "case@10" in caplog.text
+    fat = compare([_result(500.0, 3_000_000)], baseline, fail_on_throughput=False)
+    assert len(fat) == 1 and "peak memory" in fat[0]
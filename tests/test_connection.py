@@ -0,0 +1,84 @@
+import psycopg2
+import pytest
+
+from app.db import connection
+from app.db.connection import PREPARED_STATEMENTS, _to_positional, execute_prepared
+
+
+class FakeConnection:
+    def __init__(self, pooled=True):
+        self.autocommit = False
+        if pooled:
+            self.prepared = set()
+            self.unpreparable = set()
+
+
+class FakeCursor:
+    def __init__(self, conn, fail_prepare=False):
+        self.connection = conn
+        self.fail_prepare = fail_prepare
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        head = " ".join(sql.split())
+        self.executed.append((head, params))
+        if self.fail_prepare and head.startswith("PREPARE"):
+            raise psycopg2.ProgrammingError("cannot prepare")
+
+
+@pytest.fixture(autouse=True)
+def _prepare_on(monkeypatch):
+    monkeypatch.setenv("DB_PREPARE", "1")
+
+
+def _heads(cursor):
+    return [h.split(" ")[0] if not h.startswith(("SAVEPOINT", "RELEASE", "ROLLBACK")) else h for h, _ in cursor.executed]
+
+
+def test_to_positional_rewrites_every_placeholder_including_multi_digit():
+    sql = " ".join(f"${i}" for i in range(1, 12))
+    assert _to_positional(sql, 11) == " ".join(["%s"] * 11)  # $11 is not read as $1 + "1"
+    assert "$" not in _to_positional(PREPARED_STATEMENTS["upsert_run_memo"], 5)
+
+
+def test_prepares_once_per_connection_and_again_on_a_new_one():
+    conn = FakeConnection()
+    cursor = FakeCursor(conn)
+    execute_prepared(cursor, "latest_kline_open_time", ("BTCUSDT", "1h"))
+    execute_prepared(cursor, "latest_kline_open_time", ("ETHUSDT", "1h"))
+
+    assert _heads(cursor) == [
+        "SAVEPOINT prepare_statement", "PREPARE", "RELEASE SAVEPOINT prepare_statement", "EXECUTE", "EXECUTE",
+    ]
+    assert cursor.executed[-1] == ("EXECUTE latest_kline_open_time (%s, %s)", ("ETHUSDT", "1h"))
+    assert conn.prepared == {"latest_kline_open_time"}
+
+    fresh = FakeCursor(FakeConnection())  # e.g. the pool replaced a broken connection
+    execute_prepared(fresh, "latest_kline_open_time", ("BTCUSDT", "1h"))
+    assert any(h.startswith("PREPARE") for h, _ in fresh.executed)
+
+
+def test_falls_back_to_plain_execute_when_prepare_fails():
+    conn = FakeConnection()
+    cursor = FakeCursor(conn, fail_prepare=True)
+    execute_prepared(cursor, "run_memo", ("BTCUSDT", "1h", "GRU"))
+
+    assert _heads(cursor) == [
+        "SAVEPOINT prepare_statement", "PREPARE", "ROLLBACK TO SAVEPOINT prepare_statement", "SELECT",
+    ]
+    assert cursor.executed[-1][1] == ("BTCUSDT", "1h", "GRU")
+    assert conn.unpreparable == {"run_memo"} and not conn.prepared
+
+    execute_prepared(cursor, "run_memo", ("ETHUSDT", "1h", "GRU"))
+    assert _heads(cursor)[-1] == "SELECT"  # not retried on this connection
+
+
+def test_unpooled_connection_or_disabled_prepare_sends_plain_sql(monkeypatch):
+    cursor = FakeCursor(FakeConnection(pooled=False))
+    execute_prepared(cursor, "prediction_points", ("abc",))
+    assert _heads(cursor) == ["SELECT"]
+
+    monkeypatch.setattr(connection, "prepare_enabled", lambda: False)
+    pooled = FakeCursor(FakeConnection())
+    execute_prepared(pooled, "prediction_points", ("abc",))
+    assert _heads(pooled) == ["SELECT"] and not pooled.connection.prepared
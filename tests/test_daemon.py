@@ -0,0 +1,79 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from app.daemon import CandleScheduler, HealthState, interval_seconds, next_close, start_health_server
+
+
+def _ts(s: str) -> float:
+    return datetime.fromisoformat(s).replace(tzinfo=timezone.utc).timestamp()
+
+
+def test_interval_seconds():
+    assert interval_seconds("15m") == 900
+    assert interval_seconds("4h") == 4 * 3600
+    assert interval_seconds("1w") == 7 * 86400
+    with pytest.raises(ValueError):
+        interval_seconds("1M")
+
+
+@pytest.mark.parametrize(
+    "interval, now, expected",
+    [
+        ("1h", "2024-05-01 10:15:00", "2024-05-01 11:00:00"),
+        ("1h", "2024-05-01 11:00:00", "2024-05-01 12:00:00"),  # exactly at a close -> the next one
+        ("4h", "2024-05-01 10:15:00", "2024-05-01 12:00:00"),
+        ("1d", "2024-05-01 23:59:59", "2024-05-02 00:00:00"),
+        ("1w", "2024-05-01 10:00:00", "2024-05-06 00:00:00"),  # weekly candles close on Monday
+    ],
+)
+def test_next_close_is_utc_aligned(interval, now, expected):
+    assert next_close(interval, _ts(now)) == _ts(expected)
+
+
+def test_scheduler_pops_due_intervals_and_skips_missed_closes():
+    now = [_ts("2024-05-01 10:15:00")]
+    sched = CandleScheduler(["1h", "4h"], clock=lambda: now[0])
+    assert sched.next_wake() == _ts("2024-05-01 11:00:00")
+    assert sched.pop_due(_ts("2024-05-01 10:59:59")) == []
+
+    assert sched.pop_due(_ts("2024-05-01 11:00:00")) == [("1h", _ts("2024-05-01 11:00:00"))]
+    assert sched.next_due["1h"] == _ts("2024-05-01 12:00:00")
+
+    # Stalled for hours: each interval runs once, for its latest close.
+    due = dict(sched.pop_due(_ts("2024-05-01 14:30:00")))
+    assert due == {"1h": _ts("2024-05-01 14:00:00"), "4h": _ts("2024-05-01 12:00:00")}
+
+
+def test_health_endpoint_reports_status():
+    now = [_ts("2024-05-01 10:15:00")]
+    sched = CandleScheduler(["1h"], clock=lambda: now[0])
+    health = HealthState(sched, clock=lambda: now[0])
+
+    async def fetch(path):
+        server = await start_health_server(health, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {path} HTTP/1.0\r\n\r\n".encode())
+        raw = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        head, body = raw.split(b"\r\n\r\n", 1)
+        return head.split(b"\r\n")[0].decode(), body
+
+    status, body = asyncio.run(fetch("/healthz"))
+    assert status.endswith("200 OK")
+    assert json.loads(body)["status"] == "ok"
+
+    now[0] = _ts("2024-05-01 11:00:00")
+    sched.pop_due(now[0])
+    health.record("1h", _ts("2024-05-01 11:00:00"), {"succeeded": 0, "failed": 3})
+    status, body = asyncio.run(fetch("/healthz"))
+    assert status.endswith("503 Service Unavailable")
+    assert json.loads(body)["intervals"]["1h"]["failed"] == 3
+
+    status, _ = asyncio.run(fetch("/nope"))
+    assert "404" in status
@@ -0,0 +1,195 @@
+import asyncio
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import app.db.fetch as fetch
+from app.db.connection import pool_max
+from app.db.models import PredictionSeries
+import app.main as main
+from app.strategies.memo import RunMemo
+
+
+class _Sink:
+    def __init__(self):
+        self.rows = []
+        self.flushes = 0
+        self.callbacks = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add(self, coin, model_name, signal):
+        self.rows.append((coin, model_name, signal))
+
+    def after_flush(self, callback):
+        self.callbacks.append(callback)
+
+    def flush(self):
+        self.flushes += 1
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+def _package(rally: bool):
+    forecast = [101.0, 105.0, 110.0, 115.0, 120.0] if rally else [100.0] * 5
+    return ([{"price": 100.0}], [{"price": p} for p in forecast], {})
+
+
+def _klines():
+    return pd.DataFrame({
+        "open_time": pd.date_range("2024-01-01", periods=60, freq="h"),
+        "close": np.linspace(110.0, 100.0, 60),  # falling: RSI never confirms a BUY
+    })
+
+
+def test_run_matrix_shares_prediction_and_kline_loading(monkeypatch):
+    prediction_calls, kline_calls = [], []
+    in_flight = [0, 0]  # current, max
+    lock = threading.Lock()
+
+    def _predictions(keys):
+        keys = list(keys)
+        prediction_calls.append(keys)
+        # BTC forecasts a rally for every model, ETH holds.
+        return {k: _package(k[0] == "BTCUSDT") for k in keys}
+
+    def _pair_klines(coin, start, end, interval):
+        with lock:
+            kline_calls.append((coin, interval))
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return _klines()
+
+    def _run_klines(*args, **kwargs):
+        raise AssertionError("klines fetched per run")
+
+    monkeypatch.setattr(main, "fetch_latest_predictions_bulk", _predictions)
+    monkeypatch.setattr(fetch, "get_stored_klines", _pair_klines)
+    monkeypatch.setattr(main, "get_stored_klines", _run_klines)
+    monkeypatch.setattr(main, "rsi_store", None)
+
+    sink = _Sink()
+    summary = asyncio.run(main.run_matrix(
+        ["BTCUSDT", "ETHUSDT"], ["1h", "4h"], ["GRU", "LSTM"], sink=sink, record_skipped=False,
+    ))
+
+    assert summary["total"] == 8 and summary["failed"] == 0
+    assert len(prediction_calls) == 1 and len(prediction_calls[0]) == 8
+    # Klines once per (symbol, interval) that can still confirm, shared by both models.
+    assert sorted(kline_calls) == [("BTCUSDT", "1h"), ("BTCUSDT", "4h")]
+    assert summary["kline_loads"] == 2
+    assert in_flight[1] == min(2, pool_max())  # pairs load concurrently
+    assert {m for _, m, _ in sink.rows} >= {"GRU", "LSTM", "GRU+RSIMomentumStrategy", "LSTM+RSIMomentumStrategy"}
+    assert sink.flushes == 1
+
+
+def test_run_batch_keeps_symbol_keyed_results(monkeypatch):
+    monkeypatch.setattr(main, "fetch_latest_predictions_bulk", lambda keys: {k: _package(False) for k in keys})
+    summary = asyncio.run(main.run_batch(["BTCUSDT"], "1h", sink=_Sink()))
+    assert list(summary["results"]) == ["BTCUSDT"]
+    assert summary["interval"] == "1h" and summary["failed_symbols"] == []
+
+
+def test_run_for_coin_does_db_io_off_the_loop_and_overlaps_writes(monkeypatch):
+    loop_thread = threading.get_ident()
+    threads = []
+    in_flight = [0, 0]  # current, max
+    lock = threading.Lock()
+
+    def _prediction(coin, interval, model):
+        threads.append(threading.get_ident())
+        return _package(True)
+
+    def _save(coin, model_name, signal):
+        threads.append(threading.get_ident())
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+
+    monkeypatch.setattr(main, "fetch_latest_prediction_with_metadata", _prediction)
+    monkeypatch.setattr(main, "get_stored_klines", lambda *a, **k: _klines())
+    monkeypatch.setattr(main, "save_strategy_signal", _save)
+    monkeypatch.setattr(main, "rsi_store", None)
+
+    asyncio.run(main.run_for_coin("BTCUSDT", "1h"))
+
+    assert len(threads) == 4 and loop_thread not in threads
+    # Forecast, RSI and combined rows are written concurrently (up to the DB thread count).
+    assert in_flight[1] == min(3, pool_max())
+
+
+def _series_package(prediction_id: str):
+    times = pd.date_range("2024-01-01", periods=6, freq="h")
+    series = PredictionSeries(times.values, [100.0] * 6, [True] + [False] * 5, prediction_id=prediction_id)
+    return series.historical, series.forecast, {}
+
+
+def test_run_is_memoized_only_once_its_signals_are_stored(monkeypatch):
+    saved_on = []
+    memo = RunMemo(load=lambda slot: None, save=lambda *args: saved_on.append(threading.get_ident()))
+    monkeypatch.setattr(main, "run_memo", memo)
+    monkeypatch.setattr(main, "rsi_store", None)
+
+    def _failing_save(coin, model_name, signal):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(main, "save_strategy_signal", _failing_save)
+    asyncio.run(main.run_for_coin("BTCUSDT", "1h", prediction=_series_package("run-1")))
+    assert memo._entries == {}
+
+    monkeypatch.setattr(main, "save_strategy_signal", lambda *args: None)
+    asyncio.run(main.run_for_coin("BTCUSDT", "1h", prediction=_series_package("run-1")))
+    assert list(memo._entries) == [("BTCUSDT", "1h", main.DEFAULT_MODEL)]
+    assert len(saved_on) == 1 and threading.get_ident() not in saved_on  # backend write off the loop
+
+    # Buffered signals: memoized when the sink has written them, not before.
+    sink = _Sink()
+    asyncio.run(main.run_for_coin("ETHUSDT", "1h", sink=sink, prediction=_series_package("run-2")))
+    assert ("ETHUSDT", "1h", main.DEFAULT_MODEL) not in memo._entries
+    sink.flush()
+    assert ("ETHUSDT", "1h", main.DEFAULT_MODEL) in memo._entries
+
+
+class _FrozenDatetime(datetime):
+    @classmethod
+    def utcnow(cls):
+        return cls(2024, 1, 3, 15, 30)
+
+
+def _windowed(start, end):
+    """What the DB would return for [start, end]: the last candle opened at 15:00 on 2024-01-03."""
+    times = pd.date_range("2024-01-01 00:00", "2024-01-03 15:00", freq="h")
+    df = pd.DataFrame({"open_time": times, "close": np.linspace(100.0, 110.0, len(times))})
+    return df[(df.open_time >= pd.to_datetime(start)) & (df.open_time <= pd.to_datetime(end))].reset_index(drop=True)
+
+
+def test_kline_window_includes_candles_opened_after_midnight(monkeypatch):
+    seen = []
+
+    def _single(coin, start, end, interval):
+        seen.append(_windowed(start, end))
+        return seen[-1]
+
+    monkeypatch.setattr(main, "datetime", _FrozenDatetime)
+    monkeypatch.setattr(main, "get_stored_klines", _single)
+    monkeypatch.setattr(fetch, "get_stored_klines", _single)
+    monkeypatch.setattr(main, "fetch_latest_predictions_bulk", lambda keys: {k: _package(True) for k in keys})
+    monkeypatch.setattr(main, "rsi_store", None)
+
+    asyncio.run(main.run_for_coin("BTCUSDT", "1h", since_days=2, sink=_Sink(), prediction=_package(True)))
+    asyncio.run(main.run_matrix(["BTCUSDT"], ["1h"], ["GRU"], since_days=2, sink=_Sink()))
+
+    assert len(seen) == 2
+    for df in seen:
+        assert df["open_time"].iloc[-1] == pd.Timestamp("2024-01-03 15:00")
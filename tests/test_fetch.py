@@ -0,0 +1,198 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.db import fetch
+from app.db.fetch import (
+    SharedKlines,
+    fetch_latest_predictions_bulk,
+    fetch_prediction_history,
+)
+from app.db.pgbinary import SIGNATURE
+
+T0 = datetime(2024, 1, 1)
+H = timedelta(hours=1)
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = []
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def bulk(monkeypatch):
+    """Point fetch_latest_predictions_bulk at canned rows of the latest_predictions_bulk query."""
+    def _install(rows):
+        cursor = FakeCursor(rows)
+
+        @contextmanager
+        def _connection():
+            class _Conn:
+                def cursor(self):
+                    return cursor
+            yield _Conn()
+
+        def _execute(cur, name, params):
+            assert name == "latest_predictions_bulk"
+            cur.params.append(params)
+
+        monkeypatch.setattr(fetch, "get_connection", _connection)
+        monkeypatch.setattr(fetch, "execute_prepared", _execute)
+        return cursor
+    return _install
+
+
+def test_maps_rows_to_keys_and_fills_missing_ones(bulk):
+    btc, eth, sol = ("BTCUSDT", "1h", "GRU"), ("ETHUSDT", "1h", "GRU"), ("SOLUSDT", "4h", "LSTM")
+    cursor = bulk([
+        (*btc, "run-btc", {"m": 1}, [T0, T0 + H, T0 + 2 * H], [100.0, 101.0, 103.0], [True, True, False]),
+        # A run whose points array_agg'd to NULL (no points stored yet).
+        (*eth, "run-eth", {"m": 2}, None, None, None),
+    ])
+
+    out = fetch_latest_predictions_bulk([btc, eth, btc, sol])
+
+    # Duplicate keys are sent once, in first-seen order.
+    assert cursor.params == [(["BTCUSDT", "ETHUSDT", "SOLUSDT"], ["1h", "1h", "4h"], ["GRU", "GRU", "LSTM"])]
+    assert list(out) == [btc, eth, sol]
+
+    historical, forecast, metadata = out[btc]
+    assert list(historical) == [{"date": T0, "price": 100.0}, {"date": T0 + H, "price": 101.0}]
+    assert list(forecast) == [{"date": T0 + 2 * H, "price": 103.0}]
+    assert metadata == {"m": 1} and historical.series.prediction_id == "run-btc"
+
+    historical, forecast, metadata = out[eth]
+    assert len(historical) == 0 and len(forecast) == 0 and metadata == {"m": 2}
+    assert out[sol] == ([], [], {})
+
+
+def test_null_elements_follow_the_series_null_policy(bulk):
+    key = ("BTCUSDT", "1h", "GRU")
+    bulk([(*key, "run", None, [T0, T0 + H, T0 + 2 * H], [100.0, None, 102.0], [True, True, None])])
+
+    historical, forecast, metadata = fetch_latest_predictions_bulk([key])[key]
+    assert list(historical) == [{"date": T0, "price": 100.0}]
+    assert list(forecast) == [{"date": T0 + 2 * H, "price": 102.0}]
+    assert metadata == {}
+
+
+def test_no_keys_skips_the_query(bulk):
+    cursor = bulk([])
+    assert fetch_latest_predictions_bulk([]) == {}
+    assert cursor.params == []
+
+
+def test_shared_klines_load_each_key_once_across_threads(monkeypatch):
+    loads = []
+
+    def _single(coin, start, end, interval):
+        loads.append((coin, interval))
+        time.sleep(0.05)  # every thread arrives while the first load is in flight
+        return pd.DataFrame({"close": [1.0]})
+
+    monkeypatch.setattr(fetch, "get_stored_klines", _single)
+    klines = SharedKlines("2024-01-01", "2024-01-02")
+    frames = []
+    threads = [threading.Thread(target=lambda: frames.append(klines.get("BTCUSDT", "1h"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loads == [("BTCUSDT", "1h")] and klines.loads == 1
+    assert len(frames) == 8 and all(f is frames[0] for f in frames)
+
+
+def test_shared_klines_failed_load_is_retried(monkeypatch):
+    calls = []
+
+    def _single(coin, start, end, interval):
+        calls.append(coin)
+        if len(calls) == 1:
+            raise RuntimeError("db down")
+        return pd.DataFrame({"close": [1.0]})
+
+    monkeypatch.setattr(fetch, "get_stored_klines", _single)
+    klines = SharedKlines("2024-01-01", "2024-01-02")
+    with pytest.raises(RuntimeError):
+        klines.get("BTCUSDT", "1h")
+    assert klines.get("BTCUSDT", "1h")["close"].tolist() == [1.0]
+    assert calls == ["BTCUSDT", "BTCUSDT"]
+
+
+class HistoryCursor:
+    """prediction_runs rows for the first query, then the points by binary COPY or the text protocol."""
+
+    def __init__(self, runs, points):
+        self.runs, self.points = runs, points
+        self.copies = 0
+        self._rows = []
+
+    def execute(self, sql, params):
+        self._rows = self.runs if "FROM prediction_runs" in sql else self.points
+
+    def fetchall(self):
+        return self._rows
+
+    def mogrify(self, sql, params):
+        return b"SELECT 1"
+
+    def copy_expert(self, sql, out):
+        self.copies += 1
+        buf = bytearray(SIGNATURE + bytes(8))
+        for run_no, t, v, h in self.points:
+            buf += (4).to_bytes(2, "big") + (8).to_bytes(4, "big") + run_no.to_bytes(8, "big")
+            buf += (8).to_bytes(4, "big") + ((t - datetime(2000, 1, 1)) // timedelta(microseconds=1)).to_bytes(8, "big")
+            buf += (8).to_bytes(4, "big") + np.array(v, dtype=">f8").tobytes()
+            buf += (1).to_bytes(4, "big") + bytes([h])
+        out.write(bytes(buf + b"\xff\xff"))
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("binary", ["1", "0"])
+def test_prediction_history_right_aligns_forecasts_and_drops_runs_without_points(monkeypatch, binary):
+    monkeypatch.setenv("DB_BINARY_COPY", binary)
+    runs = [("run-a", T0), ("run-empty", T0 + H), ("run-b", T0 + 2 * H)]
+    points = [
+        (0, T0, 100.0, True), (0, T0 + H, 101.0, False), (0, T0 + 2 * H, 102.0, False),
+        (2, T0 + 2 * H, 200.0, True), (2, T0 + 3 * H, 201.0, True), (2, T0 + 4 * H, 202.0, False),
+    ]
+    cursor = HistoryCursor(runs, points)
+
+    @contextmanager
+    def _connection():
+        class _Conn:
+            def cursor(self):
+                return cursor
+
+            def rollback(self):
+                pass
+        yield _Conn()
+
+    monkeypatch.setattr(fetch, "get_connection", _connection)
+    history = fetch_prediction_history("BTCUSDT", "1h", "GRU")
+
+    assert cursor.copies == (1 if binary == "1" else 0)
+    assert list(history.prediction_ids) == ["run-a", "run-b"]
+    np.testing.assert_array_equal(history.created_at, np.array([T0, T0 + 2 * H], dtype="datetime64[ns]"))
+    np.testing.assert_array_equal(history.entry_price, [100.0, 201.0])
+    np.testing.assert_array_equal(history.entry_time, np.array([T0, T0 + 3 * H], dtype="datetime64[ns]"))
+    np.testing.assert_array_equal(history.forecast, [[101.0, 102.0], [np.nan, 202.0]])
+
+    cursor.runs = []
+    empty = fetch_prediction_history("BTCUSDT", "1h", "GRU")
+    assert len(empty.prediction_ids) == 0 and empty.forecast.shape == (0, 0)
@@ -0,0 +1,117 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from app.strategies.forecast import ForecastStrategy, right_align
+
+
+def _points(prices):
+    return [{"date": None, "price": float(p)} for p in prices]
+
+
+def _cases(seed: int = 0):
+    rng = np.random.default_rng(seed)
+    entries, forecasts = [], []
+    for _ in range(300):
+        entry = 100 + rng.normal(0, 5)
+        length = int(rng.integers(0, 16))
+        drift = rng.normal(0, 0.004)
+        path = entry * np.cumprod(1 + drift + rng.normal(0, 0.003, length))
+        entries.append(entry)
+        forecasts.append(path)
+    # Edge rows: no historical price, one forecast point, flat forecast.
+    entries += [np.nan, 100.0, 100.0]
+    forecasts += [np.full(12, 101.0), np.array([101.0]), np.full(12, 100.0)]
+    return np.array(entries), forecasts
+
+
+@pytest.mark.parametrize(
+    "label_width,vote_window,vote_strict,enforce_path_stop",
+    list(itertools.product([1, 6, 12], [3, 5, 20], [True, False], [True, False])),
+)
+def test_evaluate_batch_matches_scalar(label_width, vote_window, vote_strict, enforce_path_stop):
+    strategy = ForecastStrategy(
+        fee_pct=0.0,
+        extra_gain=0.00001,
+        extra_loss=0.004,
+        label_width=label_width,
+        vote_window=vote_window,
+        vote_strict=vote_strict,
+        enforce_path_stop=enforce_path_stop,
+    )
+    entries, forecasts = _cases()
+
+    batch = strategy.evaluate_batch(entries, right_align(forecasts))
+    for entry, forecast, got in zip(entries, forecasts, batch):
+        historical = [] if np.isnan(entry) else _points([entry])
+        assert got == strategy.evaluate(historical, _points(forecast))
+
+
+def _nan_cases(seed: int = 7):
+    """Rows shorter than any label width, and rows with NaN prices (first, inside, last, all)."""
+    entries, forecasts = _cases(seed)
+    rng = np.random.default_rng(seed)
+    for f in forecasts[:120]:
+        if len(f):
+            f[rng.integers(0, len(f), size=1 + len(f) // 4)] = np.nan
+    entries = np.concatenate([entries, [100.0] * 6])
+    forecasts += [
+        np.array([np.nan, 102.0, 103.0]),             # leading NaN: only explicit lengths can tell
+        np.array([np.nan, np.nan]),
+        np.array([102.0, np.nan, 104.0, 105.0]),
+        np.array([101.0, 102.0, np.nan]),
+        np.array([99.0, np.nan]),
+        np.array([np.nan]),
+    ]
+    return entries, forecasts
+
+
+@pytest.mark.parametrize(
+    "label_width,vote_window,vote_strict",
+    list(itertools.product([-3, 0, 1, 2, 6, 40], [-2, 0, 1, 3, 20], [True, False])),
+)
+def test_evaluate_batch_matches_scalar_for_short_rows_and_nan_prices(label_width, vote_window, vote_strict):
+    strategy = ForecastStrategy(
+        fee_pct=0.0, extra_gain=0.00001, extra_loss=0.004,
+        label_width=label_width, vote_window=vote_window, vote_strict=vote_strict,
+    )
+    entries, forecasts = _nan_cases()
+
+    batch = strategy.evaluate_batch(entries, right_align(forecasts), [len(f) for f in forecasts])
+    for entry, forecast, got in zip(entries, forecasts, batch):
+        historical = [] if np.isnan(entry) else _points([entry])
+        assert got == strategy.evaluate(historical, _points(forecast)), (entry, forecast.tolist())
+
+    # Without lengths only rows that start with a NaN price are ambiguous.
+    inferred = strategy.evaluate_batch(entries, right_align(forecasts))
+    for forecast, got, want in zip(forecasts, inferred, batch):
+        if not (len(forecast) and np.isnan(forecast[0])):
+            assert got == want
+
+
+def test_right_align_pads_left():
+    m = right_align([[1, 2], [3, 4, 5], []])
+    assert m.shape == (3, 3)
+    assert np.isnan(m[0, 0]) and m[0, 1:].tolist() == [1, 2]
+    assert m[1].tolist() == [3, 4, 5]
+    assert np.isnan(m[2]).all()
+
+
+def test_evaluate_on_prediction_series_matches_dicts():
+    from app.db.models import PredictionSeries
+
+    strategy = ForecastStrategy(fee_pct=0.0, extra_gain=0.00001, extra_loss=0.004)
+    entries, forecasts = _cases(seed=5)
+    times = np.arange(40).astype("datetime64[h]").astype("datetime64[ns]")
+    for entry, forecast in zip(entries, forecasts):
+        if np.isnan(entry):
+            continue
+        prices = np.concatenate([[entry], forecast])
+        hist = np.arange(len(prices)) == 0
+        series = PredictionSeries(times[: len(prices)], prices, hist)
+        historical, fc, _ = series.as_legacy()
+
+        assert [p["price"] for p in historical] == [entry]
+        assert [p["price"] for p in fc] == forecast.tolist()
+        assert strategy.evaluate(historical, fc) == strategy.evaluate(_points([entry]), _points(forecast))
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ta.momentum import RSIIndicator
+from ta.trend import MACD, EMAIndicator
+from ta.volatility import AverageTrueRange, BollingerBands
+
+from app.strategies.crossover import EMACrossoverStrategy
+from app.strategies.indicators import IndicatorFrame, IndicatorService
+from app.strategies.pipeline import RunContext, StrategyPipeline
+
+
+def _klines(n=120, seed=3, trend=0.0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(trend, 1.0, n))
+    return pd.DataFrame({
+        "open_time": pd.date_range("2024-01-01", periods=n, freq="h"),
+        "high": close + rng.uniform(0.1, 1.0, n),
+        "low": close - rng.uniform(0.1, 1.0, n),
+        "close": close,
+    })
+
+
+def test_indicators_match_ta():
+    df = _klines()
+    frame = IndicatorFrame.from_klines(df)
+    close = df["close"]
+
+    np.testing.assert_allclose(frame.ema(12), EMAIndicator(close, 12).ema_indicator(), equal_nan=True)
+    np.testing.assert_allclose(frame.rsi(14), RSIIndicator(close, 14).rsi(), equal_nan=True)
+    macd = MACD(close, window_slow=26, window_fast=12, window_sign=9)
+    for ours, theirs in zip(frame.macd(), (macd.macd(), macd.macd_signal(), macd.macd_diff())):
+        np.testing.assert_allclose(ours, theirs, equal_nan=True)
+    bb = BollingerBands(close, window=20, window_dev=2)
+    for ours, theirs in zip(frame.bollinger(), (bb.bollinger_mavg(), bb.bollinger_hband(), bb.bollinger_lband())):
+        np.testing.assert_allclose(ours, theirs, equal_nan=True)
+    atr = AverageTrueRange(df["high"], df["low"], close, window=14).average_true_range()
+    np.testing.assert_allclose(frame.atr(14)[13:], atr[13:])
+
+
+def test_frame_shares_intermediates():
+    frame = IndicatorFrame.from_klines(_klines())
+    values = frame.compute(["macd", ("ema", 26), ("atr",)])
+    assert set(values) == {("macd", 12, 26, 9), ("ema", 26), ("atr", 14)}
+    assert frame.ema(12) is frame.ema(12)
+    # MACD is built from the same EMA arrays a crossover reads.
+    np.testing.assert_array_equal(values[("macd", 12, 26, 9)][0], frame.ema(12) - frame.ema(26))
+    with pytest.raises(ValueError):
+        frame.compute(["vwap"])
+
+
+def test_service_caches_per_last_candle_with_lru_eviction():
+    service = IndicatorService(max_entries=2)
+    df = _klines()
+    frame = service.frame("BTCUSDT", "1h", df)
+    assert service.frame("BTCUSDT", "1h", df.copy()) is frame
+    assert service.frame("BTCUSDT", "1h", _klines(n=121)) is not frame  # new candle, new frame
+    service.frame("ETHUSDT", "1h", df)
+    assert service.frame("BTCUSDT", "1h", df) is not frame  # evicted
+    assert (service.hits, service.misses) == (1, 4)
+    assert service.frame("BTCUSDT", "1h", df.iloc[:0]) is None
+
+
+def test_ema_crossover_confirms_with_the_trend():
+    historical = [{"price": 100.0}]
+    rally = [{"price": p} for p in (101.0, 105.0, 110.0)]
+
+    def _run(klines):
+        service = IndicatorService()  # the fixtures share their last candle
+        ctx = RunContext("BTCUSDT", "1h", historical, rally, loaders={
+            "klines": lambda: klines,
+            "indicators": lambda: service.frame("BTCUSDT", "1h", ctx.get("klines")),
+        })
+        return StrategyPipeline([EMACrossoverStrategy()]).run({"action": "BUY", "entry": 100.0}, ctx)
+
+    up = _run(_klines(trend=0.5)).final
+    assert up["action"] == "BUY" and up["confirmed_by"] == "EMA" and up["ema_fast"] > up["ema_slow"]
+    assert _run(_klines(trend=-0.5)).final["action"] == "HOLD"
+    assert _run(_klines(n=10)).confirmations[0][1]["reason"] == "EMA not ready"
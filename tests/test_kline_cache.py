@@ -0,0 +1,131 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.db.kline_cache import KlineCache
+
+NOW = pd.Timestamp.now().floor("h")
+H = pd.Timedelta(hours=1)
+
+
+class FakeLoader:
+    """get_stored_klines-shaped loader over an in-memory table; records every range it is asked for."""
+
+    def __init__(self, n=48):
+        times = pd.date_range(NOW - (n - 1) * H, NOW, freq=H)
+        self.table = pd.DataFrame({"open_time": times, "close": np.arange(n, dtype="float64")})
+        self.calls = []
+
+    def __call__(self, coin, interval, lo, hi):
+        self.calls.append((pd.Timestamp(lo), pd.Timestamp(hi)))
+        t = self.table
+        return t[(t.open_time >= lo) & (t.open_time <= hi)].reset_index(drop=True)
+
+
+@pytest.fixture
+def loader():
+    return FakeLoader()
+
+
+def _rows_on_disk(root, coin="BTCUSDT", interval="1h"):
+    with open(os.path.join(root, f"{coin}__{interval}", "meta.json"), encoding="utf-8") as fh:
+        return json.load(fh)["rows"]
+
+
+def test_second_get_only_fetches_from_the_high_water_mark(tmp_path, loader):
+    cache = KlineCache(str(tmp_path), loader)
+    first = cache.get("BTCUSDT", "1h", NOW - 10 * H, NOW + 5 * H)
+    assert len(first) == 11 and loader.calls == [(NOW - 10 * H, NOW + 5 * H)]
+
+    # The last candle was still open (its close changed) and a new one arrived.
+    loader.table.loc[loader.table.index[-1], "close"] = 999.0
+    loader.table.loc[len(loader.table)] = [NOW + H, 1000.0]
+    second = cache.get("BTCUSDT", "1h", NOW - 10 * H, NOW + 5 * H)
+
+    assert loader.calls[1] == (NOW, NOW + 5 * H)  # re-reads the tail candle, nothing older
+    assert second["close"].tolist()[-2:] == [999.0, 1000.0]
+    assert second["open_time"].tolist() == list(pd.date_range(NOW - 10 * H, NOW + H, freq=H))
+
+    cache.get("BTCUSDT", "1h", NOW - 5 * H, NOW - 2 * H)  # fully inside the cached range
+    assert len(loader.calls) == 2
+
+
+def test_earlier_start_backfills_before_the_cached_range(tmp_path, loader):
+    cache = KlineCache(str(tmp_path), loader)
+    cache.get("BTCUSDT", "1h", NOW - 5 * H, NOW - 2 * H)
+    out = cache.get("BTCUSDT", "1h", NOW - 20 * H, NOW - 2 * H)
+
+    assert loader.calls[1] == (NOW - 20 * H, NOW - 5 * H)
+    assert len(out) == 19 and out["open_time"].is_monotonic_increasing
+    assert _rows_on_disk(tmp_path) == 19
+
+    # The DB has nothing older than its first candle: asking again does not backfill again.
+    cache.get("BTCUSDT", "1h", NOW - 100 * H, NOW - 50 * H)
+    cache.get("BTCUSDT", "1h", NOW - 100 * H, NOW - 50 * H)
+    assert [c for c in loader.calls if c[0] == NOW - 100 * H] == [(NOW - 100 * H, NOW - 20 * H)]
+
+
+def test_evicts_old_rows_by_age_and_old_keys_by_size(tmp_path, loader):
+    aged = KlineCache(str(tmp_path / "age"), loader, max_age_days=10 / 24)
+    assert len(aged.get("BTCUSDT", "1h", NOW - 30 * H, NOW)) == 31
+    assert _rows_on_disk(tmp_path / "age") == 31  # the window being read is kept, however old
+    assert len(aged.get("BTCUSDT", "1h", NOW - 30 * H, NOW)) == 31
+    assert loader.calls[-1] == (NOW, NOW)  # so reading it again only re-reads the tail
+    aged.get("BTCUSDT", "1h", NOW - 5 * H, NOW)
+    assert _rows_on_disk(tmp_path / "age") <= 11  # only the last ~10 hours are kept on disk
+
+    sized = KlineCache(str(tmp_path / "size"), loader)
+    sized.get("BTCUSDT", "1h", NOW - 10 * H, NOW)
+    os.utime(tmp_path / "size" / "BTCUSDT__1h", (0, 0))  # least recently used
+    entry_bytes = sum(e.stat().st_size for e in os.scandir(tmp_path / "size" / "BTCUSDT__1h"))
+    sized.max_bytes = 2 * entry_bytes + 64  # room for two entries (meta.json length varies a little)
+    sized.get("ETHUSDT", "1h", NOW - 10 * H, NOW)
+    sized.get("SOLUSDT", "1h", NOW - 10 * H, NOW)
+    assert sorted(os.listdir(tmp_path / "size")) == ["ETHUSDT__1h", "SOLUSDT__1h"]
+
+
+def test_empty_backfill_is_remembered(tmp_path, loader):
+    cache = KlineCache(str(tmp_path), loader)
+    cache.get("BTCUSDT", "1h", NOW - 47 * H, NOW - 40 * H)  # the DB's first candle
+    loader.table = loader.table.iloc[1:]  # the backfill (which re-reads it) comes back empty
+    cache.get("BTCUSDT", "1h", NOW - 100 * H, NOW - 45 * H)
+    assert loader.calls[-1] == (NOW - 100 * H, NOW - 47 * H) and len(loader.calls) == 2
+
+    again = KlineCache(str(tmp_path), loader)  # from disk, not from this instance
+    assert len(again.get("BTCUSDT", "1h", NOW - 100 * H, NOW - 45 * H)) == 3
+    assert len(loader.calls) == 2
+
+
+def test_size_eviction_skips_keys_being_read(tmp_path, loader):
+    cache = KlineCache(str(tmp_path), loader, max_bytes=0)
+    cache.get("BTCUSDT", "1h", NOW - 10 * H, NOW)
+    cache.get("ETHUSDT", "1h", NOW - 10 * H, NOW)
+    assert os.listdir(tmp_path) == []  # nothing fits in a zero budget
+
+    cache.max_bytes = 10**9
+    cache.get("BTCUSDT", "1h", NOW - 10 * H, NOW)
+    cache.max_bytes = 0
+    with cache._lock(cache._key_dir("BTCUSDT", "1h")):  # another thread is inside get()
+        cache.get("ETHUSDT", "1h", NOW - 10 * H, NOW)
+    assert os.listdir(tmp_path) == ["BTCUSDT__1h"]
+
+
+@pytest.mark.parametrize("damage", ["corrupt", "missing", "mismatch"])
+def test_damaged_entry_falls_back_to_a_full_load(tmp_path, loader, damage):
+    cache = KlineCache(str(tmp_path), loader)
+    cache.get("BTCUSDT", "1h", NOW - 10 * H, NOW)
+    key_dir = tmp_path / "BTCUSDT__1h"
+    if damage == "corrupt":
+        (key_dir / "open_time.npy").write_bytes(b"not a numpy file")
+    elif damage == "missing":
+        (key_dir / "close.npy").unlink()
+    else:
+        np.save(key_dir / "close.npy", np.zeros(3))
+
+    out = cache.get("BTCUSDT", "1h", NOW - 10 * H, NOW)
+    assert loader.calls[-1] == (NOW - 10 * H, NOW)
+    assert out["close"].tolist() == list(np.arange(37, 48, dtype="float64"))
+    assert _rows_on_disk(tmp_path) == 11
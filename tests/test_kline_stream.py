@@ -0,0 +1,114 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import app.db.kline_stream as ks
+from app.db.pgbinary import SIGNATURE
+
+
+def _chunks(total, size, start="2024-01-01T00"):
+    times = np.arange(np.datetime64(start, "h"), np.datetime64(start, "h") + total).astype("datetime64[ns]")
+    closes = np.arange(total, dtype="float64")
+    for i in range(0, total, size):
+        yield {"open_time": times[i:i + size], "close": closes[i:i + size]}
+
+
+def test_chunk_query_rejects_unknown_columns():
+    assert "COALESCE(close::float8" in ks._chunk_query(("close",))
+    with pytest.raises(ValueError):
+        ks._chunk_query(("close; DROP TABLE binance_klines",))
+
+
+def test_read_klines_fills_preallocated_buffers_in_order(monkeypatch):
+    monkeypatch.setattr(ks, "iter_kline_chunks", lambda *a, **k: _chunks(25, 10))
+    out = ks.read_klines("BTCUSDT", "1h", "2024-01-01T00:00", "2024-01-02T00:00")
+    assert out["open_time"].dtype == np.dtype("datetime64[ns]")
+    assert np.array_equal(out["close"], np.arange(25.0))
+    assert np.all(np.diff(out["open_time"]) == np.timedelta64(1, "h"))
+
+
+def test_read_klines_grows_when_the_window_estimate_is_short(monkeypatch):
+    # A 2h window sized for 3 candles, but the table returns 7 (e.g. duplicated timeframe labels).
+    monkeypatch.setattr(ks, "iter_kline_chunks", lambda *a, **k: _chunks(7, 3))
+    out = ks.read_klines("BTCUSDT", "1h", "2024-01-01T00:00", "2024-01-01T02:00")
+    assert len(out["open_time"]) == 7 and np.array_equal(out["close"], np.arange(7.0))
+
+
+class FakeKlineCursor:
+    """Answers the keyset chunk query over an in-memory table, by binary COPY or the text protocol."""
+
+    def __init__(self, table):
+        self.table = table  # [(open_time, close)], ascending
+        self.afters = []
+        self._params = None
+        self._rows = []
+
+    def _select(self, params):
+        coin, interval, after, end, limit = params
+        self.afters.append(after)
+        assert len(self.afters) <= len(self.table) + 1, "keyset is not advancing"
+        return [r for r in self.table if after < r[0] <= end][:limit]
+
+    def mogrify(self, query, params):
+        self._params = params
+        return b"SELECT 1"
+
+    def copy_expert(self, sql, out):
+        buf = bytearray(SIGNATURE + bytes(8))
+        for t, close in self._select(self._params):
+            buf += (2).to_bytes(2, "big")
+            buf += (8).to_bytes(4, "big") + ((t - datetime(2000, 1, 1)) // timedelta(microseconds=1)).to_bytes(8, "big")
+            buf += (8).to_bytes(4, "big") + np.array(close, dtype=">f8").tobytes()
+        out.write(bytes(buf + b"\xff\xff"))
+
+    def execute(self, query, params):
+        self._rows = self._select(params)
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def table(monkeypatch):
+    def _install(rows):
+        cursor = FakeKlineCursor(rows)
+
+        @contextmanager
+        def _connection():
+            class _Conn:
+                def cursor(self):
+                    return cursor
+
+                def rollback(self):
+                    pass
+            yield _Conn()
+
+        monkeypatch.setattr(ks, "get_connection", _connection)
+        return cursor
+    return _install
+
+
+@pytest.mark.parametrize("binary", ["1", "0"])
+@pytest.mark.parametrize("total,chunk_rows", [(25, 10), (20, 10), (7, 1)])
+def test_keyset_chunks_neither_repeat_nor_skip_rows_at_boundaries(table, monkeypatch, binary, total, chunk_rows):
+    monkeypatch.setenv("DB_BINARY_COPY", binary)
+    t0 = datetime(2024, 1, 1)
+    # Sub-second open_times so a boundary rounded to the second would repeat or drop a row.
+    rows = [(t0 + timedelta(hours=i, microseconds=i * 1001), float(i)) for i in range(total + 5)]
+    cursor = table(rows)
+
+    chunks = list(ks.iter_kline_chunks("BTCUSDT", "1h", rows[0][0], rows[total - 1][0], chunk_rows=chunk_rows))
+
+    assert all(len(c["open_time"]) <= chunk_rows for c in chunks)
+    closes = np.concatenate([c["close"] for c in chunks])
+    np.testing.assert_array_equal(closes, np.arange(total, dtype="float64"))  # start and end are inclusive
+    times = np.concatenate([c["open_time"] for c in chunks])
+    np.testing.assert_array_equal(times, np.array([t for t, _ in rows[:total]], dtype="datetime64[ns]"))
+    # Each query resumes right after the last row of the previous chunk.
+    assert cursor.afters[1:] == [rows[i * chunk_rows - 1][0] for i in range(1, len(cursor.afters))]
+    assert len(cursor.afters) == total // chunk_rows + 1
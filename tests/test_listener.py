@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from app.listener import Debouncer, parse_notification
+
+
+def test_parse_notification():
+    payload = json.dumps({"prediction_id": "x", "coin": "BTCUSDT", "interval": "1h", "model_name": "GRU"})
+    assert parse_notification(payload) == ("BTCUSDT", "1h", "GRU")
+    assert parse_notification("not json") is None
+    assert parse_notification(json.dumps({"coin": "BTCUSDT"})) is None
+    assert parse_notification(json.dumps({"coin": "", "interval": "1h", "model_name": "GRU"})) is None
+
+
+def test_debouncer_coalesces_bursts_per_key():
+    calls = []
+
+    async def dispatch(key):
+        calls.append(key)
+
+    async def scenario():
+        deb = Debouncer(dispatch, delay=0.02, max_delay=1.0)
+        for _ in range(5):
+            deb.push("a")
+            await asyncio.sleep(0.005)
+        deb.push("b")
+        await asyncio.sleep(0.1)
+        await deb.drain()
+
+    asyncio.run(scenario())
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_debouncer_max_delay_bounds_a_steady_stream():
+    fired_at = []
+
+    async def dispatch(key):
+        fired_at.append(asyncio.get_running_loop().time())
+
+    async def scenario():
+        deb = Debouncer(dispatch, delay=0.05, max_delay=0.1)
+        start = asyncio.get_running_loop().time()
+        while asyncio.get_running_loop().time() - start < 0.25:
+            deb.push("a")
+            await asyncio.sleep(0.01)
+        await deb.close()
+        return start
+
+    start = asyncio.run(scenario())
+    assert len(fired_at) >= 2
+    assert fired_at[0] - start < 0.2
+
+
+def test_debouncer_reruns_key_notified_while_running():
+    calls = []
+    gate = None
+
+    async def dispatch(key):
+        calls.append(key)
+        if len(calls) == 1:
+            await gate.wait()
+
+    async def scenario():
+        nonlocal gate
+        gate = asyncio.Event()
+        deb = Debouncer(dispatch, delay=0.01)
+        deb.push("a")
+        await asyncio.sleep(0.05)  # first run is in flight
+        deb.push("a")
+        deb.push("a")
+        gate.set()
+        await asyncio.sleep(0.05)
+        await deb.drain()
+
+    asyncio.run(scenario())
+    assert calls == ["a", "a"]  # one follow-up run, not one per notification
@@ -0,0 +1,53 @@
+from app.strategies.forecast import ForecastStrategy
+from app.strategies.memo import RunMemo, memo_key, params_hash
+from app.strategies.rsi_momentum import RSIMomentumStrategy
+from app.strategies.rsi_state import RSIStateStore
+
+SLOT = ("BTCUSDT", "1h", "GRU")
+
+
+def test_params_hash_tracks_scalar_parameters_only():
+    def _hash(threshold=55, **extra):
+        rsi = RSIMomentumStrategy(rsi_threshold=threshold, rsi_store=RSIStateStore())
+        return params_hash(ForecastStrategy(fee_pct=0.0), rsi, **extra)
+
+    assert _hash() == _hash()  # a different store instance is not a parameter change
+    assert _hash() != _hash(threshold=60)
+    assert _hash() != _hash(record_skipped=False)
+
+
+def test_memo_hits_only_for_the_latest_key():
+    memo = RunMemo()
+    key = memo_key("run-1", None, "abc")
+    assert memo.get(SLOT, key) is None
+
+    memo.put(SLOT, key, {"action": "HOLD"})
+    assert memo.get(SLOT, key) == {"action": "HOLD"}
+    assert memo.get(SLOT, memo_key("run-1", "2024-01-01 10:00:00", "abc")) is None
+
+    memo.put(SLOT, memo_key("run-2", None, "abc"), {"action": "BUY"})
+    assert memo.get(SLOT, key) is None
+    assert (memo.hits, memo.misses) == (1, 3)
+
+
+def test_memo_reads_through_and_writes_to_backend():
+    stored = {SLOT: ("k1", {"action": "SHORT"})}
+    saved = []
+    memo = RunMemo(load=stored.get, save=lambda slot, key, d: saved.append((slot, key, d)))
+
+    assert memo.get(SLOT, "k1") == {"action": "SHORT"}
+    memo.put(SLOT, "k2", {"action": "HOLD"})
+    assert saved == [(SLOT, "k2", {"action": "HOLD"})]
+
+
+def test_memo_survives_backend_errors_and_can_be_disabled():
+    def _boom(*args):
+        raise RuntimeError("db down")
+
+    memo = RunMemo(load=_boom, save=_boom)
+    memo.put(SLOT, "k", {"action": "HOLD"})  # logged, kept in memory
+    assert memo.get(SLOT, "k") == {"action": "HOLD"}
+
+    off = RunMemo(enabled=False)
+    off.put(SLOT, "k", {"action": "HOLD"})
+    assert off.get(SLOT, "k") is None
@@ -0,0 +1,47 @@
+import json
+
+import pytest
+
+from app.utils.metrics import Registry, RunMetrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    reg = Registry()
+    for v in (0.004, 0.03, 2.0):
+        reg.observe_stage("kline_fetch", v, rows=10)
+    text = reg.render()
+    assert 'strategy_stage_seconds_bucket{stage="kline_fetch",le="0.005"} 1' in text
+    assert 'strategy_stage_seconds_bucket{stage="kline_fetch",le="0.05"} 2' in text
+    assert 'strategy_stage_seconds_bucket{stage="kline_fetch",le="+Inf"} 3' in text
+    assert 'strategy_stage_seconds_count{stage="kline_fetch"} 3' in text
+    assert 'strategy_stage_rows_total{stage="kline_fetch"} 30' in text
+
+
+def test_signal_counter_keeps_reason_only_for_hold():
+    reg = Registry()
+    reg.count_signal("ForecastStrategy", {"action": "BUY", "reason": "Forecast up + votes + path ok"})
+    reg.count_signal("ForecastStrategy", {"action": "HOLD", "reason": "move<required"})
+    reg.count_signal("ForecastStrategy", None)
+    assert reg.signals.value(strategy="ForecastStrategy", action="BUY", reason="") == 1
+    assert reg.signals.value(strategy="ForecastStrategy", action="HOLD", reason="move<required") == 1
+    assert reg.signals.value(strategy="ForecastStrategy", action="HOLD", reason="") == 1
+
+
+def test_run_metrics_spans_summary_and_errors(tmp_path):
+    reg = Registry()
+    run = RunMetrics(registry=reg, coin="BTCUSDT", interval="1h")
+    with run.span("prediction_fetch") as span:
+        span.rows = 60
+    with pytest.raises(RuntimeError):
+        with run.span("kline_fetch"):
+            raise RuntimeError("db down")
+
+    path = tmp_path / "runs.jsonl"
+    summary = run.finish("error", json_path=str(path), action=None)
+
+    assert [s["stage"] for s in summary["spans"]] == ["prediction_fetch", "kline_fetch"]
+    assert summary["spans"][0]["rows"] == 60 and summary["spans"][1]["ok"] is False
+    assert summary["coin"] == "BTCUSDT" and summary["status"] == "error"
+    assert json.loads(path.read_text().strip()) == json.loads(json.dumps(summary))
+    assert reg.stage_errors.value(stage="kline_fetch") == 1
+    assert reg.runs.value(status="error") == 1
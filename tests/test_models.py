@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.db.models import PredictionSeries, as_datetime64
+from app.db.pgbinary import parse_copy_binary, SIGNATURE
+
+T0 = datetime(2024, 1, 1, 12, 30, 0, 123456)
+H = timedelta(hours=1)
+
+
+def _copy_buffer(rows):
+    """A binary COPY stream of (timestamp, float8, bool) rows, as the server would send it."""
+    pg_epoch = datetime(2000, 1, 1)
+    out = bytearray(SIGNATURE + b"\x00\x00\x00\x00" + b"\x00\x00\x00\x00")
+    for t, v, h in rows:
+        out += (3).to_bytes(2, "big")
+        out += (8).to_bytes(4, "big") + ((t - pg_epoch) // timedelta(microseconds=1)).to_bytes(8, "big", signed=True)
+        out += (8).to_bytes(4, "big") + np.array(v, dtype=">f8").tobytes()
+        out += (1).to_bytes(4, "big") + bytes([h])
+    return bytes(out + b"\xff\xff")
+
+
+def test_text_rows_and_binary_copy_give_the_same_series_for_null_points():
+    rows = [
+        (T0, 100.0, True),
+        (T0 + H, None, True),        # NULL value: dropped
+        (T0 + 2 * H, 101.5, True),
+        (T0 + 3 * H, 102.0, None),   # NULL flag: forecast
+        (T0 + 4 * H, 103.0, False),
+        (None, 104.0, False),        # NULL time (sorts last): dropped
+    ]
+    text = PredictionSeries.from_rows(rows)
+    assert len(PredictionSeries.from_rows(rows[:-1])) == 4  # a NULL value alone is dropped too
+
+    # What _POINTS_BINARY_QUERY selects for the same run (WHERE ... NOT NULL, COALESCE(flag, false)).
+    copied = [(t, v, bool(h)) for t, v, h in rows if t is not None and v is not None]
+    binary = PredictionSeries(*parse_copy_binary(_copy_buffer(copied), ("timestamp", "float8", "bool")))
+
+    np.testing.assert_array_equal(text.times, binary.times)
+    np.testing.assert_array_equal(text.prices, binary.prices)
+    np.testing.assert_array_equal(text.is_historical, binary.is_historical)
+    assert list(text.historical) == list(binary.historical)
+    assert list(text.forecast) == list(binary.forecast)
+    assert text.entry_price == 101.5
+
+
+def test_rows_keep_their_datetimes_until_times_is_read():
+    aware = [(T0.replace(tzinfo=timezone(timedelta(hours=2))) + i * H, float(i), i % 2 == 0) for i in range(4)]
+    series = PredictionSeries.from_rows(aware)
+    historical, forecast, _ = series.as_legacy()  # interleaved flags: masked, not sliced
+
+    assert [p["date"] for p in historical] == [T0 - 2 * H, T0]
+    assert forecast[1] == {"date": T0 + H, "price": 3.0}
+    np.testing.assert_array_equal(forecast.times, as_datetime64([T0 - H, T0 + H]))
+    assert series.times[0] == np.datetime64(T0 - 2 * H, "ns")
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+
+from app.strategies.rsi_momentum import RSIMomentumStrategy
+from app.strategies.rsi_state import IncrementalRSI, RSIStateStore
+
+
+def _klines(n: int, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, n))
+    open_time = pd.date_range("2024-01-01", periods=n, freq="h")
+    return pd.DataFrame({"open_time": open_time, "close": close})
+
+
+def _times(df: pd.DataFrame) -> np.ndarray:
+    return df["open_time"].to_numpy(dtype="datetime64[ns]").view("int64")
+
+
+def test_incremental_rsi_matches_ta():
+    df = _klines(500)
+    expected = RSIIndicator(close=df["close"]).rsi().to_numpy()
+
+    state = IncrementalRSI(14)
+    got = np.array([state.update(c) for c in df["close"]])
+
+    assert np.array_equal(np.isnan(expected), np.isnan(got))
+    np.testing.assert_allclose(got[~np.isnan(got)], expected[~np.isnan(expected)], rtol=0, atol=1e-12)
+
+
+def test_incremental_rsi_flat_series_is_100_like_ta():
+    close = pd.Series([5.0] * 30)
+    expected = RSIIndicator(close=close).rsi().iloc[-1]
+    state = IncrementalRSI(14)
+    for c in close:
+        state.update(c)
+    assert state.value == expected == 100
+
+
+def test_store_consumes_only_new_candles_and_matches_ta():
+    df = _klines(400)
+    store = RSIStateStore()
+
+    for end in (50, 51, 51, 120, 400):
+        part = df.iloc[:end]
+        got = store.latest("BTCUSDT", "1h", _times(part), part["close"].to_numpy())
+        expected = RSIIndicator(close=part["close"]).rsi().iloc[-1]
+        assert abs(got - expected) < 1e-12
+
+    # Newest candle is only peeked, never committed.
+    assert store._states[("BTCUSDT", "1h", 14)].count == 399
+
+
+def test_store_tolerates_revised_open_candle():
+    df = _klines(100)
+    store = RSIStateStore()
+    store.latest("ETHUSDT", "1h", _times(df), df["close"].to_numpy())
+
+    revised = df.copy()
+    revised.loc[revised.index[-1], "close"] *= 1.05
+    got = store.latest("ETHUSDT", "1h", _times(revised), revised["close"].to_numpy())
+    assert abs(got - RSIIndicator(close=revised["close"]).rsi().iloc[-1]) < 1e-12
+
+
+def test_store_persists_state(tmp_path):
+    df = _klines(200)
+    RSIStateStore(str(tmp_path)).latest("BTCUSDT", "1h", _times(df.iloc[:150]), df["close"].to_numpy()[:150])
+
+    reloaded = RSIStateStore(str(tmp_path))
+    got = reloaded.latest("BTCUSDT", "1h", _times(df), df["close"].to_numpy())
+    assert reloaded._states[("BTCUSDT", "1h", 14)].count == 199
+    assert abs(got - RSIIndicator(close=df["close"]).rsi().iloc[-1]) < 1e-12
+
+
+def test_strategy_incremental_path_matches_full_path():
+    df = _klines(300, seed=3)
+    historical = [{"date": None, "price": 100.0}]
+    forecast = [{"date": None, "price": 100.0}, {"date": None, "price": 103.0}]
+
+    full = RSIMomentumStrategy(fee_pct=0.0, rsi_threshold=0)
+    incremental = RSIMomentumStrategy(fee_pct=0.0, rsi_threshold=0, rsi_store=RSIStateStore())
+
+    assert full.evaluate(historical, forecast, df) == incremental.evaluate(
+        historical, forecast, df, state_key=("BTCUSDT", "1h")
+    )
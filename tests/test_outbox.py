@@ -0,0 +1,167 @@
+import asyncio
+import json
+import os
+
+from app.notifications.outbox import _ACTIVE_JOURNALS, TelegramOutbox, TokenBucket
+
+
+class FakeBot:
+    def __init__(self, fail_times: int = 0, exc: Exception = None):
+        self.sent = []
+        self.fail_times = fail_times
+        self.exc = exc or ConnectionError("network down")
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise self.exc
+        self.sent.append((chat_id, text))
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_token_bucket_limits_rate():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+    assert bucket.delay() == 0
+    bucket.tokens = 0
+    assert bucket.delay() == 0.5
+    now[0] += 0.5
+    assert bucket.delay() == 0
+
+
+def test_outbox_sends_single_messages_without_blocking():
+    async def scenario():
+        bot = FakeBot()
+        outbox = TelegramOutbox(bot, chat_id=1, rate_per_sec=1000, burst=10, digest_window=0.01)
+        await outbox.start()
+        assert outbox.enqueue("one") and outbox.enqueue("two")
+        await outbox.close(timeout=2)
+        return bot
+
+    bot = _run(scenario())
+    assert [text for _, text in bot.sent] == ["one", "two"]
+
+
+def test_outbox_coalesces_bursts_into_digest():
+    async def scenario():
+        bot = FakeBot()
+        outbox = TelegramOutbox(bot, chat_id=1, rate_per_sec=1000, burst=10, digest_threshold=3, digest_window=0.05)
+        await outbox.start()
+        for i in range(5):
+            outbox.enqueue(f"signal {i}")
+        await outbox.close(timeout=2)
+        return bot
+
+    bot = _run(scenario())
+    assert len(bot.sent) == 1
+    assert bot.sent[0][1].startswith("🗞 *5 signals*")
+    assert all(f"signal {i}" in bot.sent[0][1] for i in range(5))
+
+
+def test_outbox_retries_with_backoff():
+    async def scenario():
+        bot = FakeBot(fail_times=2)
+        outbox = TelegramOutbox(bot, chat_id=1, rate_per_sec=1000, burst=10, digest_window=0.01, base_backoff=0.01)
+        await outbox.start()
+        outbox.enqueue("retry me")
+        await outbox.close(timeout=2)
+        return bot, outbox
+
+    bot, outbox = _run(scenario())
+    assert [text for _, text in bot.sent] == ["retry me"]
+    assert outbox.sent == 1 and outbox.failed == 0
+
+
+class MarkupBot(FakeBot):
+    """Rejects Markdown messages containing an unbalanced `_`, like Telegram's entity parser."""
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if parse_mode == "Markdown" and text.count("_") % 2:
+            from telegram.error import BadRequest
+
+            raise BadRequest("Can't parse entities")
+        self.sent.append((chat_id, text))
+
+
+def test_outbox_splits_a_rejected_digest_and_sends_bad_markup_as_plain_text():
+    async def scenario():
+        bot = MarkupBot()
+        outbox = TelegramOutbox(bot, chat_id=1, rate_per_sec=1000, burst=10, digest_threshold=3, digest_window=0.05)
+        await outbox.start()
+        for text in ["signal 0", "signal_1 broken", "signal 2", "signal 3"]:
+            outbox.enqueue(text)
+        await outbox.close(timeout=2)
+        return bot, outbox
+
+    bot, outbox = _run(scenario())
+    assert [text for _, text in bot.sent] == ["signal 0", "signal_1 broken", "signal 2", "signal 3"]
+    assert outbox.sent == 4 and outbox.failed == 0 and outbox.pending() == 0
+
+
+def test_outbox_persists_undelivered_and_resends_after_restart(tmp_path):
+    path = str(tmp_path / "outbox.jsonl")
+
+    async def first_run():
+        outbox = TelegramOutbox(
+            FakeBot(fail_times=100), chat_id=1, rate_per_sec=1000, burst=10,
+            digest_window=0.01, max_retries=1, base_backoff=0.01, persist_path=path,
+        )
+        await outbox.start()
+        outbox.enqueue("lost?")
+        await outbox.close(timeout=2)
+
+    async def second_run():
+        bot = FakeBot()
+        outbox = TelegramOutbox(bot, chat_id=1, rate_per_sec=1000, burst=10, digest_window=0.01, persist_path=path)
+        await outbox.start()
+        await outbox.close(timeout=2)
+        return bot
+
+    _run(first_run())
+    assert (tmp_path / "outbox.jsonl").exists()
+    bot = _run(second_run())
+    assert [text for _, text in bot.sent] == ["lost?"]
+    assert not (tmp_path / "outbox.jsonl").exists()
+
+
+def test_outbox_journals_on_enqueue_so_a_crash_loses_nothing(tmp_path):
+    path = str(tmp_path / "outbox.jsonl")
+    dead = tmp_path / "outbox.jsonl.4199999-1.journal"  # left behind by a process that is gone
+    dead.write_text(json.dumps({"text": "from a dead process", "key": None, "queued_at": 0}) + "\n{trunc")
+
+    class HangingBot(FakeBot):
+        async def send_message(self, chat_id, text, parse_mode=None):
+            if text != "delivered":
+                await asyncio.Event().wait()  # never returns
+            self.sent.append((chat_id, text))
+
+    async def crashed_run():
+        outbox = TelegramOutbox(HangingBot(), chat_id=1, rate_per_sec=1000, burst=10, digest_window=0.01,
+                                persist_path=path)
+        journal = tmp_path / os.path.basename(outbox._journal)
+        outbox.enqueue("delivered")
+        outbox.enqueue("in flight")
+        assert len(journal.read_text().splitlines()) == 2  # on disk before any send
+        await outbox.start()
+        await asyncio.sleep(0.1)
+        # "delivered" is compacted away; the dead process's message was taken over.
+        assert sorted(json.loads(line)["text"] for line in journal.read_text().splitlines()) == [
+            "from a dead process", "in flight",
+        ]
+        outbox._task.cancel()  # killed: no close(), nothing moved to the spool
+        _ACTIVE_JOURNALS.discard(outbox._journal)  # ...and this process is gone
+
+    async def restart():
+        bot = FakeBot()
+        outbox = TelegramOutbox(bot, chat_id=1, rate_per_sec=1000, burst=10, digest_window=0.01, persist_path=path)
+        await outbox.start()
+        await outbox.close(timeout=2)
+        return bot
+
+    _run(crashed_run())
+    bot = _run(restart())
+    assert sorted(text for _, text in bot.sent) == ["from a dead process", "in flight"]
+    assert os.listdir(tmp_path) == []
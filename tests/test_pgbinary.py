@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.db.pgbinary import BinaryCopyError, SIGNATURE, decode_rows, parse_copy_binary, row_dtype
+
+PG_EPOCH = datetime(2000, 1, 1)
+
+
+def _field(kind, value):
+    if value is None:
+        return (-1).to_bytes(4, "big", signed=True)  # NULL: length -1, no payload
+    if kind == "timestamp":
+        payload = ((value - PG_EPOCH) // timedelta(microseconds=1)).to_bytes(8, "big", signed=True)
+    else:
+        payload = np.array(value, dtype=">f8").tobytes()
+    return len(payload).to_bytes(4, "big") + payload
+
+
+def _stream(rows, kinds=("timestamp", "float8"), extension=b""):
+    """Binary COPY bytes: signature, flags, header extension, tuples, trailer."""
+    out = bytearray(SIGNATURE + (0).to_bytes(4, "big") + len(extension).to_bytes(4, "big") + extension)
+    for row in rows:
+        out += len(row).to_bytes(2, "big")
+        for kind, value in zip(kinds, row):
+            out += _field(kind, value)
+    return bytes(out + b"\xff\xff")
+
+
+def test_decodes_timestamps_and_float8_after_a_header_extension():
+    rows = [
+        (datetime(1999, 12, 31, 23, 59, 59, 999999), -1.5),  # before the Postgres epoch
+        (datetime(2024, 1, 1, 12, 30, 0, 123456), 42000.25),
+        (datetime(2024, 1, 1, 13, 30), float("nan")),
+    ]
+    times, values = parse_copy_binary(_stream(rows, extension=b"\x00\x01\x02\x03\x04"), ("timestamp", "float8"))
+
+    assert times.dtype == np.dtype("datetime64[ns]") and values.dtype == np.dtype("float64")
+    np.testing.assert_array_equal(times, np.array([t for t, _ in rows], dtype="datetime64[ns]"))
+    np.testing.assert_array_equal(values, [-1.5, 42000.25, np.nan])
+    assert values.dtype.isnative
+
+
+def test_empty_result_decodes_to_empty_arrays():
+    times, values = parse_copy_binary(_stream([]), ("timestamp", "float8"))
+    assert len(times) == 0 and times.dtype == np.dtype("datetime64[ns]") and len(values) == 0
+
+
+def test_null_fields_are_rejected():
+    # One NULL makes the rows variable-width...
+    with pytest.raises(BinaryCopyError):
+        parse_copy_binary(_stream([(datetime(2024, 1, 1), None)]), ("timestamp", "float8"))
+    # ...and a NULL that happens to keep the stream a multiple of the row width is caught by its length.
+    raw = np.zeros(2, dtype=row_dtype(("timestamp", "float8")))
+    raw["nfields"] = 2
+    raw["len0"] = raw["len1"] = 8
+    raw["len1"][1] = -1
+    with pytest.raises(BinaryCopyError, match="NULLs"):
+        decode_rows(raw, ("timestamp", "float8"))
+
+
+@pytest.mark.parametrize("damage", ["signature", "trailer", "field_count"])
+def test_malformed_streams_are_rejected(damage):
+    data = _stream([(datetime(2024, 1, 1), 1.0)])
+    kinds = ("timestamp", "float8")
+    if damage == "signature":
+        data = b"PGCOPY\n\xff\r\n\x01" + data[11:]
+    elif damage == "trailer":
+        data = data[:-2]
+    else:
+        kinds = ("timestamp", "float8", "float8")
+    with pytest.raises(BinaryCopyError):
+        parse_copy_binary(data, kinds)
+
+
+def test_unsupported_kind_is_rejected():
+    with pytest.raises(BinaryCopyError):
+        row_dtype(("timestamp", "text"))
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from app.strategies.base import BaseStrategy
+from app.strategies.pipeline import RunContext, StrategyPipeline
+from app.strategies.rsi_momentum import RSIMomentumStrategy
+from app.utils.metrics import Registry, RunMetrics
+
+
+class _Fixed(BaseStrategy):
+    requires = ("klines",)
+    confirmation_label = "FIXED"
+    confirmation_fields = ("score",)
+
+    def __init__(self, action):
+        self.action = action
+        self.calls = 0
+
+    def evaluate(self, historical, forecast):
+        self.calls += 1
+        return {"action": self.action, "score": 1.5}
+
+
+def _ctx(calls):
+    def _load():
+        calls.append("klines")
+        return "df"
+
+    return RunContext("BTCUSDT", "1h", [{"price": 100.0}], [{"price": 101.0}, {"price": 102.0}],
+                      loaders={"klines": _load})
+
+
+def test_primary_hold_skips_loaders_and_confirmations():
+    calls = []
+    confirm = _Fixed("BUY")
+    result = StrategyPipeline([confirm]).run({"action": "HOLD"}, _ctx(calls))
+
+    assert calls == [] and confirm.calls == 0
+    (_, skipped), = result.confirmations
+    assert skipped == {"action": "HOLD", "reason": "Skipped: primary HOLD", "skipped": True}
+    assert result.final == {"action": "HOLD", "source": "Unconfirmed"}
+
+    result = StrategyPipeline([confirm], record_skipped=False).run({"action": "HOLD"}, _ctx(calls))
+    assert result.confirmations == [(confirm, None)]
+
+
+def test_confirmed_signal_merges_fields_and_loads_once():
+    calls = []
+    first, second = _Fixed("BUY"), _Fixed("BUY")
+    metrics = RunMetrics(Registry())
+    result = StrategyPipeline([first, second]).run({"action": "BUY", "entry": 100.0}, _ctx(calls), metrics)
+
+    assert calls == ["klines"]
+    assert result.final == {"action": "BUY", "entry": 100.0, "score": 1.5,
+                            "confirmed_by": "FIXED+FIXED", "source": "Confirmed"}
+    assert [s.stage for s in metrics.spans] == ["evaluate._Fixed", "evaluate._Fixed"]
+
+
+def test_disagreement_short_circuits_later_confirmations():
+    calls = []
+    first, second = _Fixed("HOLD"), _Fixed("SHORT")
+    result = StrategyPipeline([first, second]).run({"action": "SHORT"}, _ctx(calls))
+
+    assert first.calls == 1 and second.calls == 0
+    assert result.confirmations[1][1]["reason"] == "Skipped: _Fixed HOLD"
+    assert result.final["action"] == "HOLD"
+
+
+def test_rsi_strategy_reads_klines_from_context():
+    close = 100 * np.cumprod(np.full(100, 1.01))
+    df = pd.DataFrame({"open_time": pd.date_range("2024-01-01", periods=100, freq="h"), "close": close})
+    ctx = RunContext("BTCUSDT", "1h", [{"price": 100.0}], [{"price": 101.0}, {"price": 110.0}],
+                     loaders={"klines": lambda: df})
+    rsi = RSIMomentumStrategy(fee_pct=0.005)
+    result = StrategyPipeline([rsi]).run({"action": "BUY", "entry": 100.0}, ctx)
+
+    assert result.final["source"] == "Confirmed"
+    assert result.final["confirmed_by"] == "RSI"
+    assert result.final["rsi"] == 100.0
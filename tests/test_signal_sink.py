@@ -0,0 +1,104 @@
+import logging
+from contextlib import contextmanager
+
+import pytest
+
+from app.db import strategy
+from app.db.strategy import SignalSink
+
+
+class FakeDB:
+    """Stands in for get_connection + execute_values; records each written batch."""
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    @contextmanager
+    def connection(self):
+        class _Conn:
+            def cursor(self):
+                return self
+
+            def close(self):
+                pass
+
+        yield _Conn()
+
+    def execute_values(self, cursor, sql, rows, page_size=None):
+        if self.fail:
+            raise RuntimeError("db down")
+        self.batches.append([(coin, model, signal) for _, coin, model, signal in rows])
+
+
+@pytest.fixture
+def db(monkeypatch):
+    fake = FakeDB()
+    monkeypatch.setattr(strategy, "get_connection", fake.connection)
+    monkeypatch.setattr(strategy, "execute_values", fake.execute_values)
+    return fake
+
+
+def test_flushes_when_batch_size_is_reached_and_on_exit(db):
+    with SignalSink(batch_size=2) as sink:
+        sink.add("BTCUSDT", "GRU", {"n": 1})
+        assert db.batches == []
+        sink.add("ETHUSDT", "GRU", {"n": 2})
+        assert [c for c, _, _ in db.batches[0]] == ["BTCUSDT", "ETHUSDT"]
+        sink.add("SOLUSDT", "GRU", {"n": 3})
+        assert len(db.batches) == 1 and len(sink) == 1
+
+    assert [c for c, _, _ in db.batches[1]] == ["SOLUSDT"]
+    assert sink.written == 3 and len(sink) == 0
+
+
+def test_failed_write_requeues_rows_in_order(db):
+    sink = SignalSink(batch_size=2)
+    db.fail = True
+    sink.add("A", "GRU", {})
+    sink.add("B", "GRU", {})  # flush fails inside add(); rows stay pending
+    assert len(sink) == 2 and db.batches == []
+    with pytest.raises(RuntimeError):
+        sink.flush()
+    sink.add("C", "GRU", {})
+
+    db.fail = False
+    assert sink.flush() == 3
+    assert [c for c, _, _ in db.batches[0]] == ["A", "B", "C"]
+
+
+def test_drops_oldest_rows_beyond_max_pending_with_a_warning(db, caplog):
+    sink = SignalSink(batch_size=2, max_pending=3)
+    db.fail = True
+    with caplog.at_level(logging.WARNING, logger="strategies.db"):
+        for coin in "ABCDE":
+            sink.add(coin, "GRU", {})
+    assert len(sink) == 3 and sink.dropped == 2
+    assert "dropped" in caplog.text
+
+    db.fail = False
+    sink.close()
+    assert [c for c, _, _ in db.batches[0]] == ["C", "D", "E"]
+
+
+def test_after_flush_runs_once_pending_rows_are_written(db):
+    sink = SignalSink(batch_size=3, max_pending=3)
+    calls = []
+    sink.add("A", "GRU", {})
+    sink.after_flush(lambda: calls.append("a"))
+    db.fail = True
+    with pytest.raises(RuntimeError):
+        sink.flush()
+    assert calls == []  # kept for the retry
+
+    db.fail = False
+    sink.flush()
+    assert calls == ["a"]
+
+    sink.after_flush(lambda: calls.append("lost"))
+    db.fail = True
+    for coin in "BCDE":
+        sink.add(coin, "GRU", {})  # overflows: a row is dropped, so is the callback
+    db.fail = False
+    sink.flush()
+    assert calls == ["a"]
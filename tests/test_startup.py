@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+from app.utils.startup import ImportTimer
+
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run(code: str) -> str:
+    env = {**os.environ, "PYTHONPATH": REPO}
+    env.pop("TELEGRAM_BOT_TOKEN", None)  # importing must not need a token any more
+    out = subprocess.run([sys.executable, "-c", code], env=env, cwd=REPO, capture_output=True, text=True, check=True)
+    return out.stdout.strip()
+
+
+def test_main_import_defers_heavy_modules():
+    out = _run(
+        "import sys, app.main\n"
+        "print('telegram' in sys.modules, 'ta' in sys.modules, 'pandas' in sys.modules)"
+    )
+    assert out == "False False False"
+
+
+def test_lazy_pandas_loads_on_first_use():
+    out = _run(
+        "from app.db import models\n"
+        "import sys\n"
+        "print(len(models.as_datetime64(['2024-01-01'])), type(sys.modules['pandas']).__name__)"
+    )
+    assert out == "1 module"
+
+
+def test_import_timer_records_new_imports(tmp_path, monkeypatch):
+    (tmp_path / "startup_probe_outer.py").write_text("import startup_probe_inner\n")
+    (tmp_path / "startup_probe_inner.py").write_text("X = 1\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    timer = ImportTimer().install()
+    try:
+        import startup_probe_outer  # noqa: F401
+    finally:
+        timer.uninstall()
+
+    records = {name: (own, cum) for name, own, cum in timer.records}
+    assert set(records) == {"startup_probe_outer", "startup_probe_inner"}
+    assert records["startup_probe_outer"][1] >= records["startup_probe_inner"][1]
+    assert "startup_probe_outer" in timer.report()
+
+
+def test_lazy_pandas_first_use_from_many_threads_sees_a_complete_module():
+    out = _run(
+        "import threading\n"
+        "from app.utils.startup import lazy_import\n"
+        "pd = lazy_import('pandas')\n"
+        "barrier, results = threading.Barrier(8), []\n"
+        "def use():\n"
+        "    barrier.wait()\n"
+        "    results.append(len(pd.DataFrame({'a': [1, 2]})))\n"
+        "threads = [threading.Thread(target=use) for _ in range(8)]\n"
+        "[t.start() for t in threads]; [t.join() for t in threads]\n"
+        "import sys\n"
+        "print(results, type(sys.modules['pandas']).__name__)"
+    )
+    assert out == "[2, 2, 2, 2, 2, 2, 2, 2] module"
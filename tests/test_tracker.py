@@ -0,0 +1,116 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db import strategy
+from app.tracker import OpenSignal, OpenSignalTracker, format_outcome_message
+
+T0 = datetime(2024, 1, 1)
+MIN = timedelta(minutes=1)
+
+
+def _sig(sid, action="BUY", entry=100.0, stop=None, target=None, coin="BTCUSDT", at=T0):
+    if stop is None:
+        stop = entry * (0.98 if action == "BUY" else 1.02)
+    if target is None:
+        target = entry * (1.04 if action == "BUY" else 0.96)
+    return OpenSignal(sid, coin, "GRU+RSIMomentumStrategy", at, action, entry, stop, target)
+
+
+def _resolved(outcomes):
+    return {o.signal.signal_id: o.outcome for o in outcomes}
+
+
+def test_levels_resolve_per_side_and_stop_wins_inside_one_candle():
+    tracker = OpenSignalTracker()
+    assert tracker.add(_sig("buy"))
+    assert tracker.add(_sig("short", "SHORT"))
+    assert tracker.add(_sig("both", entry=100.0, stop=99.5, target=100.5))
+    assert not tracker.add(_sig("buy"))  # duplicate
+    assert not tracker.add(_sig("bad", stop=101.0))  # stop above entry
+
+    assert tracker.on_candle("BTCUSDT", T0, high=100.2, low=99.8) == []
+    out = tracker.on_candle("BTCUSDT", T0 + MIN, high=101.0, low=99.0)
+    assert _resolved(out) == {"both": "stop_loss"}
+    assert out[0].exit_price == 99.5 and out[0].return_pct < 0
+
+    out = tracker.on_candle("BTCUSDT", T0 + 2 * MIN, high=104.5, low=100.0)
+    assert _resolved(out) == {"buy": "take_profit", "short": "stop_loss"}
+    assert len(tracker) == 0 and tracker.symbols() == []
+    assert "Take profit" in format_outcome_message(next(o for o in out if o.outcome == "take_profit"))
+
+
+def test_signals_are_live_from_their_creation_and_can_expire():
+    tracker = OpenSignalTracker(max_age=timedelta(minutes=10))
+    tracker.add(_sig("later", at=T0 + 5 * MIN))
+    assert tracker.on_candle("BTCUSDT", T0, high=200.0, low=1.0, close=100.0) == []  # before created_at
+    assert "later" in tracker
+
+    out = tracker.on_candle("BTCUSDT", T0 + 16 * MIN, high=100.5, low=99.5, close=100.2)
+    assert _resolved(out) == {"later": "expired"} and out[0].exit_price == 100.2
+
+
+def test_without_max_age_no_expiry_heap_is_kept():
+    tracker = OpenSignalTracker()
+    tracker.add(_sig("open"))
+    assert tracker.on_candle("BTCUSDT", T0 + 600 * MIN, high=100.5, low=99.5, close=100.2) == []
+    assert tracker._books["BTCUSDT"].by_age == [] and "open" in tracker
+
+
+def test_matches_a_full_scan_over_random_signals():
+    rng = random.Random(7)
+    tracker = OpenSignalTracker()
+    open_signals = {}
+    for i in range(3000):
+        action = rng.choice(("BUY", "SHORT"))
+        entry = rng.uniform(90, 110)
+        sig = _sig(str(i), action, entry, coin=rng.choice(("BTCUSDT", "ETHUSDT")), at=T0 + rng.randrange(50) * MIN)
+        tracker.add(sig)
+        open_signals[sig.signal_id] = sig
+
+    price = {"BTCUSDT": 100.0, "ETHUSDT": 100.0}
+    for minute in range(300):
+        for coin in price:
+            price[coin] += rng.gauss(0, 0.6)
+            high, low = price[coin] + rng.uniform(0, 1), price[coin] - rng.uniform(0, 1)
+            t = T0 + minute * MIN
+            expected = {}
+            for sid, s in list(open_signals.items()):
+                if s.coin != coin or s.created_at > t:
+                    continue
+                stop_hit = low <= s.stop_loss if s.action == "BUY" else high >= s.stop_loss
+                tp_hit = high >= s.take_profit if s.action == "BUY" else low <= s.take_profit
+                if stop_hit or tp_hit:
+                    expected[sid] = "stop_loss" if stop_hit else "take_profit"
+                    del open_signals[sid]
+            assert _resolved(tracker.on_candle(coin, t, high, low)) == expected
+    assert len(tracker) == len(open_signals)
+
+
+@pytest.mark.parametrize("interval,bounded", [("1m", True), ("1M", False)])
+def test_candles_after_bounds_by_interval_or_by_the_newest_candle(monkeypatch, interval, bounded):
+    executed = []
+
+    @contextmanager
+    def _connection():
+        class _Cursor:
+            def execute(self, sql, params):
+                executed.append(params)
+
+            def fetchall(self):
+                return []
+
+            def close(self):
+                pass
+
+        class _Conn:
+            def cursor(self):
+                return _Cursor()
+        yield _Conn()
+
+    monkeypatch.setattr(strategy, "get_connection", _connection)
+    assert strategy.fetch_candles_after(interval, {"BTCUSDT": T0}) == []
+    # Calendar months have no fixed length: the query falls back to "all but the newest candle".
+    assert (executed[0]["closed_before"] is not None) is bounded